@@ -1,7 +1,8 @@
 import os
 import json
-import hashlib
 import webbrowser
+import time
+import multiprocessing
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QLabel, 
                                QLineEdit, QPushButton, QFileDialog, QTreeWidget, QTreeWidgetItem, QListWidget, 
                                QMessageBox, QTextEdit, QFrame, QDialog, QMenu)
@@ -11,24 +12,22 @@ from PySide6.QtGui import QPalette, QColor
 import sys
 import win32com.client as win32
 import shutil
-import base64
 from PySide6.QtGui import QImage, QTextCursor
 from PySide6.QtWidgets import QLCDNumber
 from PySide6.QtCore import QMimeData, QBuffer, QByteArray
 from PySide6.QtWidgets import QTextEdit  # Correct import for QTextEdit
 from PySide6.QtWidgets import QComboBox
-import re
 from PySide6.QtGui import QIcon, QPixmap
 from functools import partial
 import sqlite3
-from rapidfuzz import fuzz
+import numpy as np
 from ai_chat_popup import AIChatPopup
-from PySide6.QtCore import QPoint
+from PySide6.QtCore import QEvent, QPoint, QThread, Signal
 from PySide6.QtWidgets import QProgressBar
-from Funtion.percent_exclude_search import parse_percent_query, match_A_percent_B
+from Funtion.percent_exclude_search import parse_percent_query, compile_name_query
 from hud_widgets import qss_hud_metal_header_feel, qss_white_results
 from hud_widgets import qss_hud_metal_header_feel, qss_white_results
-from Funtion.tree_sorter import TreeSortHelper
+from Funtion.tree_sorter import TreeSortHelper, natural_key_str
 from PySide6.QtGui import QAction, QKeySequence
 from Funtion.help_dialog import HelpDialog
 
@@ -39,18 +38,39 @@ def get_app_dir():
         return os.path.dirname(sys.executable)   # thư mục chứa .exe
     return os.path.dirname(os.path.abspath(__file__))  # thư mục chứa Finding7.1.py
 from Funtion.learning_vector_store import VectorStoreDialog
+from Funtion.file_catalog import open_catalog, CATALOG_MAX_AGE, RefreshStats
+from Funtion.tree_walker import walk_files, FileRecord
+from Funtion.fs_watcher import start_watcher
+from Funtion.search_worker import SearchWorker
+from Funtion.results_model import ResultsTableModel
+from Funtion.synonyms import get_synonym_service
+from Funtion.fuzzy_names import keyword_groups, score_names
+from Funtion.duplicate_finder import find_duplicates
+from Funtion.hash_cache import open_hash_cache
+from Funtion.near_duplicates import find_near_duplicates
+from Funtion.file_table_model import FileTableModel
+from Funtion.index_fts import ensure_fts, open_cursor
+from Funtion.index_db_pool import IndexDbPool, IndexSearchSignals
+from Funtion.content_indexer import build_index
+from Funtion.notes_store import NotesStore
+from Funtion.image_store import CAS_SCHEME, open_image_store
+from PySide6.QtWidgets import QTableView, QAbstractItemView, QHeaderView
 
 # pyinstaller --noconfirm --clean --onefile --windowed "Finding7.1.py" --icon "icon.ico"
 
 # Define these at the top of your script
-DATA_FILE = "containers_data.json"  # Path where your data file will be stored
+DATA_FILE = "containers_data.json"  # Path where your data file will be stored (bản cũ, chỉ để import)
+NOTES_DB_FILE = "containers_data.db"  # Containers + notes (SQLite, ghi từng dòng)
 IMAGE_DIR = "images"  # Directory to store images
 
 # Ensure the IMAGE_DIR exists; if not, create it
 os.makedirs(IMAGE_DIR, exist_ok=True)
 
 EXE_ADDON_FILE = "exe_addons.json"  # JSON file to store EXE add-ons
-DATA_FILE = "containers_data.json"  # Path where your data file will be stored
+CATALOG_DIR = os.path.join(get_app_dir(), "FileCatalog")  # Filename catalog (SQLite) cho từng root folder
+SEARCH_CHUNK = 20000  # số tên lọc mỗi lô khi search (giữa các lô: kiểm tra Cancel + đẩy kết quả lên UI)
+RESULTS_TABLE_THRESHOLD = 20000  # quá số kết quả này thì chuyển sang bảng model/view (ResultsTableModel)
+DATA_FILE = "containers_data.json"  # Path where your data file will be stored (bản cũ, chỉ để import)
 IMAGE_DIR = "images"  # Directory to store images
 
 # Ensure the IMAGE_DIR exists; if not, create it
@@ -61,6 +81,19 @@ class RichTextEdit(QTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAcceptRichText(True)
+        self.image_store = open_image_store(IMAGE_DIR)  # ảnh của note: kho theo hash, note chỉ giữ "cas:<hash>"
+
+    def insert_image_bytes(self, data: bytes):
+        """Lưu ảnh vào kho (trùng nội dung => dùng lại) rồi chèn tham chiếu cas: tại con trỏ."""
+        digest = self.image_store.put_bytes(data)
+        self.textCursor().insertHtml(f'<img src="{self.image_store.url(digest)}">')
+
+    def loadResource(self, resource_type, url):
+        # Ảnh cas: chỉ đọc từ đĩa khi document cần hiển thị (document tự cache sau lần đầu)
+        if url.scheme() == CAS_SCHEME:
+            data = self.image_store.get_bytes(url.path())
+            return QImage.fromData(data) if data else QImage()
+        return super().loadResource(resource_type, url)
 
     def insertFromMimeData(self, source: QMimeData):
         # Handle image data being pasted
@@ -69,14 +102,9 @@ class RichTextEdit(QTextEdit):
             buffer = QBuffer()
             buffer.open(QBuffer.ReadWrite)
             image.save(buffer, 'PNG')  # Save image data to the buffer in PNG format
-            
-            # Convert buffer content to base64
-            base64_data = base64.b64encode(buffer.data()).decode()
-            html_image = f'<img src="data:image/png;base64,{base64_data}">'
-            
-            # Insert the image as HTML into the text
-            cursor = self.textCursor()
-            cursor.insertHtml(html_image)
+
+            # Insert the image (qua kho ảnh, không nhúng base64 vào HTML)
+            self.insert_image_bytes(bytes(buffer.data()))
         else:
             # For other types of data, use the default behavior
             super().insertFromMimeData(source)
@@ -131,17 +159,13 @@ class NotesWindow(QDialog):
         self.file_name_label.setText(f"{os.path.basename(file_path)}")
 
 
-        # Find and display the note for the selected file
-        for file, note in self.main_app.containers[container_name]:
-            if file == file_path:
-                # Handle case where note might be plain text instead of a dictionary
-                if isinstance(note, str):
-                # Convert old string format to new dictionary format
-                    note = {"text": note}
-            
-            # Set the note content, assuming it's now a dictionary
-                self.note_text.setHtml(note.get("text", ""))
-                break
+        # Đọc note của đúng file này từ SQLite (không nạp sẵn note của mọi file)
+        html = self.main_app.notes_store.get_note(container_name, file_path)
+        # Note cũ còn ảnh base64 inline: chuyển sang kho ảnh 1 lần rồi lưu lại
+        slim = self.note_text.image_store.externalize_data_uris(html)
+        if slim != html:
+            self.main_app.notes_store.set_note(container_name, file_path, slim)
+        self.note_text.setHtml(slim)
 
         self.show()
 
@@ -154,24 +178,20 @@ class NotesWindow(QDialog):
         file_path, _ = file_dialog.getOpenFileName()
 
         if file_path:
-            # Insert image at the current cursor position in QTextEdit
-            cursor = self.note_text.textCursor()
-            cursor.insertImage(file_path)
+            # Insert image at the current cursor position in QTextEdit (bản sao trong kho ảnh)
+            try:
+                with open(file_path, "rb") as f:
+                    self.note_text.insert_image_bytes(f.read())
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Cannot read image: {e}")
 
     def save_note(self):
         """Save the note for the selected file within the container."""
         if self.selected_container and self.selected_file:
             # Save the content of QTextEdit as HTML to preserve text and images
-            note_content = {
-                "text": self.note_text.toHtml()  # Save as HTML to include images
-            }
-            # Find the correct file entry and update its note
-            for i, (file_path, _) in enumerate(self.main_app.containers[self.selected_container]):
-                if file_path == self.selected_file:
-                    self.main_app.containers[self.selected_container][i] = (file_path, note_content)
-                    break
-            # Save the updated data back to the JSON file
-            self.main_app.save_data_to_file()
+            note_content = self.note_text.image_store.externalize_data_uris(self.note_text.toHtml())
+            # Chỉ ghi dòng note của file này
+            self.main_app.notes_store.set_note(self.selected_container, self.selected_file, note_content)
             QMessageBox.information(self, "Success", "Note saved successfully!")
 
 
@@ -258,6 +278,9 @@ class FileSearchApp(QMainWindow):
         self.filename_entry = QLineEdit()
         self.search_name_button = QPushButton("Search by Name")
         self.search_name_button.clicked.connect(self.search_files)
+        self.cancel_search_button = QPushButton("Cancel")
+        self.cancel_search_button.setEnabled(False)
+        self.cancel_search_button.clicked.connect(self.cancel_search)
 
         # Add all widgets to the same row (folder_layout)
         folder_layout.addWidget(self.folder_label)
@@ -266,6 +289,7 @@ class FileSearchApp(QMainWindow):
         folder_layout.addWidget(self.filename_label)
         folder_layout.addWidget(self.filename_entry)
         folder_layout.addWidget(self.search_name_button)
+        folder_layout.addWidget(self.cancel_search_button)
 
         # TreeWidget for displaying search results
         self.tree_widget = QTreeWidget()
@@ -321,13 +345,37 @@ class FileSearchApp(QMainWindow):
         self.tree_widget.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree_widget.customContextMenuRequested.connect(self.show_treeview_context_menu)
 
+        # Bảng model/view cho kết quả rất lớn (thay tree khi vượt RESULTS_TABLE_THRESHOLD)
+        self.results_model = ResultsTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.results_table.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.results_table.setShowGrid(False)
+        self.results_table.setWordWrap(False)
+        self.results_table.verticalHeader().setVisible(False)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.results_table.verticalHeader().setDefaultSectionSize(22)
+        self.results_table.setSortingEnabled(True)
+        for col, width in enumerate((650, 129, 80, 90, 350)):
+            self.results_table.setColumnWidth(col, width)
+        self.results_table.doubleClicked.connect(self.open_file_from_table)
+        self.results_table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.results_table.customContextMenuRequested.connect(self.show_table_context_menu)
+        self.results_table.hide()
+        self._table_mode = False
+        self._tree_records = []  # record đang hiển thị ở tree (chuyển sang model khi vượt ngưỡng)
+
         # Search duplicates button
         self.search_duplicates_button = QPushButton("Search Duplicates")
         self.search_duplicates_button.clicked.connect(self.search_duplicates)
+        self.near_duplicates_button = QPushButton("Near Duplicates")  # tài liệu gần trùng nội dung (MinHash)
+        self.near_duplicates_button.clicked.connect(self.search_near_duplicates)
 
         # Adding widgets to the left layout
         self.left_layout.addLayout(folder_layout)
         self.left_layout.addWidget(self.tree_widget)
+        self.left_layout.addWidget(self.results_table)
 
         # Right side layout (Container Management)
         self.right_frame = QFrame()
@@ -411,6 +459,9 @@ class FileSearchApp(QMainWindow):
         self.list_files_button = QPushButton("List Files")  # Nút List Files
         self.list_files_button.clicked.connect(self.list_files_in_folder)
         self.hidden_frame_layout.addWidget(self.list_files_button)  # Thêm nút List Files vào hidden frame
+        self.rescan_catalog_button = QPushButton("Rescan Catalog")  # Quét lại catalog tên file của folder
+        self.rescan_catalog_button.clicked.connect(self.rescan_catalog)
+        self.hidden_frame_layout.addWidget(self.rescan_catalog_button)
 
 
         # Toggle Button to show/hide the hidden frame
@@ -495,17 +546,21 @@ class FileSearchApp(QMainWindow):
 
 
          # Initialize containers and EXE add-ons
-        self.containers = {}
+        self.containers = {}  # {container: [file_path, ...]} (note HTML chỉ đọc từ notes_store khi mở)
+        self.notes_store = NotesStore(NOTES_DB_FILE, legacy_json=DATA_FILE)
+        self._catalog_watcher = None  # watcher nền giữ catalog của folder đang search luôn mới
+        self._search_worker = None    # SearchWorker đang chạy (None = rảnh)
+        self._rescan_worker = None    # SearchWorker của Rescan Catalog
+        self._search_folder = ""
+        self._search_ranked = False
+        self._result_count = 0
+        self._near_dup_groups = 0
         self.exe_addons = []  # Store EXE file paths
 
         # Load data from files
         self.load_data_from_file()
         self.load_exe_addons()
 
-        # Load containers from file
-        self.containers = {}
-        self.load_data_from_file()
-
         # Create Notes Window (separate)
         self.notes_window = NotesWindow(parent=self)
         self.notes_window.main_app = self   # ✅ FIX: gắn main app vào notes window
@@ -519,6 +574,7 @@ class FileSearchApp(QMainWindow):
 
         # Move buttons into hidden frame
         self.hidden_frame_layout.addWidget(self.search_duplicates_button)
+        self.hidden_frame_layout.addWidget(self.near_duplicates_button)
         self.hidden_frame_layout.addWidget(self.open_notes_button)
         self.hidden_frame_layout.addWidget(self.get_hyperlink_button)
         self.hidden_frame_layout.addWidget(self.get_link_button)
@@ -583,25 +639,6 @@ class FileSearchApp(QMainWindow):
         dlg = HelpDialog(self)
         dlg.exec()
 
-    def format_mtime(self, file_path: str) -> str:
-        try:
-            ts = os.path.getmtime(file_path)
-            from datetime import datetime
-            return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
-        except Exception:
-            return ""
-    def get_file_type(self, file_path: str) -> str:
-        ext = os.path.splitext(file_path)[1].lower()
-        return ext[1:].upper() if ext else "FILE"
-
-    def get_file_size_mb(self, file_path: str) -> str:
-        try:
-            size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            return f"{size_mb:.2f}"
-        except Exception:
-            return ""
-
-
     def toggle_hidden_frame(self):
         """Show hidden_frame and hide hidden_frame_2."""
         if self.hidden_frame.isHidden():
@@ -718,11 +755,29 @@ class FileSearchApp(QMainWindow):
         if os.path.exists(folder):
             webbrowser.open(f'file:///{folder}')
 
+    def _selected_results(self):
+        """[(name, path)] đang chọn ở khung kết quả (tree hoặc bảng model/view)."""
+        if self._table_mode:
+            rows = sorted({idx.row() for idx in self.results_table.selectionModel().selectedRows()})
+            return [(self.results_model.name_at(r), self.results_model.path_at(r)) for r in rows]
+        return [(item.text(0), item.text(4)) for item in self.tree_widget.selectedItems()]
+
+    def _selected_paths(self):
+        return [path for _, path in self._selected_results()]
+
+    def _current_result_path(self):
+        """Path của dòng hiện tại (None nếu chưa chọn)."""
+        if self._table_mode:
+            idx = self.results_table.currentIndex()
+            return self.results_model.path_at(idx.row()) if idx.isValid() else None
+        item = self.tree_widget.currentItem()
+        return item.text(4) if item else None
+
     def get_name_from_tree_view(self):
         """Lấy tên của các file đã chọn từ TreeView."""
-        selected_items = self.tree_widget.selectedItems()
+        selected_items = self._selected_results()
         if selected_items:
-            names = [item.text(0) for item in selected_items]
+            names = [name for name, _ in selected_items]
             clipboard_content = "\n".join(names)
             QApplication.clipboard().setText(clipboard_content)
             QMessageBox.information(self, "Names Copied", "File names copied to clipboard.")
@@ -731,9 +786,8 @@ class FileSearchApp(QMainWindow):
 
     def get_link_from_tree_view(self):
         """Lấy đường dẫn file từ TreeView và sao chép vào clipboard."""
-        selected_items = self.tree_widget.selectedItems()
-        if selected_items:
-            links = [item.text(4) for item in selected_items]
+        links = self._selected_paths()
+        if links:
             clipboard_content = "\n".join(links)
             QApplication.clipboard().setText(clipboard_content)
             QMessageBox.information(self, "Links Copied", "File paths copied to clipboard.")
@@ -749,7 +803,7 @@ class FileSearchApp(QMainWindow):
         selected_container = selected_container_item.text()
         selected_file_name = item.text()
 
-        for file_path, note in self.containers.get(selected_container, []):
+        for file_path in self.containers.get(selected_container, []):
             if os.path.basename(file_path) == selected_file_name:
                 self.notes_window.display_note_for_file(selected_container, file_path)
                 return
@@ -763,7 +817,7 @@ class FileSearchApp(QMainWindow):
             del self.containers[container_name]
             self.containers_list.takeItem(self.containers_list.row(selected_item))
             self.container_files_list.clear()
-            self.save_data_to_file()
+            self.notes_store.delete_container(container_name)
 
     def create_container(self):
         container_name = self.container_entry.text().strip()
@@ -777,7 +831,7 @@ class FileSearchApp(QMainWindow):
 
         # tạo + lưu
         self.containers[container_name] = []
-        self.save_data_to_file()
+        self.notes_store.add_container(container_name)
 
         # ✅ đảm bảo list hiển thị container mới (tắt filter)
         if hasattr(self, "container_search_bar"):
@@ -817,13 +871,7 @@ class FileSearchApp(QMainWindow):
 
     def get_hyperlink_from_tree_view(self):
         """Lấy các file đã chọn từ TreeView và chèn hyperlink vào Excel."""
-        file_paths = []
-
-        selected_items = self.tree_widget.selectedItems()
-        if selected_items:
-            for item in selected_items:
-                file_path = item.text(4)
-                file_paths.append(file_path)
+        file_paths = self._selected_paths()
 
         if not file_paths:
             QMessageBox.warning(self, "No Selection", "Please select at least one file.")
@@ -892,14 +940,55 @@ class FileSearchApp(QMainWindow):
             self.edit_synonyms()  # Mở hộp thoại chỉnh sửa từ đồng nghĩa
             return
 
-    # Thực hiện tìm kiếm
+    # Thực hiện tìm kiếm (chạy trong SearchWorker, kết quả stream vào tree theo từng lô)
+        self._search_ranked = từ_khóa.startswith("@")  # kết quả '@' đã xếp theo điểm -> giữ thứ tự
         if từ_khóa.startswith("@"):
             từ_khóa = từ_khóa[1:]
-            kết_quả = self.tìm_kiếm_tổng_hợp(folder_path, từ_khóa)  # Tìm kiếm nâng cao
+            search_fn = lambda cancel_cb: self.tìm_kiếm_tổng_hợp(folder_path, từ_khóa, cancel_cb=cancel_cb)  # Tìm kiếm nâng cao
         else:
-            kết_quả = self.search_files_by_name(folder_path, từ_khóa)
-
-        self.display_results(kết_quả)
+            search_fn = lambda cancel_cb: self.search_files_by_name(folder_path, từ_khóa, cancel_cb=cancel_cb)
+
+        self.cancel_search()  # search cũ còn chạy thì huỷ, kết quả của nó bị bỏ qua
+        self._search_folder = folder_path
+        self._begin_results()
+
+        worker = SearchWorker(search_fn, parent=self)
+        worker.batch.connect(self._on_search_batch)
+        worker.done.connect(self._on_search_done)
+        worker.error.connect(self._on_search_error)
+        worker.finished.connect(worker.deleteLater)
+        self._search_worker = worker
+        self.cancel_search_button.setEnabled(True)
+        worker.start()
+
+    def cancel_search(self):
+        worker = self._search_worker
+        if worker is None:
+            return
+        self._search_worker = None
+        worker.cancel()
+        self.cancel_search_button.setEnabled(False)
+        self._finish_results(self._result_count, cancelled=True)
+
+    def _on_search_batch(self, rows):
+        if self.sender() is self._search_worker:
+            self._append_results(rows)
+
+    def _on_search_done(self, total, cancelled):
+        if self.sender() is not self._search_worker:
+            return  # worker đã bị huỷ / thay thế
+        self._search_worker = None
+        self.cancel_search_button.setEnabled(False)
+        self._watch_catalog(open_catalog(self._search_folder, CATALOG_DIR))
+        self._finish_results(total, cancelled)
+
+    def _on_search_error(self, msg):
+        if self.sender() is not self._search_worker:
+            return
+        self._search_worker = None
+        self.cancel_search_button.setEnabled(False)
+        self._finish_results(self._result_count, cancelled=True)
+        QMessageBox.critical(self, "Error", f"Search failed: {msg}")
 
 
 #tạo từ đồng nghĩa
@@ -955,85 +1044,183 @@ class FileSearchApp(QMainWindow):
 
 
 
-    def display_results(self, kết_quả):
+    def _begin_results(self):
+        self._set_table_mode(False)
         self.tree_widget.clear()
+        self.tree_widget.setSortingEnabled(False)  # chèn theo lô, sort 1 lần khi xong
+        self.results_table.setSortingEnabled(False)
+        self.results_model.clear()
+        self._tree_records = []
+        self._result_count = 0
+        self.lcd_number.display(0)
+
+    def _set_table_mode(self, on):
+        """Tree (ít kết quả / nhóm duplicate) <-> bảng model/view (rất nhiều kết quả)."""
+        self._table_mode = on
+        self.tree_widget.setVisible(not on)
+        self.results_table.setVisible(on)
+
+    def _append_results(self, kết_quả):
+        # kết_quả: FileRecord (name, path, size, mtime) đã stat sẵn -> render không chạm ổ đĩa
+        kết_quả = list(kết_quả)
+        if self._table_mode:
+            self.results_model.append_records(kết_quả)
+        elif len(self._tree_records) + len(kết_quả) > RESULTS_TABLE_THRESHOLD:
+            # quá nhiều item cho QTreeWidget -> chuyển toàn bộ sang bảng model/view
+            self.results_model.append_records(self._tree_records + kết_quả)
+            self._tree_records = []
+            self.tree_widget.clear()
+            self._set_table_mode(True)
+        else:
+            self._tree_records.extend(kết_quả)
+            self.tree_widget.addTopLevelItems([self.sort_helper.make_record_item(rec) for rec in kết_quả])
+
+        self._result_count += len(kết_quả)
+        self.lcd_number.display(self._result_count)
+
+    def _finish_results(self, total, cancelled=False):
+        for header in (self.tree_widget.header(), self.results_table.horizontalHeader()):
+            if self._search_ranked:
+                # bỏ sort indicator để bật lại sorting không xáo thứ tự theo điểm (click header vẫn sort được)
+                header.setSortIndicator(-1, Qt.AscendingOrder)
+            elif header.sortIndicatorSection() < 0:
+                header.setSortIndicator(0, Qt.AscendingOrder)
+        self.tree_widget.setSortingEnabled(True)
+        self.results_table.setSortingEnabled(True)
+        self.lcd_number.display(total)
+        if cancelled:
+            return
 
-        if kết_quả:
-            for file_name, file_path in kết_quả:
-                date_modified = self.format_mtime(file_path)
-                file_type = self.get_file_type(file_path)
-                file_size_mb = self.get_file_size_mb(file_path)
-
-                # sort key chuẩn
-                try:
-                    mtime_ts = os.path.getmtime(file_path)
-                except Exception:
-                    mtime_ts = None
-
-                try:
-                    size_bytes = os.path.getsize(file_path)
-                except Exception:
-                    size_bytes = None
-
-                item = self.sort_helper.make_item(
-                    name=file_name,
-                    date_text=date_modified,
-                    type_text=file_type,
-                    size_text=file_size_mb,
-                    path=file_path,
-                    mtime_ts=mtime_ts,
-                    size_bytes=size_bytes,
-                )
-                self.tree_widget.addTopLevelItem(item)
-
-            self.lcd_number.display(len(kết_quả))
-            QMessageBox.information(self, "Kết quả", f"Tìm thấy {len(kết_quả)} tệp.")
+        if total:
+            QMessageBox.information(self, "Kết quả", f"Tìm thấy {total} tệp.")
         else:
             item = self.sort_helper.make_item(
                 "No matches found", "", "", "", "",
                 mtime_ts=None, size_bytes=None
             )
             self.tree_widget.addTopLevelItem(item)
-            self.lcd_number.display(0)
             QMessageBox.warning(self, "Không tìm thấy", "Không tìm thấy tệp nào phù hợp.")
 
 
 
 
 
-    def search_files_by_name(self, folder_path, filename_keyword):
-        matches = []
-        # Xử lý cú pháp A%B: phải có A nhưng loại bỏ file có B
+    def search_files_by_name(self, folder_path, filename_keyword, cancel_cb=None):
+        """Generator FileRecord khớp từ khoá, tìm trên catalog thay vì os.walk mỗi lần."""
+        # Cú pháp A%B: phải có A nhưng loại bỏ file có B; còn lại: từ khoá thường / có dấu '*'
+        # Query được compile 1 lần rồi lọc cả lô tên trong 1 lượt
         q = parse_percent_query(filename_keyword)
-        if q is not None:
-            for root, _, files in os.walk(folder_path):
-                for file in files:
-                    if match_A_percent_B(file, q):
-                        full_path = os.path.join(root, file)
-                        matches.append((file, full_path))
-            return matches
-
-    # Xử lý cụm từ tìm kiếm có dấu '*'
-        if '*' in filename_keyword:
-            keywords = filename_keyword.split('*')
-            keywords = [kw.strip() for kw in keywords if kw.strip()]
-
-            if len(keywords) == 2:
-                pattern1 = re.escape(keywords[0]) + '.*' + re.escape(keywords[1])
-                pattern2 = re.escape(keywords[1]) + '.*' + re.escape(keywords[0])
-                regex_pattern = re.compile(f"({pattern1}|{pattern2})", re.IGNORECASE)
-            else:
-                regex_pattern = re.compile(re.escape(filename_keyword).replace(r'\*', '.*'), re.IGNORECASE)
+        if q is None:
+            q = compile_name_query(filename_keyword)
+
+        for names, paths, sizes, mtimes in self._iter_catalog_chunks(folder_path, filename_keyword, cancel_cb):
+            mask = q.filter_names(names)
+            for i, ok in enumerate(mask):
+                if ok:
+                    yield FileRecord(names[i], paths[i], sizes[i], mtimes[i])
+
+    def _iter_catalog_chunks(self, folder_path, filename_keyword=None, cancel_cb=None):
+        """
+        Yield (names, paths, sizes, mtimes) theo từng lô để search stream được kết quả.
+        - Catalog chưa có: lọc ngay trên từng thư mục vừa quét -> kết quả đầu tiên ra gần như tức thì
+        - Đã có: refresh incremental nếu quá hạn, chia snapshot (hoặc tập ứng viên trigram) thành lô
+        """
+        catalog = open_catalog(folder_path, CATALOG_DIR)
+        if not catalog.last_refresh:
+            for listing in catalog.iter_refresh(RefreshStats(), force=True, cancel_cb=cancel_cb):
+                if listing.files:
+                    yield tuple(map(list, zip(*listing.files)))
+            return
+
+        snap = self._catalog_snapshot(folder_path, cancel_cb)
+        if filename_keyword:
+            cols = self._catalog_candidates(folder_path, filename_keyword, snap)
         else:
-            regex_pattern = re.compile(re.escape(filename_keyword), re.IGNORECASE)
+            cols = (snap.names, snap.paths, snap.sizes, snap.mtimes)
 
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if regex_pattern.search(file):
-                    full_path = os.path.join(root, file)  # Lấy đường dẫn đầy đủ của tệp
-                    matches.append((file, full_path))  # Lưu tên file và đường dẫn đầy đủ
+        for start in range(0, len(cols[0]), SEARCH_CHUNK):
+            if cancel_cb and cancel_cb():
+                return
+            yield tuple(c[start:start + SEARCH_CHUNK] for c in cols)
+
+    def _catalog_candidates(self, folder_path, filename_keyword, snap):
+        """(names, paths, sizes, mtimes) cần lọc: tập ứng viên từ trigram index, hoặc toàn bộ snapshot."""
+        cols = (snap.names, snap.paths, snap.sizes, snap.mtimes)
+        idx = open_catalog(folder_path, CATALOG_DIR).candidate_indices(filename_keyword, snap)
+        if idx is None:
+            return cols
+        return tuple([c[i] for i in idx] for c in cols)
+
+    def _catalog_snapshot(self, folder_path, cancel_cb=None):
+        """Lấy snapshot catalog tên file của folder (refresh incremental nếu quá hạn)."""
+        catalog = open_catalog(folder_path, CATALOG_DIR)
+        catalog.ensure_fresh(CATALOG_MAX_AGE, cancel_cb=cancel_cb)
+        return catalog.snapshot()
+
+    def _watch_catalog(self, catalog):
+        """Chạy watcher (inotify / polling) cho catalog vừa search, dừng watcher của folder cũ."""
+        watcher = self._catalog_watcher
+        if watcher is not None and watcher.catalog is catalog and watcher.running:
+            return
+        if watcher is not None:
+            watcher.stop()
+        # start_watcher chỉ tạo thread: add watch / poll chạy trên thread của watcher
+        self._catalog_watcher = start_watcher(catalog)
+        self._catalog_watcher.set_active(self.isActiveWindow())
+
+    def changeEvent(self, event):
+        # polling chỉ chạy khi cửa sổ đang active (share mạng lớn: tránh quét khi không dùng)
+        watcher = getattr(self, "_catalog_watcher", None)  # changeEvent có thể đến trước __init__ xong
+        if event.type() == QEvent.ActivationChange and watcher is not None:
+            watcher.set_active(self.isActiveWindow())
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        worker = self._search_worker
+        if worker is not None:
+            self.cancel_search()
+            worker.wait(2000)
+        if self._rescan_worker is not None:
+            self._rescan_worker.cancel()  # refresh dừng ở thư mục kế tiếp, giữ phần đã ghi
+            self._rescan_worker.wait(2000)
+        if self._catalog_watcher is not None:
+            self._catalog_watcher.stop()
+        super().closeEvent(event)
+
+    def rescan_catalog(self):
+        """Quét lại toàn bộ catalog của folder hiện tại (cả file sửa tại chỗ: mtime thư mục không đổi)."""
+        folder_path = self.folder_entry.text().strip()
+        if not folder_path or not os.path.isdir(folder_path):
+            QMessageBox.warning(self, "Input Error", "Please provide a valid folder path.")
+            return
 
-        return matches
+        # list lại cả share mạng có thể mất nhiều phút -> chạy trong SearchWorker, không khoá UI
+        self.rescan_catalog_button.setEnabled(False)
+        search_fn = lambda cancel_cb: [open_catalog(folder_path, CATALOG_DIR).refresh(force=True, cancel_cb=cancel_cb)]
+        worker = SearchWorker(search_fn, parent=self)
+        worker.batch.connect(self._on_rescan_stats)
+        worker.done.connect(self._on_rescan_done)
+        worker.error.connect(self._on_rescan_error)
+        worker.finished.connect(worker.deleteLater)
+        self._rescan_worker = worker
+        worker.start()
+
+    def _on_rescan_stats(self, items):
+        stats = items[0]
+        QMessageBox.information(
+            self, "Catalog",
+            f"Rescanned {stats.dirs_rescanned}/{stats.dirs_total} folders "
+            f"({stats.files_written} files) in {stats.seconds:.1f}s."
+        )
+
+    def _on_rescan_done(self, total, cancelled):
+        self._rescan_worker = None
+        self.rescan_catalog_button.setEnabled(True)
+
+    def _on_rescan_error(self, msg):
+        self._rescan_worker = None
+        self.rescan_catalog_button.setEnabled(True)
+        QMessageBox.critical(self, "Error", f"Rescan failed: {msg}")
 
     
     def show_treeview_context_menu(self, position):
@@ -1051,10 +1238,22 @@ class FileSearchApp(QMainWindow):
         # Hiển thị menu tại vị trí chuột
             menu.exec(QCursor.pos())
 
+    def show_table_context_menu(self, position):
+        """Menu chuột phải cho bảng kết quả lớn (giống TreeView)."""
+        index = self.results_table.indexAt(position)
+        if index.isValid():
+            file_path = self.results_model.path_at(index.row())
+            menu = QMenu(self)
+            open_folder_action = menu.addAction("Open Folder")
+            open_folder_action.triggered.connect(lambda: self._open_containing_folder(file_path))
+            menu.exec(QCursor.pos())
+
     def open_folder_from_treeview(self, item):
         """Mở thư mục chứa file từ TreeView."""
     # Lấy đường dẫn từ cột Path
-        file_path = item.text(4)
+        self._open_containing_folder(item.text(4))
+
+    def _open_containing_folder(self, file_path):
         folder = os.path.dirname(file_path)
         if os.path.exists(folder):
             # Mở thư mục chứa file
@@ -1070,6 +1269,8 @@ class FileSearchApp(QMainWindow):
             return
 
         groups = self.find_duplicate_files(folder_path)  # list group dict
+        self._search_ranked = False
+        self._set_table_mode(False)  # nhóm duplicate cần dạng cây
         self.tree_widget.clear()
 
         if not groups:
@@ -1103,32 +1304,8 @@ class FileSearchApp(QMainWindow):
             self.tree_widget.addTopLevelItem(parent)
             parent.setExpanded(True)
 
-            # Children rows (each file full 5 columns)
-            for file_name, file_path in files:
-                date_modified = self.format_mtime(file_path)
-                file_type = self.get_file_type(file_path)
-                file_size_mb_txt = self.get_file_size_mb(file_path)
-
-                try:
-                    mtime_ts = os.path.getmtime(file_path)
-                except Exception:
-                    mtime_ts = None
-
-                try:
-                    size_bytes = os.path.getsize(file_path)
-                except Exception:
-                    size_bytes = None
-
-                child = self.sort_helper.make_item(
-                    name=file_name,
-                    date_text=date_modified,
-                    type_text=file_type,
-                    size_text=file_size_mb_txt,
-                    path=file_path,
-                    mtime_ts=mtime_ts,
-                    size_bytes=size_bytes,
-                )
-                parent.addChild(child)
+            # Children rows (each file full 5 columns, stat lấy sẵn từ lúc quét)
+            parent.addChildren([self.sort_helper.make_record_item(rec) for rec in files])
 
         self.lcd_number.display(total_files)
         QMessageBox.information(
@@ -1138,6 +1315,76 @@ class FileSearchApp(QMainWindow):
 
 
 
+    def search_near_duplicates(self):
+        """Nhóm tài liệu gần trùng nội dung (extract text + MinHash/LSH), chạy trong SearchWorker."""
+        folder_path = self.folder_entry.text().strip()
+        if not folder_path:
+            QMessageBox.warning(self, "Input Error", "Please provide the folder path.")
+            return
+
+        self.cancel_search()
+        self._search_ranked = False
+        self._set_table_mode(False)  # nhóm cần dạng cây
+        self.tree_widget.clear()
+        self._near_dup_groups = 0
+        self._result_count = 0
+        self.lcd_number.display(0)
+
+        search_fn = lambda cancel_cb: find_near_duplicates(
+            list(walk_files(folder_path, cancel_cb=cancel_cb)), cancel_cb=cancel_cb
+        )
+        worker = SearchWorker(search_fn, parent=self)
+        worker.batch.connect(self._on_near_dup_batch)
+        worker.done.connect(self._on_near_dup_done)
+        worker.error.connect(self._on_search_error)
+        worker.finished.connect(worker.deleteLater)
+        self._search_worker = worker
+        self.cancel_search_button.setEnabled(True)
+        worker.start()
+
+    def _on_near_dup_batch(self, groups):
+        if self.sender() is not self._search_worker:
+            return
+        for g in groups:
+            files = g["files"]
+            self._near_dup_groups += 1
+            self._result_count += len(files)
+
+            group_title = f"NEAR-DUP {self._near_dup_groups}  •  {len(files)} files  •  ~{g['similarity']:.0%} similar"
+            parent = self.sort_helper.make_item(
+                name=group_title,
+                date_text="",
+                type_text="NEAR",
+                size_text="",
+                path="",
+                mtime_ts=None,
+                size_bytes=None
+            )
+            self.tree_widget.addTopLevelItem(parent)
+            parent.setExpanded(True)
+            parent.addChildren([self.sort_helper.make_record_item(rec) for rec in files])
+        self.lcd_number.display(self._result_count)
+
+    def _on_near_dup_done(self, total, cancelled):
+        if self.sender() is not self._search_worker:
+            return
+        self._search_worker = None
+        self.cancel_search_button.setEnabled(False)
+        if cancelled:
+            return
+        if not total:
+            item = self.sort_helper.make_item(
+                "No near duplicates found", "", "", "", "",
+                mtime_ts=None, size_bytes=None
+            )
+            self.tree_widget.addTopLevelItem(item)
+            QMessageBox.information(self, "Near Duplicates", "No near duplicates found.")
+            return
+        QMessageBox.information(
+            self, "Near Duplicates",
+            f"Found {self._near_dup_groups} near-duplicate groups, total {self._result_count} files."
+        )
+
     def find_duplicate_files(self, folder_path):
         """
         Trả về danh sách nhóm trùng:
@@ -1145,55 +1392,34 @@ class FileSearchApp(QMainWindow):
         {
             "size": <int bytes>,
             "hash": <sha256 str>,
-            "files": [(name, full_path), ...]   # gồm cả file gốc + các bản trùng
+            "files": [FileRecord(name, path, size, mtime), ...]   # gồm cả file gốc + các bản trùng
         },
         ...
         ]
         """
-        groups = {}  # key=(size, hash) -> list[(name, path)]
-
-        for root, _, files in os.walk(folder_path):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-
-                # lấy size (bắt lỗi để khỏi crash)
-                try:
-                    file_size = os.path.getsize(file_path)
-                except Exception:
-                    continue
-
-                file_hash = self.calculate_hash(file_path)
-                if not file_hash:
-                    continue
-
-                key = (file_size, file_hash)
-                groups.setdefault(key, []).append((file_name, file_path))
-
-        # chỉ lấy những nhóm có >=2 file
-        results = []
-        for (size, h), items in groups.items():
-            if len(items) >= 2:
-                results.append({"size": size, "hash": h, "files": items})
-
-        # (tuỳ chọn) sort nhóm theo số lượng giảm dần
-        results.sort(key=lambda g: len(g["files"]), reverse=True)
-        return results
-
-
-    def calculate_hash(self, file_path):
-        sha256_hash = hashlib.sha256()
+        # size có sẵn từ scandir; chỉ file trùng size mới bị đọc (sample đầu/cuối -> full hash),
+        # hash đã có trong cache (size/mtime/inode không đổi) thì không đọc lại
+        cache = open_hash_cache(CATALOG_DIR)
         try:
-            with open(file_path, "rb") as f:
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
-        except FileNotFoundError:
-            print(f"File not found: {file_path}")
-            return None
-        return sha256_hash.hexdigest()
+            return find_duplicates(
+                walk_files(folder_path),
+                full_hash_fn=lambda rec: cache.full_hash(rec.path),
+                sample_hash_fn=lambda rec: cache.sample_hash(rec.path),
+            )
+        finally:
+            cache.flush()
+
 
     def open_file(self, item):
         """Mở file được double-click trong QTreeWidget."""
-        file_path = item.text(4)  # Lấy đường dẫn từ cột Path
+        self._open_result_path(item.text(4))  # Lấy đường dẫn từ cột Path
+
+    def open_file_from_table(self, index):
+        """Mở file được double-click trong bảng kết quả lớn."""
+        if index.isValid():
+            self._open_result_path(self.results_model.path_at(index.row()))
+
+    def _open_result_path(self, file_path):
         if os.path.exists(file_path):
             webbrowser.open(file_path)  # Mở file bằng trình duyệt mặc định
         else:
@@ -1201,15 +1427,14 @@ class FileSearchApp(QMainWindow):
 
 
     def add_to_container(self):
-        selected_item = self.tree_widget.currentItem()
-        if selected_item:
-            file_path = selected_item.text(4)
+        file_path = self._current_result_path()
+        if file_path:
             selected_container = self.containers_list.currentItem().text()
             if selected_container:
-                if file_path not in [f[0] for f in self.containers[selected_container]]:
-                    self.containers[selected_container].append((file_path, {"text": ""}))
+                if file_path not in self.containers[selected_container]:
+                    self.containers[selected_container].append(file_path)
 
-                    self.save_data_to_file()
+                    self.notes_store.add_file(selected_container, file_path)
                     self.display_container_files(self.containers_list.currentItem())
                 else:
                     QMessageBox.warning(self, "File Exists", "This file already exists in the selected container.")
@@ -1231,10 +1456,10 @@ class FileSearchApp(QMainWindow):
         container_name = selected_container.text()
 
     # Xác định vị trí tệp trong container và xóa nó
-        for i, (file_path, _) in enumerate(self.containers[container_name]):
+        for i, file_path in enumerate(self.containers[container_name]):
             if os.path.basename(file_path) == file_name:
                 del self.containers[container_name][i]
-                self.save_data_to_file()
+                self.notes_store.remove_file(container_name, file_path)
                 self.display_container_files(selected_container)
                 QMessageBox.information(self, "Success", f"File '{file_name}' has been deleted from the container.")
                 break
@@ -1246,7 +1471,7 @@ class FileSearchApp(QMainWindow):
         container_name = item.text()
         self.container_files_list.clear()
         if container_name in self.containers:
-            for file_path, _ in self.containers[container_name]:
+            for file_path in self.containers[container_name]:
                 file_name = os.path.basename(file_path)
                 self.container_files_list.addItem(file_name)
 
@@ -1254,7 +1479,7 @@ class FileSearchApp(QMainWindow):
         """Mở file được double-click trong danh sách container files."""
         file_name = item.text()
         selected_container = self.containers_list.currentItem().text()
-        for file_path, _ in self.containers[selected_container]:
+        for file_path in self.containers[selected_container]:
             if os.path.basename(file_path) == file_name:
                 if os.path.exists(file_path):
                     webbrowser.open(file_path)
@@ -1263,16 +1488,9 @@ class FileSearchApp(QMainWindow):
                 break
 
 
-    def save_data_to_file(self):
-        with open(DATA_FILE, 'w') as file:
-            json.dump(self.containers, file)
-
     def load_data_from_file(self):
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r') as file:
-                self.containers = json.load(file)
-        else:
-            self.containers = {}
+        # Chỉ tên container + đường dẫn file (containers_data.json cũ đã được NotesStore import 1 lần)
+        self.containers = self.notes_store.load_index()
 
         self.filter_containers("")  # đổ containers ra list
 
@@ -1284,17 +1502,12 @@ class FileSearchApp(QMainWindow):
 
 #load và save từ đồng nghĩa
     def load_synonyms(self):
-        """Load synonyms from JSON file."""
-        try:
-            with open("synonyms.json", "r") as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}  # Trả về danh sách trống nếu tệp không tồn tại
+        """Load synonyms from JSON file (cache trong SynonymService, chỉ đọc lại khi file đổi)."""
+        return get_synonym_service().load()  # {} nếu tệp không tồn tại
 
     def save_synonyms(self, synonyms):
         """Save updated synonyms to JSON file."""
-        with open("synonyms.json", "w") as file:
-            json.dump(synonyms, file, indent=4)
+        get_synonym_service().save(synonyms)
 
     def show_context_menu_for_container(self, pos):
         item = self.container_files_list.itemAt(self.container_files_list.viewport().mapFromGlobal(QCursor.pos()))
@@ -1307,7 +1520,7 @@ class FileSearchApp(QMainWindow):
     def open_folder_for_item(self, item):
         file_name = item.text()
         container_name = self.containers_list.currentItem().text()
-        for file_path, _ in self.containers[container_name]:
+        for file_path in self.containers[container_name]:
             if os.path.basename(file_path) == file_name:
                 folder = os.path.dirname(file_path)
                 if os.path.exists(folder):
@@ -1361,124 +1574,97 @@ class FileSearchApp(QMainWindow):
         max_size_input.setPlaceholderText("Max size (MB)")
         size_filter_button = QPushButton("Filter by Size")
 
-        # Tree widget to display files with checkboxes
-        file_tree = QTreeWidget()
-        file_tree.setColumnCount(4)  # Giữ 4 cột, không thêm cột Copy Data
-        file_tree.setHeaderLabels(["Select", "Filename", "Path", "Size (MB)"])
-        file_tree.setColumnWidth(0, 50)
-        file_tree.setColumnWidth(1, 550)
-        file_tree.setColumnWidth(2, 400)
-        file_tree.setColumnWidth(3, 50)  # Set column width for file size
-
-        # Cho phép chọn nhiều tệp cùng lúc
-        file_tree.setSelectionMode(QTreeWidget.MultiSelection)
-
-        # Add this line here to connect the itemDoubleClicked event
-        file_tree.itemDoubleClicked.connect(self.open_file_from_list)
-
-        # Store the checkbox states
-        checkbox_states = []
-        files = []  # Store files to filter later
-        extensions_set = set()  # Set to store unique file extensions
-
+        # Lọc theo ngày sửa
+        date_combo = QComboBox()
+        date_ranges = {"Any time": None, "Today": 1, "Last 7 days": 7, "Last 30 days": 30, "Last year": 365}
+        date_combo.addItems(list(date_ranges))
+
+        # Bảng file (model theo cột NumPy, lọc bằng mask -> không tạo lại item khi lọc)
+        file_model = FileTableModel(list_window)
+        file_view = QTableView()
+        file_view.setModel(file_model)
+        file_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        file_view.setSelectionMode(QAbstractItemView.MultiSelection)  # Cho phép chọn nhiều tệp cùng lúc
+        file_view.setShowGrid(False)
+        file_view.setWordWrap(False)
+        file_view.verticalHeader().setVisible(False)
+        file_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        file_view.verticalHeader().setDefaultSectionSize(22)
+        file_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        file_view.setSortingEnabled(True)
+        file_view.setColumnWidth(0, 50)
+        file_view.setColumnWidth(1, 550)
+        file_view.setColumnWidth(2, 400)
+        file_view.setColumnWidth(3, 50)  # Set column width for file size
+
+        # Double-click để mở file
+        file_view.doubleClicked.connect(lambda index: self.open_file_from_list(file_view, index))
 
             # Nút đổi tên hàng loạt
         batch_rename_button = QPushButton("Batch Rename")
-        batch_rename_button.clicked.connect(lambda: self.open_batch_rename_dialog(file_tree))
-
-
+        batch_rename_button.clicked.connect(lambda: self.open_batch_rename_dialog(file_view))
 
-        # Populate the tree with files from the selected folder
-        for root, _, files_in_folder in os.walk(folder_path):
-            for file in files_in_folder:
-                file_path = os.path.join(root, file)
-                extension = os.path.splitext(file)[1].lower()
-                try:
-                    file_size = os.path.getsize(file_path) / (1024 * 1024)  # File size in MB
-                    size_str = f"{file_size:.2f}"  # Format file size to two decimal places
-                except Exception as e:
-                    # Handle error and continue
-                    size_str = "Error"  # Indicate error size
-                    print(f"Error getting size for {file_path}: {e}")
-
-                folder_path_only = os.path.dirname(file_path)  # Get the folder path without file name
-                extensions_set.add(extension)  # Collect unique extensions
-                item = QTreeWidgetItem(["", file, folder_path_only, size_str])  # Hiển thị tên file, path, và size
-
-                # Lưu trữ dữ liệu ẩn (filename và path) bằng Qt.UserRole
-                item.setData(1, Qt.UserRole, {"filename": file, "path": file_path})
-
-                item.setCheckState(0, Qt.Unchecked)  # Add a checkbox to the first column
-                file_tree.addTopLevelItem(item)
-                checkbox_states.append(False)  # Initialize checkbox states
-                files.append((file, file_path, file_size))  # Add to the files list with size for filtering
+        # Populate the table with files from the selected folder (stat có sẵn từ scandir)
+        # walk_files trả theo thứ tự thread -> xếp (thư mục, tên tự nhiên) để mỗi lần mở giống nhau
+        file_model.load(sorted(
+            walk_files(folder_path),
+            key=lambda rec: (os.path.dirname(rec.path).lower(), natural_key_str(rec.name)),
+        ))
 
     # Set file count on the LCD
-        lcd_file_count.display(len(files))
+        lcd_file_count.display(file_model.rowCount())
 
         # Update ComboBox with file extensions
-        format_combo.addItems(sorted(extensions_set))  # Add unique file extensions
-        
-# Add filter_row_layout and filter_layout to the main layout
-        
-        list_layout.addWidget(file_tree)
-
-        # Function to filter files based on selected format
-        def filter_files():
-            selected_extension = format_combo.currentText()
-            file_tree.clear()  # Clear existing items
-            for file, path, size in files:
-                if selected_extension == "All" or path.endswith(selected_extension):
-                    size_str = f"{size:.2f}"
-                    folder_path_only = os.path.dirname(path)  # Extract only the folder path
-                    item = QTreeWidgetItem(["", file, folder_path_only, size_str])
-                    item.setData(1, Qt.UserRole, {"filename": file, "path": path})  # Lưu trữ dữ liệu ẩn
-                    item.setCheckState(0, Qt.Unchecked)
-                    file_tree.addTopLevelItem(item)
+        format_combo.addItems(sorted(file_model.exts))  # Add unique file extensions
+
+        # Extension + size + ngày sửa: gộp thành 1 mask trên các cột
+        size_range = {"min": None, "max": None}
+
+        def apply_filters():
+            ext = format_combo.currentText()
+            days = date_ranges[date_combo.currentText()]
+            count = file_model.apply_filter(
+                ext=None if ext == "All" else ext,
+                min_size=size_range["min"],
+                max_size=size_range["max"],
+                min_mtime=None if days is None else time.time() - days * 86400,
+            )
+            # Lọc trả về thứ tự gốc -> sắp xếp lại theo cột đang chọn
+            header = file_view.horizontalHeader()
+            if header.sortIndicatorSection() >= 0:
+                file_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+            lcd_file_count.display(count)
 
         # Connect the filter function to ComboBox selection change
-        format_combo.currentTextChanged.connect(filter_files)
+        format_combo.currentTextChanged.connect(apply_filters)
+        date_combo.currentTextChanged.connect(apply_filters)
 
         # Function to filter files based on size range
         def filter_by_size():
             try:
-                min_size = float(min_size_input.text()) if min_size_input.text() else 0
-                max_size = float(max_size_input.text()) if max_size_input.text() else float('inf')
+                min_size = float(min_size_input.text()) if min_size_input.text() else None
+                max_size = float(max_size_input.text()) if max_size_input.text() else None
             except ValueError:
                 QMessageBox.warning(list_window, "Input Error", "Please enter valid numbers for size range.")
                 return
 
-            file_tree.clear()  # Clear existing items
-            for file, path, size in files:
-                if min_size <= size <= max_size:
-                    size_str = f"{size:.2f}"
-                    folder_path_only = os.path.dirname(path)  # Extract only the folder path
-                    item = QTreeWidgetItem(["", file, folder_path_only, size_str])
-                    item.setData(1, Qt.UserRole, {"filename": file, "path": path})  # Lưu trữ dữ liệu ẩn
-                    item.setCheckState(0, Qt.Unchecked)
-                    file_tree.addTopLevelItem(item)
+            # MB hiển thị làm tròn 2 chữ số -> so sánh theo bytes
+            size_range["min"] = None if min_size is None else min_size * 1024 * 1024
+            size_range["max"] = None if max_size is None else max_size * 1024 * 1024
+            apply_filters()
 
         # Connect the filter by size button
         size_filter_button.clicked.connect(filter_by_size)
 
-        # Function to toggle checkbox state when clicked
-        def toggle_checkbox(item, column):
-            if column == 0:  # Only toggle if clicking on the checkbox column
-                current_state = item.checkState(0)
-                item.setCheckState(0, Qt.Unchecked if current_state == Qt.Checked else Qt.Checked)
-
-        # Connect the toggle function to the tree widget
-        file_tree.itemClicked.connect(toggle_checkbox)
-
         # Button to delete selected files
         delete_button = QPushButton("Delete Selected Files")
-        delete_button.clicked.connect(lambda: self.delete_selected_files(file_tree))
+        delete_button.clicked.connect(lambda: self.delete_selected_files(file_view))
 
         # Button to copy filenames and paths to clipboard
         copy_button = QPushButton("Copy to Clipboard")
-        copy_button.clicked.connect(lambda: self.copy_filenames_and_paths(file_tree))
+        copy_button.clicked.connect(lambda: self.copy_filenames_and_paths(file_view))
 
-        list_layout.addWidget(file_tree)
+        list_layout.addWidget(file_view)
 
         # Create QHBoxLayout for ComboBox, Delete button, Copy button, and Size filter controls
         filter_layout = QHBoxLayout()
@@ -1486,6 +1672,7 @@ class FileSearchApp(QMainWindow):
         # Add ComboBox, Delete button, Copy button, Min size input, Max size input, and Filter button to filter_layout
         filter_layout.addWidget(lcd_file_count)
         filter_layout.addWidget(format_combo)
+        filter_layout.addWidget(date_combo)
         filter_layout.addWidget(delete_button)
         filter_layout.addWidget(copy_button)  # Add copy button next to delete button
         filter_layout.addWidget(min_size_input)
@@ -1500,14 +1687,12 @@ class FileSearchApp(QMainWindow):
 
 
 
-    def open_file_from_list(self, item, column):
+    def open_file_from_list(self, file_view, index):
         """Mở file được double-click trong cửa sổ List of Files."""
-    # Lấy dictionary chứa filename và đường dẫn từ dữ liệu ẩn
-        file_data = item.data(1, Qt.UserRole)  # Lấy dictionary từ Qt.UserRole
-    
-    # Lấy đường dẫn từ dictionary
-        file_path = file_data.get("path", "")  # Lấy đường dẫn từ key 'path', mặc định là chuỗi rỗng nếu không có
-    
+        if not index.isValid():
+            return
+        file_path = file_view.model().path_at(index.row())
+
         if file_path and os.path.exists(file_path):
             webbrowser.open(file_path)  # Mở file bằng trình duyệt mặc định
         else:
@@ -1515,23 +1700,11 @@ class FileSearchApp(QMainWindow):
 
 
 
-    def delete_selected_files(self, file_tree):
-        """Xóa các tệp đã được chọn trong cây thư mục."""
-        root = file_tree.invisibleRootItem()  # Lấy item gốc của cây
-        files_to_delete = []  # Danh sách chứa các tệp cần xóa
-
-    
-
-    # Duyệt qua các mục trong cây và thêm các tệp đã chọn vào danh sách
-        for i in reversed(range(root.childCount())):
-            item = root.child(i)
-        # Kiểm tra nếu checkbox ở cột đầu tiên được chọn
-            if item.checkState(0) == Qt.Checked:
-            # Lấy tên tệp và đường dẫn thư mục từ dữ liệu của item
-                filename = item.text(1)  # Giả sử tên tệp nằm ở cột thứ hai
-                folder = item.text(2)    # Giả sử đường dẫn thư mục nằm ở cột thứ ba
-                file_path = os.path.join(folder, filename)  # Kết hợp để tạo đường dẫn đầy đủ của tệp
-                files_to_delete.append((file_path, item))  # Thêm tệp và item vào danh sách
+    def delete_selected_files(self, file_view):
+        """Xóa các tệp đã được tick checkbox trong danh sách."""
+        model = file_view.model()
+        # Các dòng đang hiển thị có checkbox ở cột đầu tiên được chọn
+        files_to_delete = [(model.path_at(row), row) for row in model.checked_rows()]
 
     # Nếu có tệp cần xóa, hiển thị hộp thoại xác nhận
         if files_to_delete:
@@ -1546,15 +1719,17 @@ class FileSearchApp(QMainWindow):
 
         # Nếu người dùng chọn Yes, tiến hành xóa tất cả các tệp trong danh sách
             if reply == QMessageBox.Yes:
-                for file_path, item in files_to_delete:
+                deleted_rows = []
+                for file_path, row in files_to_delete:
                     try:
                     # Cố gắng xóa tệp
                         os.remove(file_path)
-                    # Xóa mục khỏi cây nếu tệp được xóa thành công
-                        root.removeChild(item)
+                        deleted_rows.append(row)
                     except Exception as e:
                     # Hiển thị thông báo lỗi nếu việc xóa thất bại
                         QMessageBox.critical(self, "Error", f"Failed to delete {os.path.basename(file_path)}: {str(e)}")
+                # Bỏ các dòng đã xóa thành công khỏi danh sách
+                model.remove_rows(deleted_rows)
 
                 QMessageBox.information(self, "Success", "Selected files have been deleted.")
         else:
@@ -1562,28 +1737,23 @@ class FileSearchApp(QMainWindow):
 
 
 
-    def copy_filenames_and_paths(self, file_tree):
-        """Copy filenames and paths from the tree widget to the clipboard."""
-        root = file_tree.invisibleRootItem()  # Lấy item gốc của cây
-        clipboard_content = []
+    def copy_filenames_and_paths(self, file_view):
+        """Copy filenames and paths (các dòng đang hiển thị) to the clipboard."""
+        model = file_view.model()
 
-        # Lặp qua các item và lấy tên file (Filename) từ cột thứ hai và đường dẫn (Path) từ cột thứ ba
-        for i in range(root.childCount()):
-            item = root.child(i)
-            filename = item.text(1)  # Lấy tên file từ cột thứ hai (Filename)
-            path = item.text(2)      # Lấy đường dẫn từ cột thứ ba (Path)
-            clipboard_content.append(f"{filename}\t{path}")  # Tách file name và path bằng tab
+        # Tên file (Filename) và thư mục (Path) của từng dòng, tách bằng tab
+        clipboard_content = [
+            f"{model.name_at(row)}\t{model.folder_at(row)}" for row in range(model.rowCount())
+        ]
 
         # Sao chép nội dung vào clipboard
         QApplication.clipboard().setText("\n".join(clipboard_content))
         QMessageBox.information(self, "Copied to Clipboard", "Filenames and paths copied to clipboard.")
 
 
-    def open_batch_rename_dialog(self, file_tree):
+    def open_batch_rename_dialog(self, file_view):
         """Mở hộp thoại đổi tên hàng loạt cho các tệp trong danh sách."""
-        selected_items = file_tree.selectedItems()
-
-        if not selected_items:
+        if not file_view.selectionModel().selectedRows():
             QMessageBox.warning(self, "No Files Selected", "Vui lòng chọn ít nhất một tệp để đổi tên.")
             return
 
@@ -1610,19 +1780,20 @@ class FileSearchApp(QMainWindow):
         # Nút thực hiện đổi tên
         rename_button = QPushButton("Rename")
         rename_button.clicked.connect(lambda: self.batch_rename_files_in_list(
-            file_tree, prefix_input.text(), suffix_input.text(), replace_input.text(), dialog
+            file_view, prefix_input.text(), suffix_input.text(), replace_input.text(), dialog
         ))
         layout.addWidget(rename_button)
 
         dialog.exec()
 
-    def batch_rename_files_in_list(self, file_tree, prefix, suffix, replace, dialog):
+    def batch_rename_files_in_list(self, file_view, prefix, suffix, replace, dialog):
         """Thực hiện đổi tên hàng loạt cho các tệp trong danh sách."""
-        selected_items = file_tree.selectedItems()
+        model = file_view.model()
+        selected_rows = sorted({idx.row() for idx in file_view.selectionModel().selectedRows()})
 
-        for item in selected_items:
-            old_name = item.text(1)  # Lấy tên tệp từ cột thứ hai (Filename)
-            folder = item.text(2)  # Lấy thư mục chứa tệp từ cột thứ ba (Path)
+        for row in selected_rows:
+            old_name = model.name_at(row)  # Tên tệp (Filename)
+            folder = model.folder_at(row)  # Thư mục chứa tệp (Path)
             old_path = os.path.join(folder, old_name)  # Kết hợp để tạo đường dẫn đầy đủ
 
         # Kiểm tra xem tệp có tồn tại không
@@ -1637,8 +1808,7 @@ class FileSearchApp(QMainWindow):
 
             try:
                 os.rename(old_path, new_path)  # Đổi tên tệp
-                item.setText(1, new_name)  # Cập nhật tên mới trong giao diện
-                item.setData(1, Qt.UserRole, {"filename": new_name, "path": new_path})  # Cập nhật dữ liệu
+                model.rename_row(row, new_name)  # Cập nhật tên mới trong giao diện
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Lỗi khi đổi tên tệp: {str(e)}")
 
@@ -1670,34 +1840,28 @@ class FileSearchApp(QMainWindow):
         self.index_search_window.exec()
 
 
-    def tìm_kiếm_tổng_hợp(self, folder_path, từ_khóa, ngưỡng_tương_đồng=70):
-        """Tìm kiếm mờ + Đồng nghĩa + Tất cả từ khóa phải có mặt."""
-        synonyms = self.load_synonyms()  # Load từ đồng nghĩa từ JSON
-        từ_khóa_mở_rộng = set()
-        các_từ_khóa = từ_khóa.split()
-
-    # Mở rộng từ khóa với từ đồng nghĩa
-        for kw in các_từ_khóa:
-            từ_khóa_mở_rộng.add(kw)  # Thêm từ gốc
-            từ_khóa_mở_rộng.update(synonyms.get(kw.lower(), []))  # Thêm từ đồng nghĩa từ JSON
-
-        kết_quả = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                # Chuyển tên file thành lowercase để so sánh không phân biệt hoa thường
-                file_lower = file.lower()
-                all_keywords_match = True  # Biến để kiểm tra mọi từ khóa đều khớp
-
-            # Kiểm tra tất cả từ khóa trong từ_khóa_mở_rộng phải khớp
-                for từ in từ_khóa_mở_rộng:
-                    if fuzz.partial_ratio(file_lower, từ.lower()) < ngưỡng_tương_đồng:
-                        all_keywords_match = False
-                        break  # Nếu một từ không khớp, dừng kiểm tra
+    def tìm_kiếm_tổng_hợp(self, folder_path, từ_khóa, ngưỡng_tương_đồng=70, cancel_cb=None):
+        """
+        Tìm kiếm mờ + Đồng nghĩa + Tất cả từ khóa phải có mặt.
+        Generator FileRecord xếp theo điểm khớp (cao -> thấp) trên TOÀN catalog:
+        chấm từng lô tên file, gom (điểm, file) của mọi lô rồi sort 1 lần ở cuối.
+        """
+    # Mỗi từ khóa -> 1 nhóm đồng nghĩa: khớp 1 từ trong nhóm là đủ, nhóm nào cũng phải khớp
+        nhóm_từ = keyword_groups(từ_khóa)
+        if not nhóm_từ:
+            return
 
-                if all_keywords_match:  # Nếu tất cả từ khóa đều khớp, thêm vào kết quả
-                    kết_quả.append((file, os.path.join(root, file)))
+        điểm, kết_quả = [], []
+        for names, paths, sizes, mtimes in self._iter_catalog_chunks(folder_path, cancel_cb=cancel_cb):
+            ok, mean = score_names(nhóm_từ, names, ngưỡng_tương_đồng)
+            điểm.append(mean)
+            kết_quả.extend(FileRecord(names[i], paths[i], sizes[i], mtimes[i]) for i in ok.tolist())
+        if not kết_quả:
+            return
 
-        return kết_quả
+        order = np.argsort(-np.concatenate(điểm), kind="stable")  # điểm cao trước, cùng điểm giữ thứ tự catalog
+        for i in order.tolist():
+            yield kết_quả[i]
 
 
     def toggle_ai_popup(self):
@@ -1716,6 +1880,56 @@ class FileSearchApp(QMainWindow):
 
     
 
+class IndexBuildWorker(QThread):
+    """Chạy Funtion.content_indexer.build_index ngoài UI thread."""
+    progress = Signal(int, int)   # done, total
+    done = Signal(object)         # IndexStats
+    error = Signal(str)
+
+    def __init__(self, root, db_path, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.db_path = db_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            stats = build_index(
+                self.root,
+                self.db_path,
+                progress_cb=lambda d, t: self.progress.emit(d, t),
+                cancel_cb=lambda: self._cancelled,
+            )
+            self.done.emit(stats)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class FtsBuildWorker(QThread):
+    """Tạo files_fts (FTS5) cho các DB ngoài UI thread: DB vài GB có thể mất vài phút."""
+    ready = Signal(str, bool)     # db_path, có FTS?
+
+    def __init__(self, db_paths, parent=None):
+        super().__init__(parent)
+        self.db_paths = list(db_paths)
+
+    def run(self):
+        for db_path in self.db_paths:
+            try:
+                conn = sqlite3.connect(db_path)
+                try:
+                    ok = ensure_fts(conn)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                print(f"[index_fts] {db_path}: {e}")
+                ok = False
+            self.ready.emit(db_path, ok)
+
+
 class IndexSearchWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -1729,8 +1943,25 @@ class IndexSearchWindow(QDialog):
         self.Hlayout = QHBoxLayout()
 
         self.db_paths = []
+        self._fts_ready = {}  # db_path -> True/False: đã có files_fts (FTS5) hay phải LIKE
+        self._fts_worker = None       # FtsBuildWorker đang chạy
+        self._search_after_fts = False  # bấm Search lúc đang build FTS -> search khi build xong
+        # Connection read-only giữ sẵn cho từng DB + search song song, kết quả về qua signal
+        self._index_pool = IndexDbPool()
+        self._search_signals = IndexSearchSignals(self)
+        self._search_signals.result.connect(self._on_db_results)
+        self._search_signals.count.connect(self._on_db_count)
+        self._search_signals.error.connect(self._on_db_error)
+        self._search_gen = 0
+        self._pending_dbs = 0
+        self._result_total = 0
+        self._cursors = {}            # db_path -> PageCursor (trang kế tiếp)
+        self._loading_dbs = set()     # DB đang tải trang
+        self._count_estimates = {}    # db_path -> (số kết quả, chính xác?)
 
         self.import_db_button = QPushButton("Import DB")
+        self.build_index_button = QPushButton("Build Index")
+        self._build_worker = None
         self.database_selector = QComboBox()
         self.database_selector.addItem("All")
 
@@ -1748,19 +1979,24 @@ class IndexSearchWindow(QDialog):
         self.result_table.setRootIsDecorated(False)
 
         self.result_table.setColumnCount(3)
-        self.result_table.setHeaderLabels(["File Name", "Path",])
+        self.result_table.setHeaderLabels(["File Name", "Path", "Match"])
         self.result_table.setColumnWidth(0, 520)  # File Name
         self.result_table.setColumnWidth(1, 260)  # Path
         self.result_table.itemDoubleClicked.connect(self.open_file)
+        # Kết quả tải theo trang: cuộn gần cuối bảng thì tải trang kế
+        self.result_table.verticalScrollBar().valueChanged.connect(self._on_results_scrolled)
+        self.result_count_label = QLabel("")
 
         # ✅ connect đúng tên hàm đang tồn tại
         self.import_db_button.clicked.connect(self.import_database)
+        self.build_index_button.clicked.connect(self.build_index_db)
         self.search_button.clicked.connect(self.search_database)
         self.search_input.returnPressed.connect(self.search_database)
         self.copy_name_button.clicked.connect(self.copy_selected_name)
 
         # layout trên
         self.Hlayout.addWidget(self.import_db_button)
+        self.Hlayout.addWidget(self.build_index_button)
         self.Hlayout.addWidget(self.database_selector)
         self.Hlayout.addWidget(self.search_input)
         self.Hlayout.addWidget(self.search_button)
@@ -1768,6 +2004,12 @@ class IndexSearchWindow(QDialog):
 
         self.main_layout.addLayout(self.Hlayout)
         self.main_layout.addWidget(self.result_table)
+        self.main_layout.addWidget(self.result_count_label)
+
+        # Tiến độ build index (ẩn khi không build)
+        self.build_progress = QProgressBar()
+        self.build_progress.setVisible(False)
+        self.main_layout.addWidget(self.build_progress)
 
 
 
@@ -1779,8 +2021,112 @@ class IndexSearchWindow(QDialog):
             self.database_selector.clear()
             self.database_selector.addItem("All")
             self.database_selector.addItems(self.db_paths)
+
+            # Build full-text index ngay khi import (1 lần / DB, các lần sau chỉ kiểm tra), chạy nền
+            self._ensure_fts()
             QMessageBox.information(self, "Databases Imported", f"Successfully imported {len(db_paths)} databases.")
 
+    def _add_database(self, db_path):
+        if db_path not in self.db_paths:
+            self.db_paths.append(db_path)
+            self.database_selector.addItem(db_path)
+
+    def build_index_db(self):
+        """Index 1 thư mục vào DB (tạo mới, hoặc cập nhật incremental nếu chọn DB có sẵn)."""
+        if self._build_worker is not None:
+            # Đang build -> nút thành Cancel
+            self._build_worker.cancel()
+            self.build_index_button.setEnabled(False)
+            return
+
+        root = QFileDialog.getExistingDirectory(self, "Select Folder to Index")
+        if not root:
+            return
+        default_db = os.path.join(root, os.path.basename(os.path.normpath(root)) + "_index.db")
+        db_path, _ = QFileDialog.getSaveFileName(
+            self, "Index Database (existing = incremental update)", default_db,
+            "SQLite Files (*.db *.sqlite)", options=QFileDialog.DontConfirmOverwrite,
+        )
+        if not db_path:
+            return
+
+        # DB sắp bị ghi: đóng connection read-only cũ, kiểm tra lại files_fts sau khi build
+        self._index_pool.invalidate(db_path)
+        self._fts_ready.pop(db_path, None)
+
+        worker = IndexBuildWorker(root, db_path, self)
+        worker.progress.connect(self._on_build_progress)
+        worker.done.connect(lambda stats: self._on_build_done(db_path, stats))
+        worker.error.connect(self._on_build_error)
+        worker.finished.connect(self._on_build_finished)
+        self._build_worker = worker
+
+        self.build_index_button.setText("Cancel Build")
+        self.build_progress.setRange(0, 0)  # đang duyệt cây: chưa biết tổng
+        self.build_progress.setVisible(True)
+        worker.start()
+
+    def _on_build_progress(self, done, total):
+        self.build_progress.setRange(0, max(total, 1))
+        self.build_progress.setValue(done)
+
+    def _on_build_done(self, db_path, stats):
+        self._add_database(db_path)
+        status = "Cancelled" if stats.cancelled else "Done"
+        QMessageBox.information(
+            self, f"Build Index: {status}",
+            f"{db_path}\n\n"
+            f"Files: {stats.scanned}  (added {stats.added}, updated {stats.updated}, "
+            f"removed {stats.removed}, unchanged {stats.unchanged})\n"
+            f"Failed to extract: {stats.failed}\n"
+            f"Time: {stats.seconds:.1f}s",
+        )
+
+    def _on_build_error(self, message):
+        QMessageBox.critical(self, "Build Index Error", message)
+
+    def _on_build_finished(self):
+        self._build_worker = None
+        self.build_index_button.setText("Build Index")
+        self.build_index_button.setEnabled(True)
+        self.build_progress.setVisible(False)
+
+    def _ensure_fts(self):
+        """
+        Tạo files_fts cho các DB chưa kiểm tra (DB chỉ đọc / lỗi => search dùng LIKE) trong FtsBuildWorker.
+        True nếu mọi DB đã sẵn sàng; False => đang build, Search bị khoá tới khi xong.
+        """
+        if self._fts_worker is not None:
+            return False
+        missing = [db_path for db_path in dict.fromkeys(self.db_paths) if db_path not in self._fts_ready]
+        if not missing:
+            return True
+
+        worker = FtsBuildWorker(missing, self)
+        worker.ready.connect(self._on_fts_ready)
+        worker.finished.connect(self._on_fts_finished)
+        worker.finished.connect(worker.deleteLater)
+        self._fts_worker = worker
+        self.search_button.setEnabled(False)
+        self.result_count_label.setText("Building full-text index…")
+        worker.start()
+        return False
+
+    def _on_fts_ready(self, db_path, ready):
+        self._fts_ready[db_path] = ready
+        if ready:
+            self._index_pool.invalidate(db_path)  # connection cũ chưa biết files_fts
+
+    def _on_fts_finished(self):
+        self._fts_worker = None
+        if not self._ensure_fts():
+            return  # có DB mới import trong lúc build -> build tiếp
+        self.search_button.setEnabled(True)
+        self.result_count_label.setText("")
+        if self._search_after_fts:
+            self._search_after_fts = False
+            self.search_database()
+
     def search_database(self):
         """Tìm kiếm từ khóa trong cơ sở dữ liệu."""
         if not self.db_paths:
@@ -1792,54 +2138,109 @@ class IndexSearchWindow(QDialog):
             QMessageBox.warning(self, "Input Error", "Please enter a keyword to search.")
             return
 
-        selected_db = self.database_selector.currentText()
-        results = []
-
-    # Kết nối và tìm kiếm trong các cơ sở dữ liệu
-        if selected_db == "All":
-            for db_path in self.db_paths:
-                db_results = self.search_in_single_database(db_path, keyword)
-            # Gắn đường dẫn cơ sở dữ liệu vào kết quả
-                for result in db_results:
-                    results.append((*result, db_path))  # Thêm db_path vào cuối mỗi hàng kết quả
-        else:
-            results = [(name, path, content, selected_db) for name, path, content in self.search_in_single_database(selected_db, keyword)]
+        if not self._ensure_fts():
+            self._search_after_fts = True  # search chạy khi files_fts build xong
+            return
 
-    # Hiển thị kết quả
+        selected_db = self.database_selector.currentText()
+        db_paths = list(dict.fromkeys(self.db_paths)) if selected_db == "All" else [selected_db]
+
+        # Mỗi lần search 1 generation: kết quả muộn của lần search trước bị bỏ qua
+        self._search_gen += 1
+        gen = self._search_gen
+        self._pending_dbs = len(db_paths)
+        self._result_total = 0
+        self._cursors = {db_path: open_cursor(keyword) for db_path in db_paths}
+        self._loading_dbs = set(db_paths)
+        self._count_estimates = {}
         self.result_table.clear()
-        self.result_table.setColumnCount(2)
-        self.result_table.setHeaderLabels(["File Name", "Path"])
+        self.result_count_label.setText("Searching…")
+
+    # Tìm song song trên mọi DB: trang đầu hiện ngay khi DB trả về, số kết quả ước lượng chạy kèm
+        self._fetch_pages(gen, db_paths)
+        cursors = self._cursors  # giữ cursor của lần search này (lần search sau thay self._cursors)
+        self._index_pool.run_many(
+            db_paths,
+            lambda db_path: self._index_pool.count(db_path, cursors[db_path]),
+            lambda db_path, res: self._search_signals.count.emit(gen, db_path, res[0], res[1]),
+            lambda db_path, message: None,  # lỗi đã báo qua lần fetch trang
+        )
 
-        if results:
-            for name, path, content, db_path in results:
-                item = QTreeWidgetItem([name, path])
+    def _fetch_pages(self, gen, db_paths):
+        cursors = self._cursors
+        self._index_pool.run_many(
+            db_paths,
+            lambda db_path: self._index_pool.fetch_page(db_path, cursors[db_path]),
+            lambda db_path, rows: self._search_signals.result.emit(gen, db_path, rows),
+            lambda db_path, message: self._search_signals.error.emit(gen, db_path, message),
+        )
 
-                # ✅ lưu db_path ẩn để open_file dùng (không cần cột Database nữa)
-                item.setData(0, Qt.UserRole, db_path)
+    def _load_more_results(self):
+        """Tải trang kế tiếp của các DB còn kết quả (khi cuộn gần cuối bảng)."""
+        more = [
+            db_path for db_path, cursor in self._cursors.items()
+            if not cursor.done and db_path not in self._loading_dbs
+        ]
+        if more:
+            self._loading_dbs.update(more)
+            self._fetch_pages(self._search_gen, more)
 
-                self.result_table.addTopLevelItem(item)
-        else:
-            QMessageBox.information(self, "No Results", "No files found with the given keyword.")
+    def _on_results_scrolled(self, value):
+        if value >= self.result_table.verticalScrollBar().maximum() - 20:
+            self._load_more_results()
 
+    def _on_db_results(self, gen, db_path, rows):
+        """Gộp 1 trang kết quả của 1 DB vào bảng (chạy trên UI thread)."""
+        if gen != self._search_gen:
+            return
+        items = []
+        for name, path, snippet in rows:
+            snippet = " ".join((snippet or "").split())  # snippet 1 dòng
+            item = QTreeWidgetItem([name, path, snippet])
+            item.setToolTip(2, snippet)
+
+            # ✅ lưu db_path ẩn để open_file dùng (không cần cột Database nữa)
+            item.setData(0, Qt.UserRole, db_path)
+            items.append(item)
+        self.result_table.addTopLevelItems(items)
+        self._result_total += len(items)
+        self._page_finished(db_path)
+
+    def _on_db_count(self, gen, db_path, count, exact):
+        if gen != self._search_gen:
+            return
+        self._count_estimates[db_path] = (count, exact)
+        self._update_result_count()
 
-    def search_in_single_database(self, db_path, keyword):
-        """Tìm kiếm trong một cơ sở dữ liệu."""
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            query = """
-                SELECT name, path, content 
-                FROM files 
-                WHERE name LIKE ? OR content LIKE ?
-            """
-            cursor.execute(query, (f"%{keyword}%", f"%{keyword}%"))
-            results = cursor.fetchall()
-            conn.close()
-            return results
-        except Exception as e:
-            QMessageBox.warning(self, "Database Error", f"Failed to search {db_path}: {e}")
-            return []
+    def _on_db_error(self, gen, db_path, message):
+        if gen != self._search_gen:
+            return
+        self._cursors[db_path].done = True
+        QMessageBox.warning(self, "Database Error", f"Failed to search {db_path}: {message}")
+        self._page_finished(db_path)
+
+    def _page_finished(self, db_path):
+        self._loading_dbs.discard(db_path)
+        self._update_result_count()
+        if self._pending_dbs:
+            self._pending_dbs -= 1  # trang đầu của 1 DB
+            if self._pending_dbs == 0 and self._result_total == 0:
+                QMessageBox.information(self, "No Results", "No files found with the given keyword.")
+                return
+        # Bảng chưa đủ dài để cuộn => tải tiếp luôn
+        if self.result_table.verticalScrollBar().maximum() == 0:
+            self._load_more_results()
+
+    def _update_result_count(self):
+        loaded = self._result_total
+        if not self._count_estimates:
+            self.result_count_label.setText(f"{loaded} results loaded…")
+            return
+        total = sum(c for c, _ in self._count_estimates.values())
+        exact = all(e for _, e in self._count_estimates.values()) and \
+            len(self._count_estimates) == len(self._cursors)
+        total = max(total, loaded)
+        self.result_count_label.setText(f"{loaded} / {'' if exact else '~'}{total} results")
 
     def copy_selected_name(self):
         """Copy the name of the selected file."""
@@ -1860,15 +2261,10 @@ class IndexSearchWindow(QDialog):
             # Get the database path from the hidden fourth column
             db_path = item.data(0, Qt.UserRole)  # Cột thứ 4 (ẩn) chứa đường dẫn cơ sở dữ liệu
 
-            # Kết nối tới cơ sở dữ liệu để lấy BASE_PATH
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT path FROM files WHERE name = 'BASE_PATH'")
-            base_path_row = cursor.fetchone()
-            conn.close()
+            # BASE_PATH đã cache cùng connection của DB trong pool
+            base_path = self._index_pool.base_path(db_path)
 
-            if base_path_row:
-                base_path = base_path_row[0]
+            if base_path:
                 # Kết hợp BASE_PATH với đường dẫn tương đối để tạo đường dẫn tuyệt đối
                 absolute_path = os.path.join(base_path, relative_path)
 
@@ -1886,6 +2282,7 @@ class IndexSearchWindow(QDialog):
 
 # Tạo ứng dụng PySide6 và hiển thị cửa sổ
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process pool (near duplicates) trong bản đóng gói PyInstaller
     # Tạo ứng dụng PySide6
     app = QApplication(sys.argv)  # Khởi tạo biến app đúng cách
     
@@ -0,0 +1,219 @@
+# Funtion/content_indexer.py
+"""
+Indexer có sẵn: tạo / cập nhật DB index files(name, path, content) cho IndexSearchWindow.
+
+- Duyệt root bằng Funtion.tree_walker (thread pool), extract content bằng rag_extract.extract_content
+  trong các process con (Funtion.parallel_extract: PDF/DOCX/XLSX nặng CPU -> dùng hết core;
+  file quá INDEX_EXTRACT_TIMEOUT giây hoặc làm crash worker => tính là lỗi, worker được thay mới).
+- Bỏ qua chính file DB đang ghi (+ -wal/-shm/-journal) khi DB nằm trong root.
+- Chỉ đuôi file extract được mới đọc nội dung; file khác vẫn được index theo tên (content rỗng).
+- DB: WAL, ghi theo lô (INDEX_BATCH dòng / transaction), dòng BASE_PATH = root,
+  path lưu tương đối so với root (giống DB của indexer bên ngoài -> open_file dùng chung).
+- Incremental: so (size, mtime) với lần index trước -> chỉ extract file mới / đã sửa,
+  xoá dòng của file đã biến mất. DB cũ thiếu cột size/mtime được ALTER thêm (lần đầu index lại hết).
+- Cuối cùng build / giữ files_fts (Funtion.index_fts): DB mới thì rebuild 1 lần sau khi insert xong
+  (nhanh hơn đi qua trigger từng dòng), DB đã có FTS thì trigger tự cập nhật.
+- File extract lỗi được lưu mtime NULL -> lần refresh sau thử lại.
+
+Chạy ngoài app (vd: Task Scheduler ban đêm):
+    python -m Funtion.content_indexer <root_folder> <index.db>
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Funtion.index_fts import ensure_fts
+from Funtion.parallel_extract import iter_extracted
+from Funtion.rag_extract import extract_content
+from Funtion.tree_walker import FileRecord, walk_files
+
+INDEX_WORKERS = int(os.environ.get("INDEX_WORKERS", str(os.cpu_count() or 2)))
+INDEX_BATCH = 200              # số dòng / transaction
+INDEX_EXTRACT_TIMEOUT = float(os.environ.get("INDEX_EXTRACT_TIMEOUT", "120"))  # giây / file
+INDEX_EXT = {
+    ".txt", ".md", ".pdf", ".docx", ".xlsx", ".pptx",
+    ".csv", ".json", ".xml", ".html", ".htm",
+}
+BASE_PATH_NAME = "BASE_PATH"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name    TEXT NOT NULL,
+    path    TEXT NOT NULL,
+    content TEXT,
+    size    INTEGER,
+    mtime   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_files_path ON files(path);
+"""
+
+
+@dataclass
+class IndexStats:
+    scanned: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    cancelled: bool = False
+    seconds: float = 0.0
+
+
+def _open_index_db(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    # DB do indexer bên ngoài tạo: chỉ có (name, path, content)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(files)")}
+    for col, typ in (("size", "INTEGER"), ("mtime", "REAL")):
+        if col not in cols:
+            conn.execute(f"ALTER TABLE files ADD COLUMN {col} {typ}")
+    conn.commit()
+    return conn
+
+
+def _check_base_path(conn: sqlite3.Connection, root: str) -> None:
+    row = conn.execute("SELECT rowid, path FROM files WHERE name = ?", (BASE_PATH_NAME,)).fetchone()
+    if row is None:
+        conn.execute("INSERT INTO files(name, path, content) VALUES(?, ?, NULL)", (BASE_PATH_NAME, root))
+        conn.commit()
+    elif os.path.normcase(os.path.abspath(row[1])) != os.path.normcase(root):
+        raise ValueError(f"Index DB belongs to another root: {row[1]}")
+
+
+def _ordered_extract(
+    recs: List[FileRecord],
+    workers: int,
+    cancel_cb: Optional[Callable[[], bool]],
+):
+    """Yield (rec, content) theo thứ tự; content None = lỗi đọc / quá hạn / crash (vẫn index theo tên)."""
+    extracted = iter_extracted(
+        [rec.path for rec in recs if rec.ext in INDEX_EXT], extract_content,
+        max_workers=workers, timeout=INDEX_EXTRACT_TIMEOUT, failed=None,
+    )
+    try:
+        for rec in recs:
+            if cancel_cb and cancel_cb():
+                return
+            content = next(extracted)[1] if rec.ext in INDEX_EXT else ""
+            yield rec, content
+    finally:
+        extracted.close()  # dừng / kill các process con (kể cả khi huỷ giữa chừng)
+
+
+def _db_files(db_path: str) -> set:
+    """DB + file phụ của SQLite (normcase) - không index chính DB khi nó nằm trong root."""
+    base = os.path.normcase(os.path.abspath(db_path))
+    return {base + suffix for suffix in ("", "-wal", "-shm", "-journal")}
+
+
+def build_index(
+    root: str,
+    db_path: str,
+    max_workers: Optional[int] = None,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> IndexStats:
+    """Tạo mới hoặc cập nhật incremental DB index của root. progress_cb(done, total)."""
+    t0 = time.time()
+    root = os.path.abspath(root)
+    stats = IndexStats()
+    conn = _open_index_db(db_path)
+    try:
+        _check_base_path(conn, root)
+
+        known: Dict[str, Tuple[int, Optional[int], Optional[float]]] = {
+            path: (rowid, size, mtime)
+            for rowid, path, size, mtime in conn.execute(
+                "SELECT rowid, path, size, mtime FROM files WHERE name != ?", (BASE_PATH_NAME,)
+            )
+        }
+
+        # 1) Duyệt cây, so (size, mtime) với lần trước
+        todo: List[FileRecord] = []
+        seen = set()
+        skip = _db_files(db_path)
+        for rec in walk_files(root, cancel_cb=cancel_cb):
+            if os.path.normcase(rec.path) in skip:
+                continue
+            rel = os.path.relpath(rec.path, root)
+            seen.add(rel)
+            old = known.get(rel)
+            if old is not None and old[1] == rec.size and old[2] == rec.mtime:
+                stats.unchanged += 1
+            else:
+                todo.append(rec)
+        stats.scanned = len(seen)
+        if cancel_cb and cancel_cb():
+            stats.cancelled = True
+            return stats
+
+        # 2) Extract song song, ghi theo lô
+        workers = max_workers or INDEX_WORKERS
+        inserts, updates = [], []
+
+        def flush() -> None:
+            if inserts:
+                conn.executemany("INSERT INTO files(name, path, content, size, mtime) VALUES(?,?,?,?,?)", inserts)
+            if updates:
+                conn.executemany("UPDATE files SET name=?, content=?, size=?, mtime=? WHERE rowid=?", updates)
+            conn.commit()
+            inserts.clear()
+            updates.clear()
+
+        done = 0
+        for rec, content in _ordered_extract(todo, workers, cancel_cb):
+            mtime = rec.mtime
+            if content is None:
+                # lỗi đọc: vẫn index theo tên, mtime NULL => lần refresh sau thử lại
+                stats.failed += 1
+                content, mtime = "", None
+            rel = os.path.relpath(rec.path, root)
+            old = known.get(rel)
+            if old is None:
+                inserts.append((rec.name, rel, content, rec.size, mtime))
+                stats.added += 1
+            else:
+                updates.append((rec.name, content, rec.size, mtime, old[0]))
+                stats.updated += 1
+            done += 1
+            if len(inserts) + len(updates) >= INDEX_BATCH:
+                flush()
+            if progress_cb:
+                progress_cb(done, len(todo))
+        stats.cancelled = bool(cancel_cb and cancel_cb())
+        flush()
+
+        # 3) File đã biến mất (chỉ khi quét trọn vẹn)
+        if not stats.cancelled:
+            gone = [(rowid,) for path, (rowid, _, _) in known.items() if path not in seen]
+            for i in range(0, len(gone), INDEX_BATCH):
+                conn.executemany("DELETE FROM files WHERE rowid = ?", gone[i:i + INDEX_BATCH])
+                conn.commit()
+            stats.removed = len(gone)
+
+        # 4) Full-text index (DB mới: build 1 lần sau khi insert xong; huỷ => để lần search đầu build)
+        if not stats.cancelled:
+            ensure_fts(conn)
+    finally:
+        conn.close()
+        stats.seconds = time.time() - t0
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m Funtion.content_indexer <root_folder> <index.db>")
+        sys.exit(2)
+    result = build_index(
+        sys.argv[1], sys.argv[2],
+        progress_cb=lambda d, t: print(f"\r{d}/{t}", end="", flush=True),
+    )
+    print(f"\n{result}")
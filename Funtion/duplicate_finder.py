@@ -0,0 +1,135 @@
+# Funtion/duplicate_finder.py
+"""
+Tìm file trùng nội dung theo từng tầng (chỉ đọc file khi thật sự cần):
+
+1) Gom theo size         : size duy nhất => chắc chắn không trùng, không đọc byte nào.
+2) Sample hash           : hash đầu + cuối file (SAMPLE_BYTES mỗi đầu) cho các nhóm cùng size.
+                           File nhỏ (<= 2*SAMPLE_BYTES) đọc hết luôn => đây đã là hash đầy đủ.
+3) Full SHA-256          : chỉ cho file còn trùng sample, đọc khối lớn (READ_BLOCK) bằng readinto.
+
+Tầng 2, 3 chạy trên thread pool (hashlib nhả GIL khi hash khối lớn, I/O song song tốt với ổ mạng).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from Funtion.tree_walker import FileRecord
+
+HASH_THREADS = int(os.environ.get("HASH_THREADS", "8"))
+READ_BLOCK = 1024 * 1024   # 1 MB / lần đọc khi hash full
+SAMPLE_BYTES = 64 * 1024   # mỗi đầu file khi hash sample
+
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def full_hash(path: str) -> Optional[str]:
+    """SHA-256 toàn file (None nếu không đọc được)."""
+    h = hashlib.sha256()
+    buf = bytearray(READ_BLOCK)
+    view = memoryview(buf)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def sample_hash(path: str, size: int) -> Optional[str]:
+    """
+    Hash đầu + cuối file. File nhỏ đọc hết => trả về SHA-256 đầy đủ (tiền tố 'full:')
+    để tầng 3 không phải đọc lại.
+    """
+    try:
+        with open(path, "rb") as f:
+            if size <= 2 * SAMPLE_BYTES:
+                return "full:" + hashlib.sha256(f.read()).hexdigest()
+            h = hashlib.blake2b(digest_size=16)
+            h.update(f.read(SAMPLE_BYTES))
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+            h.update(f.read(SAMPLE_BYTES))
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _map_pool(fn, items: Sequence, max_workers: Optional[int], cancel_cb) -> List:
+    """fn(item) song song, giữ thứ tự; cancel => các task chưa chạy bị huỷ, trả None."""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or HASH_THREADS) as ex:
+        futs = [ex.submit(fn, it) for it in items]
+        out = []
+        for fut in futs:
+            if cancel_cb and cancel_cb():
+                for f in futs:
+                    f.cancel()
+                return out + [None] * (len(futs) - len(out))
+            out.append(fut.result())
+        return out
+
+
+def find_duplicates(
+    records: Iterable[FileRecord],
+    max_workers: Optional[int] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+    full_hash_fn: Optional[Callable[[FileRecord], Optional[str]]] = None,
+    sample_hash_fn: Optional[Callable[[FileRecord], Optional[str]]] = None,
+) -> List[dict]:
+    """
+    [{"size": int, "hash": sha256, "files": [FileRecord, ...]}, ...]
+    (chỉ nhóm >= 2 file, nhóm đông nhất trước).
+    full_hash_fn / sample_hash_fn: thay hàm hash mặc định (vd: có cache).
+    """
+    full_fn = full_hash_fn or (lambda rec: full_hash(rec.path))
+    sample_fn = sample_hash_fn or (lambda rec: sample_hash(rec.path, rec.size))
+
+    # 1) size
+    by_size: Dict[int, List[FileRecord]] = {}
+    for rec in records:
+        by_size.setdefault(rec.size, []).append(rec)
+
+    groups: Dict[Tuple[int, str], List[FileRecord]] = {}
+    candidates: List[FileRecord] = []
+    for size, recs in by_size.items():
+        if len(recs) < 2:
+            continue
+        if size == 0:
+            groups[(0, EMPTY_SHA256)] = recs
+        else:
+            candidates.extend(recs)
+
+    # 2) sample hash
+    by_sample: Dict[Tuple[int, str], List[FileRecord]] = {}
+    for rec, sh in zip(candidates, _map_pool(sample_fn, candidates, max_workers, cancel_cb)):
+        if sh is not None:
+            by_sample.setdefault((rec.size, sh), []).append(rec)
+
+    need_full: List[FileRecord] = []
+    for (size, sh), recs in by_sample.items():
+        if len(recs) < 2:
+            continue
+        if sh.startswith("full:"):
+            groups[(size, sh[5:])] = recs
+        else:
+            need_full.extend(recs)
+
+    # 3) full hash
+    for rec, fh in zip(need_full, _map_pool(full_fn, need_full, max_workers, cancel_cb)):
+        if fh is not None:
+            groups.setdefault((rec.size, fh), []).append(rec)
+
+    results = [
+        {"size": size, "hash": h, "files": sorted(recs, key=lambda r: r.path)}
+        for (size, h), recs in groups.items()
+        if len(recs) >= 2
+    ]
+    results.sort(key=lambda g: len(g["files"]), reverse=True)
+    return results
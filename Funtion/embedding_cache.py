@@ -0,0 +1,161 @@
+# Funtion/embedding_cache.py
+"""
+Cache embedding theo nội dung, dùng chung cho mọi store.
+
+- Khoá = (model_name, sha1(norm_for_hash(chunk))) - cùng hash với rag_dedup
+  -> chunk đã embed ở store khác / lần build trước không phải chạy model lại.
+- Lưu trong 1 file SQLite (mặc định VectorStore/embedding_cache.db, cạnh các store):
+  build lại store, copy store, append file đã từng học => chủ yếu là đọc đĩa.
+- Vector lưu float32 đã normalize (giống normalize_embeddings=True của builder).
+- RAG_EMBED_CACHE: đường dẫn file cache khác, hoặc "0" / "off" để tắt.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Funtion.rag_dedup import norm_for_hash, sha1_text
+
+EMBED_CACHE_FILE = "embedding_cache.db"
+_SQL_VARS = 500  # số tham số / câu IN (...) - dưới giới hạn 999 của SQLite cũ
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    dim   INTEGER NOT NULL,
+    vec   BLOB NOT NULL,
+    PRIMARY KEY (model, key)
+) WITHOUT ROWID;
+"""
+
+
+def chunk_key(text: str) -> str:
+    return sha1_text(norm_for_hash(text))
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # dùng từ nhiều QThread worker (mỗi lần build / append 1 thread) -> 1 connection + lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, keys: Sequence[str], dim: int) -> Dict[str, np.ndarray]:
+        """{key: vector} cho các key đã có (vector sai dim bị bỏ qua = coi như miss)."""
+        out: Dict[str, np.ndarray] = {}
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(uniq), _SQL_VARS):
+                part = uniq[i:i + _SQL_VARS]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE model = ? AND dim = ? "
+                    f"AND key IN ({','.join('?' * len(part))})",
+                    (model, int(dim), *part),
+                )
+                for key, blob in rows:
+                    out[key] = np.frombuffer(blob, dtype="float32")
+        return out
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        rows = [
+            (model, key, int(vec.shape[-1]), np.ascontiguousarray(vec, dtype="float32").tobytes())
+            for key, vec in items
+        ]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(model, key, dim, vec) VALUES(?, ?, ?, ?)", rows
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def open_embedding_cache(db_path: str) -> EmbeddingCache:
+    """1 EmbeddingCache / file (dùng chung trong app)."""
+    key = os.path.abspath(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            cache = _caches[key] = EmbeddingCache(key)
+        return cache
+
+
+def cache_for_store(store_dir: str) -> Optional[EmbeddingCache]:
+    """Cache dùng chung của các store cùng thư mục cha (VectorStore/); None nếu bị tắt / không mở được."""
+    env = os.environ.get("RAG_EMBED_CACHE", "").strip()
+    if env.lower() in ("0", "off", "false", "no"):
+        return None
+    path = env or os.path.join(os.path.dirname(os.path.abspath(store_dir)), EMBED_CACHE_FILE)
+    try:
+        return open_embedding_cache(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[embedding_cache] disabled ({path}): {e}")
+        return None
+
+
+def encode_cached(
+    model,
+    model_name: str,
+    texts: List[str],
+    cache: Optional[EmbeddingCache],
+    batch_size: int = 32,
+) -> np.ndarray:
+    """
+    model.encode(texts, normalize_embeddings=True) nhưng chỉ encode chunk chưa có trong cache
+    (chunk trùng nhau trong cùng batch cũng chỉ encode 1 lần). Trả về float32 (len(texts), dim).
+    """
+    def encode(batch: List[str]) -> np.ndarray:
+        vecs = model.encode(
+            batch,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        )
+        return np.asarray(vecs, dtype="float32")
+
+    if cache is None or not texts:
+        return encode(texts)
+
+    dim = int(model.get_sentence_embedding_dimension())
+    keys = [chunk_key(t) for t in texts]
+    try:
+        found = cache.get_many(model_name, keys, dim)
+    except sqlite3.Error as e:
+        print(f"[embedding_cache] read failed: {e}")
+        return encode(texts)
+
+    miss: Dict[str, int] = {}  # key -> vị trí text đầu tiên cần encode
+    for i, key in enumerate(keys):
+        if key not in found and key not in miss:
+            miss[key] = i
+
+    if miss:
+        vecs = encode([texts[i] for i in miss.values()])
+        new_items = list(zip(miss.keys(), vecs))
+        found.update(new_items)
+        try:
+            cache.put_many(model_name, new_items)
+        except sqlite3.Error as e:
+            print(f"[embedding_cache] write failed: {e}")
+
+    out = np.empty((len(texts), dim), dtype="float32")
+    for i, key in enumerate(keys):
+        out[i] = found[key]
+    return out
@@ -0,0 +1,385 @@
+# Funtion/file_catalog.py
+"""
+Persistent filename catalog (mỗi root folder một file SQLite).
+
+- Lưu (path, dir, name, size, mtime, ext) của mọi file dưới root.
+- refresh() là incremental: thư mục nào có mtime không đổi thì KHÔNG list lại,
+  chỉ đi tiếp xuống các thư mục con đã biết (1 stat / thư mục thay vì 1 stat / file).
+  Các thư mục được duyệt song song qua Funtion.tree_walker.
+- snapshot() trả về các cột trong RAM để search chạy trong mili-giây.
+- candidate_indices() dùng trigram index (Funtion.trigram_index) để thu hẹp tập tên file
+  trước khi chạy regex.
+
+Lưu ý:
+- mtime của thư mục chỉ đổi khi tạo / xoá / đổi tên entry bên trong,
+  nên size/mtime của file sửa nội dung có thể cũ cho tới lần rescan đầy đủ (force=True).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from Funtion.tree_walker import DirListing, parallel_visit, scan_dir, walk_dirs
+from Funtion.trigram_index import ensure_trigram_index, literal_fragments, trigram_candidates
+
+CATALOG_MAX_AGE = 10 * 60  # giây: quá hạn thì search sẽ refresh trước
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path  TEXT PRIMARY KEY,
+    dir   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    size  INTEGER,
+    mtime REAL,
+    ext   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path   TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime  REAL
+);
+CREATE TABLE IF NOT EXISTS info (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+@dataclass
+class RefreshStats:
+    dirs_total: int = 0
+    dirs_rescanned: int = 0
+    dirs_removed: int = 0
+    files_written: int = 0
+    seconds: float = 0.0
+    changed: List[str] = field(default_factory=list)   # file mới / đã sửa
+    removed: List[str] = field(default_factory=list)   # file đã biến mất
+
+
+@dataclass
+class CatalogSnapshot:
+    """Các cột song song (cùng index) của catalog, dùng cho search trong RAM."""
+    names: List[str] = field(default_factory=list)
+    paths: List[str] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+    mtimes: List[float] = field(default_factory=list)
+    rowids: List[int] = field(default_factory=list)
+    _row_index: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def iter_pairs(self) -> Iterator[Tuple[str, str]]:
+        return zip(self.names, self.paths)
+
+    def indices_of(self, rowids) -> List[int]:
+        """rowid (SQLite) -> vị trí trong snapshot, bỏ qua rowid chưa có trong snapshot."""
+        if self._row_index is None:
+            self._row_index = {r: i for i, r in enumerate(self.rowids)}
+        idx = self._row_index
+        return sorted(idx[r] for r in rowids if r in idx)
+
+
+def catalog_file_for(root: str, catalog_dir: str) -> str:
+    """Tên file catalog ổn định theo root (không phân biệt hoa/thường trên Windows)."""
+    key = os.path.normcase(os.path.abspath(root))
+    digest = hashlib.sha1(key.encode("utf-8", errors="ignore")).hexdigest()[:16]
+    return os.path.join(catalog_dir, f"{digest}.sqlite")
+
+
+class FileCatalog:
+    def __init__(self, root: str, db_path: str):
+        self.root = root
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO info(key, value) VALUES('root', ?)", (root,))
+        self._conn.commit()
+        self.has_trigram = ensure_trigram_index(self._conn)
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.generation = 0  # tăng mỗi khi catalog thay đổi
+
+    # ---------- info ----------
+    def _get_info(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM info WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_info(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO info(key, value) VALUES(?, ?)", (key, value))
+
+    @property
+    def last_refresh(self) -> float:
+        with self._lock:
+            try:
+                return float(self._get_info("last_refresh") or 0)
+            except ValueError:
+                return 0.0
+
+    def is_stale(self, max_age: float = CATALOG_MAX_AGE) -> bool:
+        return (time.time() - self.last_refresh) > max_age
+
+    def ensure_fresh(
+        self,
+        max_age: float = CATALOG_MAX_AGE,
+        cancel_cb: Optional[Callable[[], bool]] = None,
+    ) -> Optional[RefreshStats]:
+        if self.is_stale(max_age):
+            return self.refresh(cancel_cb=cancel_cb)
+        return None
+
+    # ---------- refresh ----------
+    def refresh(
+        self,
+        force: bool = False,
+        cancel_cb: Optional[Callable[[], bool]] = None,
+    ) -> RefreshStats:
+        """
+        Đồng bộ catalog với ổ đĩa.
+        - force=False: bỏ qua thư mục có mtime không đổi (chỉ đi tiếp xuống thư mục con đã biết)
+        - force=True : list lại toàn bộ
+        """
+        stats = RefreshStats()
+        for _ in self.iter_refresh(stats, force=force, cancel_cb=cancel_cb):
+            pass
+        return stats
+
+    def iter_refresh(
+        self,
+        stats: RefreshStats,
+        force: bool = False,
+        cancel_cb: Optional[Callable[[], bool]] = None,
+    ) -> Iterator[DirListing]:
+        """
+        Như refresh(), nhưng yield DirListing của từng thư mục vừa list lại
+        (search lần đầu dùng để stream kết quả ngay trong lúc quét).
+        Dừng giữa chừng (cancel / close generator) => giữ phần đã ghi, không dọn thư mục cũ.
+        """
+        t0 = time.time()
+
+        with self._lock:
+            known: Dict[str, float] = {}
+            children: Dict[str, List[str]] = {}
+            for path, parent, mtime in self._conn.execute("SELECT path, parent, mtime FROM dirs"):
+                known[path] = mtime
+                if parent is not None:
+                    children.setdefault(parent, []).append(path)
+
+        def visit(d: str):
+            try:
+                d_mtime = os.stat(d).st_mtime
+                if not force and known.get(d) == d_mtime:
+                    return (d, d_mtime, None), children.get(d, ())
+                listing = scan_dir(d)
+            except (FileNotFoundError, NotADirectoryError):
+                raise  # thư mục không còn -> không vào seen -> bị dọn ở cuối
+            except OSError:
+                # không đọc được lúc này (lỗi SMB tạm thời, quyền...) => coi như không đổi, giữ cả nhánh cũ
+                return (d, known.get(d), None), children.get(d, ())
+            return (d, d_mtime, listing), listing.subdirs
+
+        seen = set()
+        completed = False
+        try:
+            for d, d_mtime, listing in parallel_visit([self.root], visit, cancel_cb=cancel_cb):
+                seen.add(d)
+                stats.dirs_total += 1
+                if listing is None:
+                    continue
+
+                rows = [(f.path, d, f.name, f.size, f.mtime, f.ext) for f in listing.files]
+                parent = None if d == self.root else os.path.dirname(d)
+                with self._lock:
+                    old = dict(self._conn.execute("SELECT path, mtime FROM files WHERE dir = ?", (d,)))
+                    for f in listing.files:
+                        if old.pop(f.path, None) != f.mtime:
+                            stats.changed.append(f.path)
+                    stats.removed.extend(old)
+
+                    self._conn.execute("DELETE FROM files WHERE dir = ?", (d,))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO files(path, dir, name, size, mtime, ext) VALUES(?,?,?,?,?,?)",
+                        rows,
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO dirs(path, parent, mtime) VALUES(?,?,?)",
+                        (d, parent, d_mtime),
+                    )
+                stats.dirs_rescanned += 1
+                stats.files_written += len(rows)
+                yield listing
+
+            completed = not (cancel_cb and cancel_cb())
+        finally:
+            with self._lock:
+                if completed:
+                    gone = [p for p in known if p not in seen]
+                    for p in gone:
+                        stats.removed.extend(
+                            r[0] for r in self._conn.execute("SELECT path FROM files WHERE dir = ?", (p,))
+                        )
+                        self._conn.execute("DELETE FROM files WHERE dir = ?", (p,))
+                        self._conn.execute("DELETE FROM dirs WHERE path = ?", (p,))
+                    stats.dirs_removed = len(gone)
+                    self._set_info("last_refresh", str(time.time()))
+                self._conn.commit()
+
+                if stats.dirs_rescanned or stats.dirs_removed:
+                    self._invalidate()
+
+            stats.seconds = time.time() - t0
+
+    # ---------- apply events (watcher) ----------
+    def mark_fresh(self) -> None:
+        """Watcher đang giữ catalog đồng bộ -> search không cần refresh."""
+        with self._lock:
+            self._set_info("last_refresh", str(time.time()))
+            self._conn.commit()
+
+    def dir_paths(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT path FROM dirs")]
+
+    def upsert_files(self, paths) -> List[str]:
+        """Ghi lại (stat mới) các file vừa tạo / sửa / đổi tên tới. Trả về các path đã ghi."""
+        rows = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            if not os.path.isfile(p):
+                continue
+            name = os.path.basename(p)
+            rows.append((p, os.path.dirname(p), name, st.st_size, st.st_mtime, os.path.splitext(name)[1].lower()))
+
+        if rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files(path, dir, name, size, mtime, ext) VALUES(?,?,?,?,?,?)",
+                    rows,
+                )
+                self._conn.commit()
+                self._invalidate()
+        return [r[0] for r in rows]
+
+    def remove_paths(self, paths) -> List[str]:
+        """Xoá file (hoặc cả cây thư mục) khỏi catalog. Trả về các file path đã xoá."""
+        removed: List[str] = []
+        with self._lock:
+            for p in paths:
+                like = _like_prefix(p)
+                removed.extend(r[0] for r in self._conn.execute(
+                    "SELECT path FROM files WHERE path = ? OR dir = ? OR dir LIKE ? ESCAPE '\\'",
+                    (p, p, like),
+                ))
+                self._conn.execute(
+                    "DELETE FROM files WHERE path = ? OR dir = ? OR dir LIKE ? ESCAPE '\\'",
+                    (p, p, like),
+                )
+                self._conn.execute(
+                    "DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                    (p, like),
+                )
+            self._conn.commit()
+            if removed:
+                self._invalidate()
+        return removed
+
+    def add_tree(self, dir_path: str) -> List[str]:
+        """Quét và ghi cả cây thư mục mới xuất hiện (tạo mới / move vào). Trả về các file path."""
+        added: List[str] = []
+        for listing in walk_dirs(dir_path):
+            try:
+                d_mtime = os.stat(listing.path).st_mtime
+            except OSError:
+                continue
+            rows = [(f.path, listing.path, f.name, f.size, f.mtime, f.ext) for f in listing.files]
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files(path, dir, name, size, mtime, ext) VALUES(?,?,?,?,?,?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO dirs(path, parent, mtime) VALUES(?,?,?)",
+                    (listing.path, os.path.dirname(listing.path), d_mtime),
+                )
+            added.extend(r[0] for r in rows)
+        with self._lock:
+            self._conn.commit()
+            self._invalidate()
+        return added
+
+    # ---------- read ----------
+    def _invalidate(self) -> None:
+        self._snapshot = None
+        self.generation += 1
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Cột name/path/size/mtime trong RAM (cache tới khi catalog thay đổi)."""
+        with self._lock:
+            if self._snapshot is None:
+                snap = CatalogSnapshot()
+                for rowid, name, path, size, mtime in self._conn.execute(
+                    "SELECT rowid, name, path, size, mtime FROM files ORDER BY dir, name"
+                ):
+                    snap.rowids.append(rowid)
+                    snap.names.append(name)
+                    snap.paths.append(path)
+                    snap.sizes.append(size)
+                    snap.mtimes.append(mtime)
+                self._snapshot = snap
+            return self._snapshot
+
+    def candidate_indices(self, keyword: str, snap: CatalogSnapshot) -> Optional[List[int]]:
+        """
+        Vị trí (trong snap) của các file CÓ THỂ khớp query, theo trigram index.
+        None = không thu hẹp được -> caller quét toàn bộ snap.
+        """
+        if not self.has_trigram:
+            return None
+        with self._lock:
+            rowids = trigram_candidates(self._conn, literal_fragments(keyword))
+        if rowids is None:
+            return None
+        return snap.indices_of(rowids)
+
+    def file_count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _like_prefix(dir_path: str) -> str:
+    """Pattern LIKE cho mọi path nằm dưới dir_path (escape %, _ và \\)."""
+    base = dir_path.rstrip("/\\") + os.sep
+    base = base.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return base + "%"
+
+
+_open_catalogs: Dict[str, FileCatalog] = {}
+_open_lock = threading.Lock()
+
+
+def open_catalog(root: str, catalog_dir: str) -> FileCatalog:
+    """Mở (hoặc lấy lại từ cache) catalog của root."""
+    os.makedirs(catalog_dir, exist_ok=True)
+    db_path = catalog_file_for(root, catalog_dir)
+    with _open_lock:
+        cat = _open_catalogs.get(db_path)
+        if cat is None:
+            cat = FileCatalog(root, db_path)
+            _open_catalogs[db_path] = cat
+        return cat
@@ -0,0 +1,191 @@
+# Funtion/file_table_model.py
+"""
+Model cho cửa sổ "List of Files": dữ liệu theo cột NumPy, lọc bằng mask.
+
+- Cột: tên file, id thư mục (bảng thư mục dùng chung), mã extension, size, mtime, checked, alive.
+- Lọc extension / size / ngày sửa = phép so sánh trên mảng -> mask -> danh sách index hiển thị
+  (model tự map dòng hiển thị -> index dữ liệu, không tạo lại widget / item nào).
+- Cột 0 là checkbox (Qt.CheckStateRole), giữ trạng thái qua các lần lọc.
+"""
+from __future__ import annotations
+
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from Funtion.tree_sorter import format_size_mb, natural_key_str
+
+HEADERS = ["Select", "Filename", "Path", "Size (MB)"]
+COL_CHECK, COL_NAME, COL_DIR, COL_SIZE = range(4)
+
+
+class FileTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names: List[str] = []
+        self.dirs: List[str] = []            # bảng thư mục (mỗi thư mục 1 lần)
+        self.exts: List[str] = []            # bảng extension
+        self.dir_ids = np.empty(0, dtype=np.int32)
+        self.ext_codes = np.empty(0, dtype=np.int32)
+        self.sizes = np.empty(0, dtype=np.int64)
+        self.mtimes = np.empty(0, dtype=np.float64)
+        self.checked = np.empty(0, dtype=bool)
+        self.alive = np.empty(0, dtype=bool)  # False = đã xoá khỏi ổ đĩa
+        self.visible = np.empty(0, dtype=np.int64)
+
+    # ---------- nạp / lọc ----------
+    def load(self, records: Iterable) -> None:
+        """records: FileRecord (name, path, size, mtime)."""
+        names: List[str] = []
+        dir_index, ext_index = {}, {}
+        dir_ids, ext_codes, sizes, mtimes = [], [], [], []
+        for rec in records:
+            names.append(rec.name)
+            d = os.path.dirname(rec.path)
+            dir_ids.append(dir_index.setdefault(d, len(dir_index)))
+            ext_codes.append(ext_index.setdefault(rec.ext, len(ext_index)))
+            sizes.append(rec.size)
+            mtimes.append(rec.mtime)
+
+        self.beginResetModel()
+        self.names = names
+        self.dirs = list(dir_index)
+        self.exts = list(ext_index)
+        self.dir_ids = np.asarray(dir_ids, dtype=np.int32)
+        self.ext_codes = np.asarray(ext_codes, dtype=np.int32)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.mtimes = np.asarray(mtimes, dtype=np.float64)
+        self.checked = np.zeros(len(names), dtype=bool)
+        self.alive = np.ones(len(names), dtype=bool)
+        self.visible = np.arange(len(names), dtype=np.int64)
+        self.endResetModel()
+
+    def apply_filter(
+        self,
+        ext: Optional[str] = None,
+        min_size: Optional[float] = None,
+        max_size: Optional[float] = None,
+        min_mtime: Optional[float] = None,
+    ) -> int:
+        """Lọc theo extension (None = tất cả), size (bytes), mtime tối thiểu. Trả về số dòng hiển thị."""
+        mask = self.alive.copy()
+        if ext is not None:
+            code = self.exts.index(ext) if ext in self.exts else -1
+            mask &= self.ext_codes == code
+        if min_size is not None:
+            mask &= self.sizes >= min_size
+        if max_size is not None:
+            mask &= self.sizes <= max_size
+        if min_mtime is not None:
+            mask &= self.mtimes >= min_mtime
+
+        self.beginResetModel()
+        self.visible = np.flatnonzero(mask)
+        self.endResetModel()
+        return len(self.visible)
+
+    # ---------- truy cập theo dòng hiển thị ----------
+    def data_index(self, row: int) -> int:
+        return int(self.visible[row])
+
+    def name_at(self, row: int) -> str:
+        return self.names[self.data_index(row)]
+
+    def folder_at(self, row: int) -> str:
+        return self.dirs[self.dir_ids[self.data_index(row)]]
+
+    def path_at(self, row: int) -> str:
+        return os.path.join(self.folder_at(row), self.name_at(row))
+
+    def checked_rows(self) -> List[int]:
+        return np.flatnonzero(self.checked[self.visible]).tolist()
+
+    def rename_row(self, row: int, new_name: str) -> None:
+        self.names[self.data_index(row)] = new_name
+        idx = self.index(row, COL_NAME)
+        self.dataChanged.emit(idx, idx)
+
+    def remove_rows(self, rows: List[int]) -> None:
+        """Đánh dấu đã xoá (file bị xoá khỏi ổ đĩa) rồi bỏ khỏi danh sách hiển thị."""
+        if not rows:
+            return
+        drop = self.visible[np.asarray(rows, dtype=np.int64)]
+        self.alive[drop] = False
+        self.beginResetModel()
+        self.visible = self.visible[self.alive[self.visible]]
+        self.endResetModel()
+
+    # ---------- Qt model API ----------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.visible)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        f = super().flags(index)
+        if index.isValid() and index.column() == COL_CHECK:
+            f |= Qt.ItemIsUserCheckable
+        return f
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.data_index(index.row())
+        col = index.column()
+        if col == COL_CHECK:
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if self.checked[i] else Qt.Unchecked
+            return None
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        if col == COL_NAME:
+            return self.names[i]
+        if col == COL_DIR:
+            return self.dirs[self.dir_ids[i]]
+        return format_size_mb(int(self.sizes[i]))
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if index.isValid() and index.column() == COL_CHECK and role == Qt.CheckStateRole:
+            self.checked[self.data_index(index.row())] = Qt.CheckState(value) == Qt.Checked
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            return True
+        return False
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or not len(self.visible):
+            return
+        vis = self.visible
+        if column == COL_SIZE:
+            key = self.sizes[vis]
+        elif column == COL_CHECK:
+            key = self.checked[vis]
+        else:
+            if column == COL_NAME:
+                keys = [natural_key_str(self.names[i]) for i in vis.tolist()]
+            else:
+                keys = [self.dirs[d].lower() for d in self.dir_ids[vis].tolist()]
+            key = np.empty(len(keys), dtype=np.int64)
+            key[sorted(range(len(keys)), key=keys.__getitem__)] = np.arange(len(keys))
+        order_idx = np.argsort(key, kind="stable")
+        if order == Qt.DescendingOrder:
+            order_idx = order_idx[::-1]
+
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()  # selection của view
+        new_rows = np.empty(len(order_idx), dtype=np.int64)
+        new_rows[order_idx] = np.arange(len(order_idx), dtype=np.int64)
+        self.visible = vis[order_idx]
+        if persistent:
+            self.changePersistentIndexList(
+                persistent,
+                [self.index(int(new_rows[p.row()]), p.column()) for p in persistent],
+            )
+        self.layoutChanged.emit()
@@ -0,0 +1,346 @@
+# Funtion/fs_watcher.py
+"""
+Watcher nền giữ FileCatalog luôn mới (không cần rescan mỗi lần search).
+
+- Linux  : inotify (qua ctypes, không cần thư viện ngoài), watch mọi thư mục trong catalog
+  (add watch chạy trên thread của watcher, không chặn UI).
+  Watch đầy đủ => mark_fresh định kỳ (cả khi cây không đổi), search không phải refresh.
+  Root trên CIFS/NFS...: inotify không thấy thay đổi từ máy khác -> không mark_fresh,
+  search vẫn refresh theo tuổi catalog (ensure_fresh).
+- Khác   : polling -> catalog.refresh() định kỳ (chỉ list lại thư mục có mtime thay đổi).
+  Chu kỳ POLL_INTERVAL, không có thay đổi thì giãn dần tới POLL_MAX_INTERVAL, không ngắn hơn
+  POLL_COST_FACTOR x thời gian 1 lần refresh (share mạng lớn); chỉ poll khi cửa sổ app đang active.
+
+Listener nhận ChangeSet(changed, removed) để phản ứng chỉ với file thay đổi
+(vd: duplicate finder chỉ hash lại các file này).
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from Funtion.file_catalog import CATALOG_MAX_AGE, FileCatalog
+
+POLL_INTERVAL = float(os.environ.get("CATALOG_POLL_INTERVAL", "300"))          # giây
+POLL_MAX_INTERVAL = float(os.environ.get("CATALOG_POLL_MAX_INTERVAL", "3600"))  # giãn tối đa khi không đổi
+POLL_COST_FACTOR = 20.0  # chờ >= 20 x thời gian 1 lần refresh (refresh tốn <= ~5% thời gian)
+DEBOUNCE = 0.5        # gom event trong khoảng này rồi mới ghi catalog
+FRESH_INTERVAL = CATALOG_MAX_AGE / 4  # inotify: mark_fresh ít nhất mỗi khoảng này khi cây yên
+
+_REMOTE_FS = {
+    "cifs", "smb3", "smbfs", "nfs", "nfs4", "afs", "9p", "ceph", "glusterfs",
+    "fuse.sshfs", "fuse.rclone", "davfs", "fuse.davfs2",
+}
+
+
+class ChangeSet(NamedTuple):
+    changed: List[str]
+    removed: List[str]
+
+
+Listener = Callable[[ChangeSet], None]
+
+
+class _BaseWatcher(ABC):
+    backend = ""
+
+    def __init__(self, catalog: FileCatalog):
+        self.catalog = catalog
+        self._listeners: List[Listener] = []
+        self._stop = threading.Event()
+        self._active = threading.Event()  # cửa sổ app đang active (polling chỉ chạy khi set)
+        self._active.set()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, cb: Listener) -> None:
+        self._listeners.append(cb)
+
+    def remove_listener(self, cb: Listener) -> None:
+        if cb in self._listeners:
+            self._listeners.remove(cb)
+
+    def _notify(self, changes: ChangeSet) -> None:
+        if not (changes.changed or changes.removed):
+            return
+        for cb in list(self._listeners):
+            try:
+                cb(changes)
+            except Exception as e:
+                print(f"[watcher] listener error: {e}")
+
+    def set_active(self, active: bool) -> None:
+        """App báo cửa sổ active / không (polling tạm dừng khi không active)."""
+        if active:
+            self._active.set()
+        else:
+            self._active.clear()
+
+    def _poll_loop(self, interval: float) -> None:
+        """refresh định kỳ; giãn chu kỳ khi không có thay đổi, bỏ qua khi app không active."""
+        wait = interval
+        while not self._stop.wait(wait):
+            if not self._active.is_set():
+                continue
+            try:
+                stats = self.catalog.refresh(cancel_cb=self._stop.is_set)
+            except Exception as e:
+                print(f"[watcher] refresh error: {e}")
+                continue
+            changes = ChangeSet(stats.changed, stats.removed)
+            wait = interval if (changes.changed or changes.removed) else min(wait * 2, POLL_MAX_INTERVAL)
+            wait = max(wait, stats.seconds * POLL_COST_FACTOR)
+            self._notify(changes)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "_BaseWatcher":
+        self._thread = threading.Thread(target=self._run, name=f"catalog-{self.backend}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @abstractmethod
+    def _run(self) -> None:
+        """Vòng lặp của thread watcher, chạy tới khi stop()."""
+
+
+class PollingWatcher(_BaseWatcher):
+    backend = "polling"
+
+    def __init__(self, catalog: FileCatalog, interval: float = POLL_INTERVAL):
+        super().__init__(catalog)
+        self.interval = interval
+
+    def _run(self) -> None:
+        self._poll_loop(self.interval)
+
+
+# ----------------------------
+# inotify (Linux)
+# ----------------------------
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _load_libc():
+    name = ctypes.util.find_library("c") or "libc.so.6"
+    libc = ctypes.CDLL(name, use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+def _fs_type(path: str) -> str:
+    """Loại filesystem chứa path (mount point dài nhất khớp trong /proc/mounts); "" nếu không rõ."""
+    path = os.path.realpath(path)
+    best, fstype = "", ""
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt = parts[1].replace("\\040", " ")  # /proc/mounts escape khoảng trắng
+                if (path == mnt or path.startswith(mnt.rstrip("/") + "/")) and len(mnt) >= len(best):
+                    best, fstype = mnt, parts[2]
+    except OSError:
+        pass
+    return fstype
+
+
+class InotifyWatcher(_BaseWatcher):
+    backend = "inotify"
+
+    def __init__(self, catalog: FileCatalog, poll_interval: float = POLL_INTERVAL):
+        super().__init__(catalog)
+        self.poll_interval = poll_interval
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_to_dir: Dict[int, str] = {}
+        self._complete = True  # False khi có thư mục không add watch được (hết watch) -> không mark_fresh
+        # share mạng: inotify chỉ thấy thay đổi từ chính máy này -> không coi catalog là "mới"
+        self.remote = _fs_type(catalog.root) in _REMOTE_FS
+
+    def _add_watch(self, d: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(d), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == 28:  # ENOSPC: hết max_user_watches -> để factory fallback polling
+                raise OSError(err, "inotify watch limit reached")
+            return  # thư mục biến mất / không có quyền: bỏ qua
+        self._wd_to_dir[wd] = d
+
+    def _add_watch_tree(self, root: str) -> None:
+        for cur, _, _ in os.walk(root):
+            try:
+                self._add_watch(cur)
+            except OSError as e:
+                print(f"[watcher] {e}")
+                self._complete = False
+                return
+
+    def _mark_fresh(self) -> None:
+        if not self.remote and self._complete:
+            self.catalog.mark_fresh()
+
+    def _run(self) -> None:
+        # add watch cho cả cây (có thể vài giây với cây lớn) ngay trên thread này
+        try:
+            for d in [self.catalog.root] + self.catalog.dir_paths():
+                if self._stop.is_set():
+                    break
+                self._add_watch(d)
+        except OSError as e:
+            os.close(self._fd)
+            print(f"[watcher] inotify unavailable ({e}) -> polling")
+            self.backend = "polling"
+            self._poll_loop(self.poll_interval)
+            return
+        if self.catalog.is_stale() and not self.remote:
+            # thay đổi trước khi có watch không có event -> đồng bộ 1 lần rồi mới coi là mới
+            try:
+                self._notify_refresh()
+            except Exception as e:
+                print(f"[watcher] refresh error: {e}")
+        self._watch_events()
+
+    def _notify_refresh(self) -> None:
+        stats = self.catalog.refresh(cancel_cb=self._stop.is_set)
+        self._notify(ChangeSet(stats.changed, stats.removed))
+
+    def _watch_events(self) -> None:
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        new_dirs: Set[str] = set()
+        first_event = 0.0
+        overflow = False
+        last_fresh = 0.0
+
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], 0.25)
+                if ready:
+                    try:
+                        data = os.read(self._fd, 64 * 1024)
+                    except BlockingIOError:
+                        data = b""
+
+                    off = 0
+                    while off + _EVENT.size <= len(data):
+                        wd, mask, _cookie, ln = _EVENT.unpack_from(data, off)
+                        raw = data[off + _EVENT.size: off + _EVENT.size + ln].rstrip(b"\0")
+                        off += _EVENT.size + ln
+
+                        if mask & IN_Q_OVERFLOW:
+                            overflow = True
+                            continue
+                        if mask & IN_IGNORED:
+                            self._wd_to_dir.pop(wd, None)
+                            continue
+                        parent = self._wd_to_dir.get(wd)
+                        if parent is None or not raw:
+                            continue
+
+                        path = os.path.join(parent, os.fsdecode(raw))
+                        if mask & (IN_DELETE | IN_MOVED_FROM):
+                            removed.add(path)
+                            changed.discard(path)
+                            new_dirs.discard(path)
+                        elif mask & IN_ISDIR:
+                            if mask & (IN_CREATE | IN_MOVED_TO):
+                                new_dirs.add(path)
+                                removed.discard(path)
+                        else:
+                            changed.add(path)
+                            removed.discard(path)
+
+                        if not first_event:
+                            first_event = time.time()
+
+                if overflow:
+                    # mất event -> refresh incremental để đồng bộ lại
+                    overflow = False
+                    changed.clear(); removed.clear(); new_dirs.clear()
+                    first_event = 0.0
+                    self._notify_refresh()
+                    watched = set(self._wd_to_dir.values())
+                    for d in self.catalog.dir_paths():
+                        if d not in watched:
+                            self._add_watch(d)
+                    continue
+
+                if not first_event and time.time() - last_fresh >= FRESH_INTERVAL:
+                    # cây yên (không event đang chờ): watch vẫn chạy => catalog vẫn đúng
+                    self._mark_fresh()
+                    last_fresh = time.time()
+
+                if first_event and time.time() - first_event >= DEBOUNCE:
+                    gone = self.catalog.remove_paths(sorted(removed))
+                    added: List[str] = []
+                    for d in sorted(new_dirs):
+                        self._add_watch_tree(d)
+                        added.extend(self.catalog.add_tree(d))
+                    added.extend(self.catalog.upsert_files(sorted(changed)))
+                    self._mark_fresh()
+                    last_fresh = time.time()
+
+                    changed.clear(); removed.clear(); new_dirs.clear()
+                    first_event = 0.0
+                    self._notify(ChangeSet(added, gone))
+        except Exception as e:
+            print(f"[watcher] inotify loop stopped: {e}")
+        finally:
+            os.close(self._fd)
+
+
+def start_watcher(
+    catalog: FileCatalog,
+    on_change: Optional[Listener] = None,
+    poll_interval: float = POLL_INTERVAL,
+) -> _BaseWatcher:
+    """inotify nếu chạy trên Linux và khởi tạo được, ngược lại polling."""
+    watcher: Optional[_BaseWatcher] = None
+    if sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(catalog, poll_interval=poll_interval)
+        except (OSError, AttributeError) as e:
+            print(f"[watcher] inotify unavailable ({e}) -> polling")
+            watcher = None
+    if watcher is None:
+        watcher = PollingWatcher(catalog, interval=poll_interval)
+
+    if on_change is not None:
+        watcher.add_listener(on_change)
+    return watcher.start()
@@ -0,0 +1,45 @@
+# Funtion/fuzzy_names.py
+"""
+Chấm điểm tên file cho search '@' (mờ + đồng nghĩa + mọi từ khóa phải có mặt).
+
+- Mỗi từ khóa gốc mở rộng thành 1 nhóm đồng nghĩa (Funtion.synonyms).
+- Trong nhóm: khớp 1 từ là đủ (OR, lấy điểm cao nhất); giữa các nhóm: nhóm nào cũng phải khớp (AND).
+  Gộp mọi từ đồng nghĩa vào 1 danh sách rồi bắt khớp tất cả sẽ loại nhầm "IDF motor trip.pdf"
+  chỉ vì tên file không chứa "induced fan".
+- Chấm cả lô (từ x tên file) bằng rapidfuzz.process.cdist trên mọi core.
+"""
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from Funtion.synonyms import get_synonym_service
+
+
+def keyword_groups(query: str) -> List[List[str]]:
+    """[[từ khóa 1 + đồng nghĩa], [từ khóa 2 + đồng nghĩa], ...] (lowercase)."""
+    svc = get_synonym_service()
+    groups = [sorted(svc.expand(kw)) for kw in (query or "").split()]
+    return [g for g in groups if g]
+
+
+def score_names(
+    groups: Sequence[Sequence[str]], names: Sequence[str], threshold: int = 70
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(vị trí tên khớp, điểm trung bình của các nhóm) cho 1 lô tên file."""
+    if not groups or not names:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+    terms = [t for g in groups for t in g]
+    starts = np.cumsum([0] + [len(g) for g in groups[:-1]])
+    # điểm < ngưỡng => 0
+    scores = process.cdist(
+        terms, [n.lower() for n in names],
+        scorer=fuzz.partial_ratio, score_cutoff=threshold,
+        dtype=np.uint8, workers=-1,
+    )
+    best = np.maximum.reduceat(scores, starts, axis=0)  # OR trong nhóm -> (nhóm, tên)
+    ok = np.flatnonzero(best.min(axis=0) >= threshold)  # AND giữa các nhóm
+    return ok, best[:, ok].mean(axis=0)
+
@@ -0,0 +1,126 @@
+# Funtion/hash_cache.py
+"""
+Cache hash nội dung file trên đĩa (SQLite), dùng cho duplicate finder.
+
+- Khoá: path, hợp lệ khi (size, mtime, inode) còn khớp với os.stat hiện tại
+  -> file sửa / thay thế (inode mới) sẽ tự bị hash lại.
+- Lưu cả sample hash (đầu + cuối) lẫn full SHA-256: scan lặp lại chỉ đọc file mới / đã sửa.
+- Dùng từ nhiều thread (pool hash): 1 connection + lock, commit theo lô.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from Funtion.duplicate_finder import full_hash, sample_hash
+
+HASH_CACHE_FILE = "hash_cache.db"
+_COMMIT_EVERY = 500
+
+
+class HashCache:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hashes(
+                path   TEXT PRIMARY KEY,
+                size   INTEGER NOT NULL,
+                mtime  REAL NOT NULL,
+                inode  INTEGER NOT NULL,
+                sample TEXT,
+                full   TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    # ---------- low level ----------
+    def _lookup(self, path: str, st: os.stat_result, column: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM hashes WHERE path = ? AND size = ? AND mtime = ? AND inode = ?",
+                (path, st.st_size, st.st_mtime, st.st_ino),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, path: str, st: os.stat_result, **values: str) -> None:
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT size, mtime, inode, sample, full FROM hashes WHERE path = ?", (path,)
+            ).fetchone()
+            sample = full = None
+            if cur and tuple(cur[:3]) == (st.st_size, st.st_mtime, st.st_ino):
+                sample, full = cur[3], cur[4]  # giữ hash còn hợp lệ của cột kia
+            sample = values.get("sample", sample)
+            full = values.get("full", full)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes(path, size, mtime, inode, sample, full) VALUES(?,?,?,?,?,?)",
+                (path, st.st_size, st.st_mtime, st.st_ino, sample, full),
+            )
+            self._pending += 1
+            if self._pending >= _COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    # ---------- hash có cache ----------
+    def full_hash(self, path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        h = self._lookup(path, st, "full")
+        if h is None:
+            h = full_hash(path)
+            if h is not None:
+                self._store(path, st, full=h)
+        return h
+
+    def sample_hash(self, path: str) -> Optional[str]:
+        # stat luôn cần (size + mtime + inode kiểm tra cache còn hợp lệ) -> không nhận size từ ngoài
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        h = self._lookup(path, st, "sample")
+        if h is None:
+            h = sample_hash(path, st.st_size)
+            if h is None:
+                return None
+            extra: Dict[str, str] = {}
+            if h.startswith("full:"):  # file nhỏ: sample chính là full hash
+                extra["full"] = h[5:]
+            self._store(path, st, sample=h, **extra)
+        return h
+
+    def flush(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+_caches: Dict[str, HashCache] = {}
+_caches_lock = threading.Lock()
+
+
+def open_hash_cache(cache_dir: str) -> HashCache:
+    """1 HashCache / thư mục (mở lazy, dùng chung trong app)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    db_path = os.path.join(cache_dir, HASH_CACHE_FILE)
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = _caches[db_path] = HashCache(db_path)
+        return cache
@@ -493,7 +493,7 @@ class HelpDialog(QDialog):
 
         <h3>Khái niệm nhanh</h3>
         <ul>
-          <li><b>Vector Store</b>: thư mục chứa <code>index.faiss</code> + <code>metadata.json</code> + <code>base_path.txt</code>.</li>
+          <li><b>Vector Store</b>: thư mục chứa <code>index.faiss</code> + metadata (<code>metastore.json</code> + <code>meta-*/</code>, store cũ: <code>metadata.json</code>) + <code>base_path.txt</code>.</li>
           <li><b>Retriever</b>: tìm top-k đoạn liên quan.</li>
           <li><b>LLM</b>: viết câu trả lời dựa trên context + prompt SOP.</li>
         </ul>
@@ -601,7 +601,7 @@ class HelpDialog(QDialog):
 
         <h3>3) AI Popup báo thiếu vector store</h3>
         <ul>
-          <li>Folder vector store phải có: <code>index.faiss</code>, <code>metadata.json</code>, <code>base_path.txt</code>.</li>
+          <li>Folder vector store phải có: <code>index.faiss</code>, <code>metastore.json</code> (store cũ: <code>metadata.json</code>), <code>base_path.txt</code>.</li>
           <li>Nếu thiếu: hãy rebuild vector store bằng tool build/append.</li>
         </ul>
 
@@ -0,0 +1,94 @@
+# Funtion/image_store.py
+"""
+Kho ảnh cho notes, đánh địa chỉ theo nội dung (SHA-256).
+
+- Ảnh dán / chèn vào note được ghi 1 lần vào <root>/<2 ký tự đầu hash>/<hash>;
+  cùng 1 ảnh dán nhiều lần chỉ có 1 file.
+- Note HTML chỉ giữ tham chiếu "cas:<sha256>" thay vì base64 inline
+  -> lưu / đọc note không còn kéo theo vài MB ảnh.
+- RichTextEdit.loadResource() đọc ảnh khi QTextDocument cần hiển thị (lazy, document tự cache).
+- externalize_data_uris(): chuyển <img src="data:image/...;base64,..."> cũ sang cas: (migrate note cũ).
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+CAS_SCHEME = "cas"
+
+_DATA_URI_RE = re.compile(
+    r"""(src\s*=\s*)(["'])data:image/[\w.+-]+;base64,([A-Za-z0-9+/=\s]+)\2""",
+    re.IGNORECASE,
+)
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ImageStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put_bytes(self, data: bytes) -> str:
+        """Ghi ảnh (nếu chưa có), trả về sha256 hex."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest
+
+    def put_file(self, file_path: str) -> str:
+        with open(file_path, "rb") as f:
+            return self.put_bytes(f.read())
+
+    def get_bytes(self, digest: str) -> Optional[bytes]:
+        if not _HASH_RE.match(digest or ""):
+            return None
+        try:
+            with open(self.path_for(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def url(digest: str) -> str:
+        return f"{CAS_SCHEME}:{digest}"
+
+    def externalize_data_uris(self, html: str) -> str:
+        """Thay ảnh base64 inline trong HTML bằng tham chiếu cas: (ảnh được ghi vào kho)."""
+        if "data:image" not in html:
+            return html
+
+        def repl(m: re.Match) -> str:
+            try:
+                data = base64.b64decode(re.sub(r"\s+", "", m.group(3)), validate=True)
+            except (binascii.Error, ValueError):
+                return m.group(0)
+            return f"{m.group(1)}{m.group(2)}{self.url(self.put_bytes(data))}{m.group(2)}"
+
+        return _DATA_URI_RE.sub(repl, html)
+
+
+_stores: Dict[str, ImageStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_image_store(root: str) -> ImageStore:
+    """1 ImageStore / thư mục (dùng chung trong app)."""
+    key = os.path.abspath(root)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ImageStore(key)
+        return store
@@ -0,0 +1,139 @@
+# Funtion/index_db_pool.py
+"""
+Connection pool cho các DB index của IndexSearchWindow + search song song nhiều DB.
+
+- Mỗi DB 1 connection read-only (URI mode=ro, check_same_thread=False) mở lazy, giữ lại
+  giữa các lần search; 1 lock / DB vì sqlite3.Connection không dùng chung đồng thời được.
+- BASE_PATH, có files_fts hay không: đọc 1 lần khi mở connection rồi cache.
+- run_many(): fan-out trên thread pool (sqlite3 nhả GIL khi chạy query), mỗi DB xong
+  là báo ngay qua callback -> tổng thời gian ~ DB chậm nhất thay vì tổng các DB.
+- Kết quả lấy theo trang (Funtion.index_fts.PageCursor), trang sau chỉ tải khi cần.
+"""
+from __future__ import annotations
+
+import os
+import pathlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from Funtion.index_fts import PAGE_SIZE, PageCursor, SearchRow, count_matches, fetch_page, has_fts
+
+INDEX_SEARCH_THREADS = int(os.environ.get("INDEX_SEARCH_THREADS", str(min(8, os.cpu_count() or 4))))
+
+
+def _ro_uri(db_path: str) -> str:
+    # as_uri() percent-encode các ký tự đặc biệt (#, ?, %, khoảng trắng) trong đường dẫn
+    return pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+
+
+@dataclass
+class _PooledDb:
+    conn: sqlite3.Connection
+    base_path: Optional[str]
+    use_fts: bool
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class IndexDbPool:
+    def __init__(self, max_workers: Optional[int] = None):
+        self._dbs: Dict[str, _PooledDb] = {}
+        self._opening: Dict[str, threading.Lock] = {}  # db_path -> lock khi đang mở
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or INDEX_SEARCH_THREADS, thread_name_prefix="index-search"
+        )
+
+    def _get(self, db_path: str) -> _PooledDb:
+        with self._lock:
+            db = self._dbs.get(db_path)
+            if db is not None:
+                return db
+            opening = self._opening.setdefault(db_path, threading.Lock())
+
+        # mở DB (đọc BASE_PATH có thể phải quét cả bảng) ngoài self._lock:
+        # 1 DB chậm không chặn các thread đang search DB khác; cùng DB thì chỉ mở 1 lần
+        with opening:
+            with self._lock:
+                db = self._dbs.get(db_path)
+                if db is not None:
+                    return db
+            conn = sqlite3.connect(_ro_uri(db_path), uri=True, check_same_thread=False)
+            try:
+                row = conn.execute("SELECT path FROM files WHERE name = 'BASE_PATH'").fetchone()
+                db = _PooledDb(conn=conn, base_path=row[0] if row else None, use_fts=has_fts(conn))
+            except Exception:
+                conn.close()
+                raise
+            with self._lock:
+                self._dbs[db_path] = db
+                self._opening.pop(db_path, None)
+            return db
+
+    def base_path(self, db_path: str) -> Optional[str]:
+        return self._get(db_path).base_path
+
+    def _resolve(self, db: _PooledDb, cursor: PageCursor) -> None:
+        # DB chưa có files_fts => cursor chuyển sang LIKE trước khi đọc trang đầu
+        if cursor.use_fts and not db.use_fts and cursor.last_rank is None:
+            cursor.use_fts = False
+
+    def fetch_page(self, db_path: str, cursor: PageCursor, page_size: int = PAGE_SIZE) -> List[SearchRow]:
+        db = self._get(db_path)
+        with db.lock:
+            self._resolve(db, cursor)
+            return fetch_page(db.conn, cursor, page_size)
+
+    def count(self, db_path: str, cursor: PageCursor) -> Tuple[int, bool]:
+        db = self._get(db_path)
+        with db.lock:
+            self._resolve(db, cursor)
+            return count_matches(db.conn, cursor)
+
+    def run_many(
+        self,
+        db_paths: Iterable[str],
+        task: Callable[[str], Any],
+        on_result: Callable[[str, Any], None],
+        on_error: Callable[[str, str], None],
+    ) -> int:
+        """task(db_path) song song trên các DB; callback chạy trên thread của pool. Trả về số DB đã gửi."""
+        def run(db_path: str) -> None:
+            try:
+                value = task(db_path)
+            except Exception as e:
+                on_error(db_path, str(e))
+            else:
+                on_result(db_path, value)
+
+        count = 0
+        for db_path in db_paths:
+            self._executor.submit(run, db_path)
+            count += 1
+        return count
+
+    def invalidate(self, db_path: str) -> None:
+        """Đóng connection của 1 DB (vd: vừa build files_fts) -> lần sau mở lại, đọc lại cache."""
+        with self._lock:
+            db = self._dbs.pop(db_path, None)
+        if db is not None:
+            with db.lock:
+                db.conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            dbs, self._dbs = list(self._dbs.values()), {}
+        for db in dbs:
+            with db.lock:
+                db.conn.close()
+
+
+class IndexSearchSignals(QObject):
+    """Cầu nối thread pool -> UI thread (signal emit từ thread khác được queue sang UI)."""
+    result = Signal(int, str, list)        # generation, db_path, 1 trang [(name, path, snippet)]
+    count = Signal(int, str, int, bool)    # generation, db_path, số kết quả, chính xác?
+    error = Signal(int, str, str)          # generation, db_path, message
@@ -0,0 +1,201 @@
+# Funtion/index_fts.py
+"""
+Full-text search cho các DB index (bảng files(name, path, content)) của IndexSearchWindow.
+
+- Bảng ảo files_fts (FTS5, tokenizer 'trigram', external content = files) + trigger
+  -> tạo 1 lần khi import / lần search đầu, lưu luôn trong DB, tự đồng bộ khi DB được ghi thêm.
+- Trigram: query "abc" khớp chuỗi con giống LIKE '%abc%' nhưng tra posting list thay vì
+  quét toàn bộ content. Kết quả xếp theo bm25() (khớp ở tên nặng hơn) + snippet() quanh chỗ khớp.
+- Kết quả lấy theo trang (PageCursor), cả 2 đều keyset: FTS theo (rank bm25, rowid), LIKE theo rowid
+  (trang sau không phải bỏ qua lại phần đã đọc); chỉ đọc name/path (+ snippet của đúng các dòng trong trang), không kéo cả cột content.
+- Fallback LIKE khi: keyword < 3 ký tự (trigram không tra được), DB chỉ đọc / SQLite không có
+  FTS5, hoặc bảng files không có rowid.
+"""
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+FTS_MIN_CHARS = 3
+NAME_WEIGHT = 10.0             # bm25: khớp ở tên file quan trọng hơn khớp trong content
+SNIPPET_TOKENS = 64            # trigram: 1 token ~ 1 ký tự (64 = tối đa của snippet())
+SNIPPET_CHARS = 120            # độ dài snippet tự cắt khi fallback LIKE
+PAGE_SIZE = 200                # số dòng / trang kết quả
+COUNT_SAMPLE = 1000            # LIKE: số dòng mẫu để ước lượng tổng số kết quả
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+    name, content, content='files', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_fts_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_fts(rowid, name, content) VALUES (new.rowid, new.name, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_fts_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, name, content) VALUES ('delete', old.rowid, old.name, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS files_fts_au AFTER UPDATE ON files BEGIN
+    INSERT INTO files_fts(files_fts, rowid, name, content) VALUES ('delete', old.rowid, old.name, old.content);
+    INSERT INTO files_fts(rowid, name, content) VALUES (new.rowid, new.name, new.content);
+END;
+"""
+_TRIGGERS = ("files_fts_ai", "files_fts_ad", "files_fts_au")
+
+SearchRow = Tuple[str, str, str]   # (name, path, snippet)
+
+
+def has_fts(conn: sqlite3.Connection) -> bool:
+    """files_fts đã có và còn trigger (bảng files bị tạo lại => trigger mất => index cũ)."""
+    rows = conn.execute(
+        "SELECT name FROM sqlite_master WHERE name = 'files_fts' OR name IN (?, ?, ?)", _TRIGGERS
+    ).fetchall()
+    return len(rows) == 1 + len(_TRIGGERS)
+
+
+def ensure_fts(conn: sqlite3.Connection) -> bool:
+    """Tạo + build files_fts nếu chưa có. False nếu không được (chỉ đọc, không có FTS5...)."""
+    try:
+        if has_fts(conn):
+            return True
+        conn.execute("PRAGMA recursive_triggers=ON")
+        conn.execute("DROP TABLE IF EXISTS files_fts")
+        conn.executescript(_FTS_SCHEMA)
+        conn.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
+        conn.commit()
+        return True
+    except sqlite3.DatabaseError as e:
+        print(f"[index_fts] disabled: {e}")
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+        return False
+
+
+@dataclass
+class PageCursor:
+    """Vị trí trang kế tiếp của 1 lần search trên 1 DB."""
+    keyword: str
+    use_fts: bool
+    last_rank: Optional[float] = None  # FTS: keyset (rank, rowid) của dòng cuối; None = chưa đọc trang nào
+    last_rowid: int = 0        # keyset theo rowid (LIKE) / rowid của dòng cuối (FTS)
+    done: bool = False
+
+
+def open_cursor(keyword: str, use_fts: bool = True) -> PageCursor:
+    keyword = keyword.strip()
+    return PageCursor(keyword, use_fts and len(keyword) >= FTS_MIN_CHARS)
+
+
+def _match_expression(keyword: str) -> str:
+    # cả keyword là 1 chuỗi trong ngoặc kép => trigram khớp chuỗi con liên tục (như LIKE)
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def _fts_page(conn: sqlite3.Connection, cursor: PageCursor, page_size: int) -> List[SearchRow]:
+    expr = _match_expression(cursor.keyword)
+    # 1) chỉ (rank, rowid) của trang (bm25 dùng index FTS, không đọc content);
+    #    keyset: trang sau bắt đầu ngay sau dòng cuối, không xếp lại + bỏ qua OFFSET dòng đầu
+    after = ""
+    params: list = [expr, f"bm25({NAME_WEIGHT}, 1.0)"]
+    if cursor.last_rank is not None:
+        after = "AND (rank, rowid) > (?, ?)"
+        params += [cursor.last_rank, cursor.last_rowid]
+    page = conn.execute(
+        f"""
+        SELECT rank, rowid FROM files_fts WHERE files_fts MATCH ? AND rank MATCH ? {after}
+        ORDER BY rank, rowid LIMIT ?
+        """,
+        (*params, page_size),
+    ).fetchall()
+    if not page:
+        return []
+    cursor.last_rank, cursor.last_rowid = page[-1]
+    ids = [rowid for _, rowid in page]
+    # 2) name/path + snippet cho đúng các dòng của trang
+    marks = ",".join("?" * len(ids))
+    meta = {
+        rowid: (name, path)
+        for rowid, name, path in conn.execute(
+            f"SELECT rowid, name, path FROM files WHERE rowid IN ({marks})", ids
+        )
+    }
+    snippets = dict(conn.execute(
+        f"""
+        SELECT rowid, snippet(files_fts, 1, '[', ']', '…', {SNIPPET_TOKENS})
+        FROM files_fts WHERE files_fts MATCH ? AND rowid IN ({marks})
+        """,
+        (expr, *ids),
+    ))
+    return [(*meta[i], snippets.get(i) or "") for i in ids if i in meta]
+
+
+def _like_page(conn: sqlite3.Connection, cursor: PageCursor, page_size: int) -> List[SearchRow]:
+    keyword = cursor.keyword
+    pattern = f"%{keyword}%"
+    half = SNIPPET_CHARS // 3
+    rows = conn.execute(
+        f"""
+        SELECT rowid, name, path,
+               CASE WHEN instr(lower(content), lower(?)) > 0
+                    THEN substr(content, max(instr(lower(content), lower(?)) - {half}, 1), {SNIPPET_CHARS})
+                    ELSE '' END
+        FROM files
+        WHERE rowid > ? AND (name LIKE ? OR content LIKE ?)
+        ORDER BY rowid LIMIT ?
+        """,
+        (keyword, keyword, cursor.last_rowid, pattern, pattern, page_size),
+    ).fetchall()
+    if rows:
+        cursor.last_rowid = rows[-1][0]
+    return [(name, path, snippet) for _, name, path, snippet in rows]
+
+
+def fetch_page(conn: sqlite3.Connection, cursor: PageCursor, page_size: int = PAGE_SIZE) -> List[SearchRow]:
+    """Trang kế tiếp [(name, path, snippet)]; cursor.done khi hết kết quả."""
+    if cursor.done:
+        return []
+    rows: List[SearchRow] = []
+    if cursor.use_fts:
+        try:
+            rows = _fts_page(conn, cursor, page_size)
+        except sqlite3.OperationalError as e:
+            print(f"[index_fts] query failed, fallback LIKE: {e}")
+            if cursor.last_rank is not None:  # đã trả vài trang FTS: đổi sang LIKE sẽ lặp kết quả
+                cursor.done = True
+                return []
+            cursor.use_fts = False
+    if not cursor.use_fts:
+        rows = _like_page(conn, cursor, page_size)
+    if len(rows) < page_size:
+        cursor.done = True
+    return rows
+
+
+def count_matches(conn: sqlite3.Connection, cursor: PageCursor) -> Tuple[int, bool]:
+    """
+    (số kết quả, chính xác?). FTS: đếm thật trên index.
+    LIKE: đếm trên COUNT_SAMPLE dòng đầu rồi ngoại suy theo max(rowid) (không quét cả bảng).
+    """
+    if cursor.use_fts:
+        try:
+            row = conn.execute(
+                "SELECT count(*) FROM files_fts WHERE files_fts MATCH ?",
+                (_match_expression(cursor.keyword),),
+            ).fetchone()
+            return int(row[0]), True
+        except sqlite3.OperationalError:
+            pass
+    pattern = f"%{cursor.keyword}%"
+    hits, sampled = conn.execute(
+        """
+        SELECT coalesce(sum(hit), 0), count(*) FROM (
+            SELECT (name LIKE ? OR content LIKE ?) AS hit FROM files ORDER BY rowid LIMIT ?
+        )
+        """,
+        (pattern, pattern, COUNT_SAMPLE),
+    ).fetchone()
+    if sampled < COUNT_SAMPLE:
+        return int(hits), True
+    total = conn.execute("SELECT max(rowid) FROM files").fetchone()[0] or sampled
+    return int(round(hits * total / sampled)), False
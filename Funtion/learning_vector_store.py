@@ -8,8 +8,12 @@ from PySide6.QtWidgets import (
 )
 
 
-from vector_store_builder import build_vector_store, build_vector_store_from_files, append_vector_store
+from vector_store_builder import (
+    build_vector_store, build_vector_store_from_files, append_vector_store, sync_vector_store
+)
 from Funtion.rag_extract import extract_content
+from Funtion.tree_walker import walk_files
+from Funtion.rag_metastore import metadata_exists
 
 
 def get_app_dir():
@@ -61,9 +65,7 @@ class DropZone(QFrame):
         expanded = []
         for p in paths:
             if os.path.isdir(p):
-                for root, _, files in os.walk(p):
-                    for fn in files:
-                        expanded.append(os.path.join(root, fn))
+                expanded.extend(sorted(rec.path for rec in walk_files(p)))
             else:
                 expanded.append(p)
 
@@ -147,6 +149,28 @@ class AppendStoreWorker(QThread):
         except Exception as e:
             self.error.emit(str(e))
 
+class SyncStoreWorker(QThread):
+    progress = Signal(int)
+    log = Signal(str)
+    done = Signal(dict)    # {"added","updated","deleted","chunks_added","chunks_removed"}
+    error = Signal(str)
+
+    def __init__(self, store_dir: str):
+        super().__init__()
+        self.store_dir = store_dir
+
+    def run(self):
+        try:
+            self.log.emit(f"Store: {self.store_dir}")
+            stats = sync_vector_store(
+                store_dir=self.store_dir,
+                extract_content_fn=extract_content,
+                progress_cb=lambda p: self.progress.emit(int(p)),
+            )
+            self.done.emit(dict(stats))
+        except Exception as e:
+            self.error.emit(str(e))
+
 
 class VectorStoreDialog(QDialog):
     def __init__(self, parent=None):
@@ -200,6 +224,10 @@ class VectorStoreDialog(QDialog):
         self.btn_append = QPushButton("Append Dropped Files")
         self.btn_append.clicked.connect(self.start_append_from_drop)
         row4.addWidget(self.btn_append)
+        self.btn_sync = QPushButton("Sync Store with Source Folder")
+        self.btn_sync.setToolTip("Thêm file mới, học lại file đã sửa, xoá chunk của file đã bị xoá")
+        self.btn_sync.clicked.connect(self.start_sync)
+        row4.addWidget(self.btn_sync)
         lay.addLayout(row4)
 
         # internal buffer
@@ -285,6 +313,8 @@ class VectorStoreDialog(QDialog):
     def on_error(self, msg: str):
         self.log(f"❌ Error: {msg}")
         self.btn_build.setEnabled(True)
+        self.btn_append.setEnabled(True)
+        self.btn_sync.setEnabled(True)
         QMessageBox.critical(self, "Error", msg)
     def reload_store_list(self):
         self.cbo_store.clear()
@@ -300,11 +330,10 @@ class VectorStoreDialog(QDialog):
 
             # store hợp lệ (đủ file để load/append/validate)
             idx  = os.path.join(store_dir, "index.faiss")
-            meta = os.path.join(store_dir, "metadata.json")
             base = os.path.join(store_dir, "base_path.txt")
             cfg  = os.path.join(store_dir, "index_config.json")
 
-            if os.path.exists(idx) and os.path.exists(meta) and os.path.exists(base) and os.path.exists(cfg):
+            if os.path.exists(idx) and metadata_exists(store_dir) and os.path.exists(base) and os.path.exists(cfg):
                 self.cbo_store.addItem(name, userData=store_dir)
 
 
@@ -337,3 +366,30 @@ class VectorStoreDialog(QDialog):
         self.log(f"✅ Append done: +{added_chunks} chunks")
         self.btn_append.setEnabled(True)
         QMessageBox.information(self, "Done", f"Append completed.\nAdded chunks: {added_chunks}")
+
+    def start_sync(self):
+        store_dir = self.cbo_store.currentData()
+        if not store_dir:
+            QMessageBox.warning(self, "Missing", "Please select an existing store.")
+            return
+
+        self.btn_sync.setEnabled(False)
+        self.pb.setValue(0)
+        self.log("🔄 Start sync...")
+
+        self.worker = SyncStoreWorker(store_dir)
+        self.worker.progress.connect(self.pb.setValue)
+        self.worker.log.connect(self.log)
+        self.worker.done.connect(self.on_sync_done)
+        self.worker.error.connect(self.on_error)
+        self.worker.start()
+
+    def on_sync_done(self, stats: dict):
+        msg = (
+            f"Files: +{stats.get('added', 0)} new, {stats.get('updated', 0)} changed, "
+            f"{stats.get('deleted', 0)} deleted, {stats.get('skipped_dup', 0)} skipped (duplicate)\n"
+            f"Chunks: +{stats.get('chunks_added', 0)} / -{stats.get('chunks_removed', 0)}"
+        )
+        self.log(f"✅ Sync done: {msg}")
+        self.btn_sync.setEnabled(True)
+        QMessageBox.information(self, "Done", f"Sync completed.\n{msg}")
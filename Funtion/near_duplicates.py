@@ -0,0 +1,160 @@
+# Funtion/near_duplicates.py
+"""
+Tìm tài liệu gần trùng nội dung (vd: "rev.0" vs "rev.C", PDF xuất lại từ cùng file Word).
+
+- Trích text bằng rag_extract.extract_content qua parallel_extract.iter_extracted (process con,
+  file treo quá RAG_EXTRACT_TIMEOUT / làm crash worker chỉ bị bỏ qua, không kéo theo cả lượt quét).
+- Mỗi tài liệu -> tập shingle (SHINGLE_WORDS từ liên tiếp) -> chữ ký MinHash NUM_PERM giá trị (numpy).
+- LSH banding: chia chữ ký thành BANDS dải, 2 tài liệu trùng 1 dải mới được so sánh
+  => gần tuyến tính theo số file thay vì so từng cặp.
+- Cặp ứng viên có độ giống ước lượng (Jaccard ~ tỉ lệ MinHash trùng) >= SIM_THRESHOLD được gộp (union-find).
+"""
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Funtion.parallel_extract import iter_extracted
+from Funtion.rag_extract import extract_content
+from Funtion.tree_walker import FileRecord
+
+NEAR_DUP_EXT = {
+    ".txt", ".md", ".pdf", ".docx", ".xlsx", ".pptx",
+    ".csv", ".json", ".xml", ".html", ".htm",
+}
+NUM_PERM = 128
+BANDS = 16                     # 16 dải x 8 hàng: ngưỡng LSH ~0.7
+SHINGLE_WORDS = 5
+MIN_SHINGLES = 5               # tài liệu quá ít chữ (PDF scan...) bỏ qua
+SIM_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_WORKERS = int(os.environ.get("NEAR_DUP_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX32 = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(20240601)  # seed cố định: chữ ký ổn định giữa các process / lần chạy
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Hash 32-bit (crc32, ổn định giữa các process) của các shingle từ, đã unique."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    k = min(SHINGLE_WORDS, len(words))
+    shingles = (" ".join(words[i:i + k]) for i in range(len(words) - k + 1))
+    hv = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+    return np.unique(hv)
+
+
+def minhash(hv: np.ndarray, block: int = 4096) -> np.ndarray:
+    """Chữ ký MinHash (NUM_PERM,) uint32; xử lý theo khối để tài liệu lớn không tốn RAM."""
+    sig = np.full(NUM_PERM, _MAX32, dtype=np.uint64)
+    for start in range(0, len(hv), block):
+        blk = hv[start:start + block]
+        ph = (np.outer(_PERM_A, blk) + _PERM_B[:, None]) % _MERSENNE & _MAX32
+        np.minimum(sig, ph.min(axis=1), out=sig)
+    return sig.astype(np.uint32)
+
+
+def text_signature(text: str) -> Optional[np.ndarray]:
+    """MinHash của 1 tài liệu; None nếu quá ít chữ (hoặc extract lỗi => text rỗng)."""
+    hv = shingle_hashes(text)
+    if len(hv) < MIN_SHINGLES:
+        return None
+    return minhash(hv)
+
+
+def _similarity(sigs: np.ndarray, i: int, j: int) -> float:
+    return float(np.count_nonzero(sigs[i] == sigs[j])) / sigs.shape[1]
+
+
+def cluster_signatures(sigs: np.ndarray, threshold: float = SIM_THRESHOLD) -> List[List[int]]:
+    """LSH banding + union-find -> các cụm (index vào sigs), mỗi cụm >= 2 phần tử."""
+    n = len(sigs)
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    rows = sigs.shape[1] // BANDS
+    for b in range(BANDS):
+        band = np.ascontiguousarray(sigs[:, b * rows:(b + 1) * rows])
+        buckets: Dict[bytes, List[int]] = {}
+        for i in range(n):
+            buckets.setdefault(band[i].tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            rep = members[0]
+            for prev, m in zip(members, members[1:]):
+                if find(m) == find(rep):
+                    continue
+                # so với đại diện bucket, trượt thì so với phần tử liền trước (chuỗi tài liệu sửa dần)
+                for other in (rep, prev):
+                    if _similarity(sigs, other, m) >= threshold:
+                        parent[find(m)] = find(other)
+                        break
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(n):
+        clusters.setdefault(find(i), []).append(i)
+    return [c for c in clusters.values() if len(c) >= 2]
+
+
+def find_near_duplicates(
+    records: Sequence[FileRecord],
+    threshold: float = SIM_THRESHOLD,
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> List[dict]:
+    """
+    [{"similarity": float (0..1, trung bình so với file đầu nhóm), "files": [FileRecord, ...]}, ...]
+    Nhóm đông nhất trước. Cancel giữa chừng => [].
+    """
+    records = [r for r in records if r.ext in NEAR_DUP_EXT]
+    if len(records) < 2:
+        return []
+
+    sig_of: Dict[int, np.ndarray] = {}
+    extracted = iter_extracted(
+        [r.path for r in records], extract_content,
+        max_workers=max_workers or NEAR_DUP_WORKERS, timeout=timeout,
+    )
+    try:
+        for i, (_, text) in enumerate(extracted):
+            if cancel_cb and cancel_cb():
+                return []
+            sig = text_signature(text)
+            if sig is not None:
+                sig_of[i] = sig
+    finally:
+        extracted.close()  # cancel => kill worker đang chạy, không chờ file treo
+
+    if len(sig_of) < 2:
+        return []
+    idx = sorted(sig_of)
+    sigs = np.stack([sig_of[i] for i in idx])
+
+    groups = []
+    for cluster in cluster_signatures(sigs, threshold):
+        cluster.sort(key=lambda k: records[idx[k]].path)
+        head = cluster[0]
+        sims = [_similarity(sigs, head, k) for k in cluster[1:]]
+        groups.append({
+            "similarity": sum(sims) / len(sims),
+            "files": [records[idx[k]] for k in cluster],
+        })
+    groups.sort(key=lambda g: (len(g["files"]), g["similarity"]), reverse=True)
+    return groups
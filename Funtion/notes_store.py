@@ -0,0 +1,147 @@
+# Funtion/notes_store.py
+"""
+Lưu containers + notes trong SQLite thay cho containers_data.json.
+
+- Mỗi thao tác (thêm / xoá container, thêm / xoá file, lưu note) = 1 câu lệnh + commit
+  trên đúng dòng đó -> không ghi lại toàn bộ dữ liệu mỗi lần lưu.
+- Lúc mở app chỉ đọc tên container + đường dẫn file; HTML của note (có thể chứa ảnh)
+  chỉ đọc khi mở note (get_note).
+- Lần đầu mở: nếu có containers_data.json cũ thì import 1 lần (file json giữ nguyên làm backup).
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS containers (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS items (
+    id           INTEGER PRIMARY KEY,
+    container_id INTEGER NOT NULL REFERENCES containers(id) ON DELETE CASCADE,
+    path         TEXT NOT NULL,
+    note         TEXT NOT NULL DEFAULT '',
+    UNIQUE(container_id, path)
+);
+CREATE TABLE IF NOT EXISTS info (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _note_html(note) -> str:
+    """Note trong json cũ: chuỗi (bản rất cũ) hoặc {"text": html}."""
+    if isinstance(note, str):
+        return note
+    if isinstance(note, dict):
+        return note.get("text", "") or ""
+    return ""
+
+
+class NotesStore:
+    def __init__(self, db_path: str, legacy_json: Optional[str] = None):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        if legacy_json:
+            self._migrate_json(legacy_json)
+
+    def _migrate_json(self, json_path: str) -> None:
+        done = self._conn.execute("SELECT 1 FROM info WHERE key = 'migrated_json'").fetchone()
+        if done or not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[notes_store] skip migration of {json_path}: {e}")
+            return
+
+        with self._conn:  # 1 transaction cho cả lần import
+            for name, entries in (data or {}).items():
+                cid = self._container_id(name, create=True)
+                for entry in entries or []:
+                    path, note = (entry[0], entry[1]) if len(entry) > 1 else (entry[0], "")
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO items(container_id, path, note) VALUES(?, ?, ?)",
+                        (cid, path, _note_html(note)),
+                    )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO info(key, value) VALUES('migrated_json', ?)", (json_path,)
+            )
+
+    def _container_id(self, name: str, create: bool = False) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM containers WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        if not create:
+            return None
+        return self._conn.execute("INSERT INTO containers(name) VALUES(?)", (name,)).lastrowid
+
+    # ---------- đọc (không kéo HTML của note) ----------
+    def load_index(self) -> Dict[str, List[str]]:
+        """{container: [file_path, ...]} theo thứ tự thêm vào."""
+        out: Dict[str, List[str]] = {
+            name: [] for (name,) in self._conn.execute("SELECT name FROM containers ORDER BY id")
+        }
+        rows = self._conn.execute(
+            "SELECT c.name, i.path FROM items AS i JOIN containers AS c ON c.id = i.container_id ORDER BY i.id"
+        )
+        for name, path in rows:
+            out[name].append(path)
+        return out
+
+    def get_note(self, container: str, path: str) -> str:
+        row = self._conn.execute(
+            "SELECT i.note FROM items AS i JOIN containers AS c ON c.id = i.container_id "
+            "WHERE c.name = ? AND i.path = ?",
+            (container, path),
+        ).fetchone()
+        return row[0] if row else ""
+
+    # ---------- ghi từng dòng ----------
+    def add_container(self, name: str) -> None:
+        with self._conn:
+            self._container_id(name, create=True)
+
+    def delete_container(self, name: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM containers WHERE name = ?", (name,))
+
+    def add_file(self, container: str, path: str) -> bool:
+        """False nếu file đã có trong container."""
+        with self._conn:
+            cid = self._container_id(container, create=True)
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO items(container_id, path) VALUES(?, ?)", (cid, path)
+            )
+        return cur.rowcount > 0
+
+    def remove_file(self, container: str, path: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM items WHERE path = ? AND container_id = "
+                "(SELECT id FROM containers WHERE name = ?)",
+                (path, container),
+            )
+
+    def set_note(self, container: str, path: str, html: str) -> None:
+        with self._conn:
+            cid = self._container_id(container, create=True)
+            self._conn.execute(
+                "INSERT INTO items(container_id, path, note) VALUES(?, ?, ?) "
+                "ON CONFLICT(container_id, path) DO UPDATE SET note = excluded.note",
+                (cid, path, html),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
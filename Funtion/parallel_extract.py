@@ -0,0 +1,152 @@
+# Funtion/parallel_extract.py
+"""
+Extract nội dung nhiều file song song trên các process con, trả kết quả ĐÚNG THỨ TỰ đầu vào.
+
+- Mỗi worker là 1 process riêng nhận từng file qua Pipe (không dùng ProcessPoolExecutor:
+  pool đó không huỷ được 1 task treo, và 1 worker chết làm hỏng cả pool).
+- File chạy quá EXTRACT_TIMEOUT giây (PDF bệnh) hoặc làm worker chết (crash trong thư viện C)
+  => file đó trả `failed` (mặc định ""), worker bị kill và thay bằng worker mới, các file khác chạy tiếp.
+- Tối đa `window` file đang extract / chờ trả (backpressure: không giữ text của cả corpus trong RAM).
+- extract_fn phải pickle được (hàm cấp module, vd: rag_extract.extract_content);
+  không pickle được hoặc workers = 0 => chạy tuần tự trong process hiện tại.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pickle
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+EXTRACT_WORKERS = int(os.environ.get("RAG_EXTRACT_WORKERS", str(max(1, (os.cpu_count() or 2) - 2))))
+EXTRACT_TIMEOUT = float(os.environ.get("RAG_EXTRACT_TIMEOUT", "120"))  # giây / file
+
+
+def _safe_extract(extract_fn: Callable[[str], str], path: str, failed: Any = "") -> Any:
+    try:
+        return extract_fn(path) or ""
+    except Exception:
+        return failed  # skip noisy error text
+
+
+def _worker_main(conn, extract_fn: Callable[[str], str], failed: Any) -> None:
+    """Vòng lặp của process con: nhận (idx, path) -> gửi (idx, text). None = dừng."""
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        idx, path = task
+        conn.send((idx, _safe_extract(extract_fn, path, failed)))
+
+
+class _Worker:
+    def __init__(self, ctx, extract_fn: Callable[[str], str], failed: Any):
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child, extract_fn, failed), daemon=True)
+        self.proc.start()
+        child.close()
+        self.task: Optional[Tuple[int, str]] = None
+        self.started = 0.0
+
+    def submit(self, idx: int, path: str) -> None:
+        self.task = (idx, path)
+        self.started = time.monotonic()
+        self.conn.send(self.task)
+
+    def kill(self) -> None:
+        self.proc.terminate()
+        self.proc.join(1)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            if self.task is None:
+                self.conn.send(None)
+                self.proc.join(2)
+        except (OSError, ValueError):
+            pass
+        if self.proc.is_alive():
+            self.proc.terminate()
+            self.proc.join(1)
+        self.conn.close()
+
+
+def _picklable(fn) -> bool:
+    try:
+        pickle.dumps(fn)
+        return True
+    except Exception:
+        return False
+
+
+def iter_extracted(
+    paths: Iterable[str],
+    extract_fn: Callable[[str], str],
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    window: Optional[int] = None,
+    failed: Any = "",
+) -> Iterator[Tuple[str, Any]]:
+    """Yield (path, text) theo đúng thứ tự paths; file lỗi / quá hạn / làm crash worker => `failed`."""
+    paths = list(paths)
+    if not paths:
+        return
+    workers = min(EXTRACT_WORKERS if max_workers is None else max_workers, len(paths))
+    if workers <= 0 or not _picklable(extract_fn):
+        for path in paths:
+            yield path, _safe_extract(extract_fn, path, failed)
+        return
+
+    timeout = timeout or EXTRACT_TIMEOUT
+    window = max(window or workers * 4, workers)
+    # spawn: không fork process đang chạy QThread / torch (mặc định trên Windows)
+    ctx = multiprocessing.get_context("spawn")
+    pool = [_Worker(ctx, extract_fn, failed) for _ in range(workers)]
+    results: Dict[int, Any] = {}
+    next_submit = next_yield = 0
+    try:
+        while next_yield < len(paths):
+            # giao việc cho worker rảnh (giới hạn số file "đang bay")
+            for w in pool:
+                if w.task is None and next_submit < len(paths) and next_submit - next_yield < window:
+                    w.submit(next_submit, paths[next_submit])
+                    next_submit += 1
+
+            if next_yield in results:
+                while next_yield in results:
+                    yield paths[next_yield], results.pop(next_yield)
+                    next_yield += 1
+                continue
+
+            busy = [w for w in pool if w.task is not None]
+            now = time.monotonic()
+            remaining = min(timeout - (now - w.started) for w in busy)
+            wait([w.conn for w in busy] + [w.proc.sentinel for w in busy], max(0.0, min(remaining, 1.0)))
+
+            now = time.monotonic()
+            for i, w in enumerate(pool):
+                if w.task is None:
+                    continue
+                idx, path = w.task
+                try:
+                    if w.conn.poll():
+                        r_idx, text = w.conn.recv()
+                        results[r_idx] = text
+                        w.task = None
+                        continue
+                except (EOFError, OSError):
+                    pass  # pipe đứt: worker đã chết
+                if w.proc.is_alive() and now - w.started < timeout:
+                    continue
+                reason = "timeout" if w.proc.is_alive() else f"worker died (exit {w.proc.exitcode})"
+                print(f"[parallel_extract] {reason}: {path}")
+                results[idx] = failed
+                w.kill()
+                pool[i] = _Worker(ctx, extract_fn, failed)
+    finally:
+        for w in pool:
+            w.stop()
@@ -12,19 +12,65 @@ Upgraded behavior:
 Notes:
 - Case-insensitive.
 - Supports '*' wildcard in both include and exclude.
+- Patterns are compiled ONCE (in parse_percent_query / compile_name_query) and
+  reused for every filename; filter_names() applies the query to a whole list at once.
 """
 
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class NameQuery:
+    """Compiled plain / '*' query (contains-match on the filename)."""
+    raw: str
+    rx: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "rx", _pattern_to_regex(self.raw))
+
+    def match(self, filename: str) -> bool:
+        return self.rx.search(filename) is not None
+
+    def filter_names(self, names: Sequence[str]) -> List[bool]:
+        """Mask (same length as names): True where the name matches."""
+        return _batch_search(self.rx, names)
 
 
 @dataclass(frozen=True)
 class PercentQuery:
     include_raw: str
     exclude_raw: str
+    include_rx: re.Pattern = field(init=False, repr=False, compare=False)
+    exclude_rx: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "include_rx", _pattern_to_regex(self.include_raw))
+        object.__setattr__(self, "exclude_rx", _pattern_to_regex(self.exclude_raw))
+
+    def match(self, filename: str) -> bool:
+        if not self.include_rx.search(filename):
+            return False
+        return not self.exclude_rx.search(filename)
+
+    def filter_names(self, names: Sequence[str]) -> List[bool]:
+        """
+        Mask (same length as names): True where the name matches include and NOT exclude.
+        Exclude is only evaluated on names that passed include.
+        """
+        mask = _batch_search(self.include_rx, names)
+        hit = [i for i, ok in enumerate(mask) if ok]
+        if not hit:
+            return mask
+
+        excluded = _batch_search(self.exclude_rx, [names[i] for i in hit])
+        for i, ex in zip(hit, excluded):
+            if ex:
+                mask[i] = False
+        return mask
 
 
 def _pattern_to_regex(pattern: str) -> re.Pattern:
@@ -33,9 +79,9 @@ def _pattern_to_regex(pattern: str) -> re.Pattern:
 
     Rules:
     - No '*'      : contains match
-    - Exactly one '*', and split into 2 non-empty parts:
-        "A*B" => matches (A.*B) OR (B.*A)
-    - Otherwise (multiple '*' or weird): treat '*' as wildcard sequentially
+    - '*' splits into exactly 2 non-empty parts ("A*B", "*A*B", "A*B*"...):
+        => matches (A.*B) OR (B.*A)
+    - Otherwise (3+ keywords): treat '*' as wildcard sequentially
     """
     pattern = pattern.strip()
     if not pattern:
@@ -47,9 +93,9 @@ def _pattern_to_regex(pattern: str) -> re.Pattern:
     # Has '*'
     parts = [p.strip() for p in pattern.split("*") if p.strip()]
 
-    # Exactly 2 keywords and user typed exactly one '*'
-    # Example: "A*B" -> unordered (A.*B | B.*A)
-    if pattern.count("*") == 1 and len(parts) == 2:
+    # Exactly 2 keywords (extra leading / trailing '*' ignored)
+    # Example: "A*B", "*A*B" -> unordered (A.*B | B.*A)
+    if len(parts) == 2:
         a, b = parts[0], parts[1]
         p1 = re.escape(a) + r".*" + re.escape(b)
         p2 = re.escape(b) + r".*" + re.escape(a)
@@ -60,10 +106,48 @@ def _pattern_to_regex(pattern: str) -> re.Pattern:
     return re.compile(rx, re.IGNORECASE)
 
 
+def _batch_search(rx: re.Pattern, names: Sequence[str]) -> List[bool]:
+    """
+    Run the regex over all names in one pass over a '\n'-joined string
+    (the regex engine skips non-matching names in C; Python only runs per hit).
+    """
+    n = len(names)
+    mask = [False] * n
+    if n == 0:
+        return mask
+
+    blob = "\n".join(names)
+    if blob.count("\n") != n - 1:
+        # a name contains a newline: fall back to per-name search
+        return [rx.search(name) is not None for name in names]
+
+    # patterns never match across '\n' ('.' excludes it, literals are escaped)
+    search, count, find = rx.search, blob.count, blob.find
+    line = 0
+    pos = 0
+    m = search(blob, 0)
+    while m is not None:
+        line += count("\n", pos, m.start())
+        mask[line] = True
+        nl = find("\n", m.start())
+        if nl < 0:
+            break
+        pos = nl + 1
+        line += 1
+        m = search(blob, pos)
+    return mask
+
+
+def compile_name_query(user_text: str) -> NameQuery:
+    """Compile a plain / '*' query once, to be reused across all filenames."""
+    return NameQuery(raw=user_text)
+
+
 def parse_percent_query(user_text: str) -> Optional[PercentQuery]:
     """
     Parse query of form A%B
     - returns None if '%' not present or invalid
+    - the returned query is already compiled (reuse it for every filename)
     """
     if "%" not in user_text:
         return None
@@ -84,12 +168,6 @@ def match_A_percent_B(filename: str, query: PercentQuery) -> bool:
     True if:
     - filename matches include pattern
     - filename does NOT match exclude pattern
+    (uses the patterns compiled in parse_percent_query)
     """
-    inc_rx = _pattern_to_regex(query.include_raw)
-    exc_rx = _pattern_to_regex(query.exclude_raw)
-
-    if not inc_rx.search(filename):
-        return False
-    if exc_rx.search(filename):
-        return False
-    return True
+    return query.match(filename)
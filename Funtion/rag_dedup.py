@@ -2,7 +2,7 @@
 import os
 import re
 import hashlib
-from typing import Dict, List, Tuple, Set, Any
+from typing import Dict, Iterable, List, Tuple, Set, Any
 
 _WS = re.compile(r"\s+")
 
@@ -50,10 +50,13 @@ def build_existing_chunk_hashes(metadata_list: List[Dict[str, Any]]) -> Set[str]
     Build a set of hashes of existing chunk texts in store.
     Assumes metadata item has 'text' containing chunk content.
     """
+    return build_chunk_hashes(m.get("text") or "" for m in metadata_list or [])
+
+def build_chunk_hashes(texts: Iterable[str]) -> Set[str]:
+    """Như build_existing_chunk_hashes nhưng nhận thẳng text (vd: rag_metastore.iter_texts, không tạo dict)."""
     s: Set[str] = set()
-    for m in metadata_list or []:
-        t = m.get("text") or ""
-        t = t.strip()
+    for t in texts:
+        t = (t or "").strip()
         if not t:
             continue
         s.add(sha1_text(norm_for_hash(t)))
@@ -0,0 +1,426 @@
+# Funtion/rag_metastore.py
+"""
+Metadata của vector store dạng cột nhị phân, thay cho metadata.json (list dict, kèm full text).
+
+- Cột cố định (.npy, mở bằng mmap): id, chunk_id, chunk_len, mtime, size_kb, created_at,
+  deleted (tombstone của sync), file_idx, section_idx, subsection_idx.
+- Bảng intern (json nhỏ, 1 dòng / file chứ không / chunk): files = [file_name, rel_path,
+  abs_path, file_type, source_folder], strings = section / subsection.
+- Text: text.bin (utf-8 nối liền, mmap) + text_off.npy (n+1 offset) -> chỉ decode text
+  của chunk thật sự được đọc (kết quả trả về, rerank), không parse cả store lúc mở.
+- Mỗi lần lưu ghi 1 thư mục meta-<gen>/ mới rồi đổi con trỏ metastore.json (os.replace):
+  retriever đang mmap bản cũ không chặn việc lưu (Windows không đổi tên / xoá được file đang map).
+- load_metadata(): đọc được cả store mới lẫn metadata.json cũ; RAG_META_FORMAT=json để ghi json như cũ.
+- append / sync: MetadataWriter.copy_from() chép cột + byte text cũ sang thế hệ mới rồi thêm dòng mới,
+  không decode cả store thành list dict.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+META_JSON = "metadata.json"
+META_POINTER = "metastore.json"
+META_FORMAT = os.environ.get("RAG_META_FORMAT", "columnar").lower()  # "columnar" | "json"
+
+_FILE_FIELDS = ("file_name", "rel_path", "abs_path", "file_type", "source_folder")
+_COLUMNS = {
+    "id": "int64",
+    "chunk_id": "int32",
+    "chunk_len": "int32",
+    "mtime": "float64",
+    "size_kb": "int64",
+    "created_at": "float64",
+    "deleted": "uint8",
+    "file_idx": "int32",
+    "section_idx": "int32",
+    "subsection_idx": "int32",
+}
+
+
+class MetaStore(Sequence):
+    """Đọc metadata dạng cột; store[i] trả dict giống 1 phần tử metadata.json (text đọc lazy)."""
+
+    def __init__(self, meta_dir: str):
+        self.meta_dir = meta_dir
+        self._cols = {
+            name: np.load(os.path.join(meta_dir, f"{name}.npy"), mmap_mode="r") for name in _COLUMNS
+        }
+        self._text_off = np.load(os.path.join(meta_dir, "text_off.npy"), mmap_mode="r")
+        text_path = os.path.join(meta_dir, "text.bin")
+        # np.memmap không map được file rỗng
+        self._text = np.memmap(text_path, dtype="uint8", mode="r") if os.path.getsize(text_path) else b""
+        with open(os.path.join(meta_dir, "tables.json"), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        self.files: List[List[str]] = tables["files"]
+        self.strings: List[str] = tables["strings"]
+        self._n = int(len(self._cols["id"]))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def text(self, i: int) -> str:
+        a, b = int(self._text_off[i]), int(self._text_off[i + 1])
+        return bytes(self._text[a:b]).decode("utf-8", errors="replace")
+
+    def is_deleted(self, i: int) -> bool:
+        return bool(self._cols["deleted"][i])
+
+    @property
+    def n_deleted(self) -> int:
+        return int(np.count_nonzero(self._cols["deleted"]))
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        c = self._cols
+        if c["deleted"][i]:
+            return {"id": int(c["id"][i]), "deleted": True, "text": ""}
+        row: Dict[str, Any] = dict(zip(_FILE_FIELDS, self.files[int(c["file_idx"][i])]))
+        row.update(
+            id=int(c["id"][i]),
+            chunk_id=int(c["chunk_id"][i]),
+            chunk_len=int(c["chunk_len"][i]),
+            mtime=float(c["mtime"][i]),
+            size_kb=int(c["size_kb"][i]),
+            created_at=float(c["created_at"][i]),
+            section=self.strings[int(c["section_idx"][i])],
+            subsection=self.strings[int(c["subsection_idx"][i])],
+            text=self.text(i),
+        )
+        return row
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(self._n))]
+        i = int(i)
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._row(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._n):
+            yield self._row(i)
+
+    def iter_texts(self) -> Iterator[str]:
+        for i in range(self._n):
+            yield self.text(i)
+
+
+Metadata = Union[MetaStore, List[Dict[str, Any]]]
+
+
+# ---------- helper dùng chung cho MetaStore và list dict (metadata.json cũ) ----------
+def is_deleted(metas: Metadata, i: int) -> bool:
+    if isinstance(metas, MetaStore):
+        return metas.is_deleted(i)
+    return bool(metas[i].get("deleted"))
+
+
+def count_deleted(metas: Metadata) -> int:
+    if isinstance(metas, MetaStore):
+        return metas.n_deleted
+    return sum(1 for m in metas if m.get("deleted"))
+
+
+def iter_texts(metas: Metadata) -> Iterator[str]:
+    if isinstance(metas, MetaStore):
+        return metas.iter_texts()
+    return (m.get("text", "") or "" for m in metas)
+
+
+def iter_files(metas: Metadata) -> Iterator[Tuple[Dict[str, Any], List[int]]]:
+    """
+    (file_name / rel_path / abs_path / file_type / source_folder + mtime, vị trí các chunk còn sống)
+    cho từng file trong store. MetaStore: chỉ đọc cột + bảng files, không decode text.
+    """
+    if isinstance(metas, MetaStore):
+        c = metas._cols
+        live = np.flatnonzero(c["deleted"] == 0)
+        fidx = np.asarray(c["file_idx"][live])
+        order = np.argsort(fidx, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(fidx[order]) != 0]) if len(order) else order
+        for rows in np.split(live[order], starts[1:]):
+            if not len(rows):
+                continue
+            info: Dict[str, Any] = dict(zip(_FILE_FIELDS, metas.files[int(c["file_idx"][rows[0]])]))
+            info["mtime"] = float(c["mtime"][rows[0]])
+            yield info, rows.tolist()
+        return
+
+    groups: Dict[tuple, Tuple[Dict[str, Any], List[int]]] = {}
+    for i, m in enumerate(metas):
+        if m.get("deleted"):
+            continue
+        key = tuple(str(m.get(k) or "") for k in _FILE_FIELDS)
+        if key not in groups:
+            info = dict(zip(_FILE_FIELDS, key))
+            info["mtime"] = float(m.get("mtime") or 0.0)
+            groups[key] = (info, [])
+        groups[key][1].append(i)
+    yield from groups.values()
+
+
+# ---------- đọc / ghi theo store_dir ----------
+def _current_dir(store_dir: str) -> str:
+    p = os.path.join(store_dir, META_POINTER)
+    try:
+        with open(p, "r", encoding="utf-8") as f:
+            name = json.load(f).get("dir") or ""
+    except (OSError, ValueError):
+        return ""
+    d = os.path.join(store_dir, name)
+    return d if name and os.path.isdir(d) else ""
+
+
+def metadata_exists(store_dir: str) -> bool:
+    return bool(_current_dir(store_dir)) or os.path.exists(os.path.join(store_dir, META_JSON))
+
+
+def load_metadata(store_dir: str) -> Metadata:
+    """MetaStore nếu store có dạng cột, không thì list dict từ metadata.json."""
+    d = _current_dir(store_dir)
+    if d:
+        return MetaStore(d)
+    with open(os.path.join(store_dir, META_JSON), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MetadataWriter:
+    """
+    Ghi metadata dần theo lô (build lớn: không giữ text / cột của mọi chunk trong RAM).
+    - columnar: text nối thẳng vào text.bin, mỗi cột ghi raw vào file tạm; commit() thêm header .npy
+      rồi đổi con trỏ metastore.json. Chỉ bảng intern (theo file / section) nằm trong RAM.
+    - json (RAG_META_FORMAT=json): ghi từng phần tử vào metadata.json.tmp rồi os.replace.
+    Chưa commit() (lỗi / huỷ) => abort(): store giữ nguyên metadata cũ.
+    """
+
+    def __init__(self, store_dir: str, fmt: str = ""):
+        self.store_dir = store_dir
+        self.fmt = (fmt or META_FORMAT).lower()
+        self.count = 0
+        self.committed = False
+        if self.fmt == "json":
+            self._tmp = os.path.join(store_dir, META_JSON) + ".tmp"
+            self._json = open(self._tmp, "w", encoding="utf-8")
+            self._json.write("[")
+            return
+
+        self.name = f"meta-{time.time_ns():x}"
+        self.meta_dir = os.path.join(store_dir, self.name)
+        os.makedirs(self.meta_dir)
+        self._text = open(os.path.join(self.meta_dir, "text.bin"), "wb")
+        self._pos = 0
+        self._raw = {
+            name: open(os.path.join(self.meta_dir, f"{name}.raw"), "wb")
+            for name in (*_COLUMNS, "text_off")
+        }
+        self._raw["text_off"].write(np.zeros(1, dtype="int64").tobytes())
+        self._file_ids: Dict[tuple, int] = {}
+        self.files: List[List[str]] = []
+        self._string_ids: Dict[str, int] = {"": 0}
+        self.strings: List[str] = [""]
+
+    def _intern(self, s: str) -> int:
+        idx = self._string_ids.get(s)
+        if idx is None:
+            idx = self._string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return idx
+
+    def _file_idx(self, m: Dict[str, Any]) -> int:
+        return self._file_idx_of(tuple(str(m.get(k) or "") for k in _FILE_FIELDS))
+
+    def _file_idx_of(self, key: tuple) -> int:
+        idx = self._file_ids.get(key)
+        if idx is None:
+            idx = self._file_ids[key] = len(self.files)
+            self.files.append(list(key))
+        return idx
+
+    def extend(self, metas: Iterable[Dict[str, Any]], batch: int = 4096) -> None:
+        buf: List[Dict[str, Any]] = []
+        for m in metas:
+            buf.append(m)
+            if len(buf) >= batch:
+                self._write_batch(buf)
+                buf = []
+        if buf:
+            self._write_batch(buf)
+
+    def copy_from(
+        self,
+        metas: Metadata,
+        rows: Optional[List[int]] = None,
+        dead: Iterable[int] = (),
+        batch: int = 65536,
+    ) -> None:
+        """
+        Chép các dòng `rows` (mặc định: tất cả) của store cũ sang, id = vị trí mới;
+        dòng trong `dead` thành tombstone. MetaStore -> store dạng cột: chép thẳng cột + byte text
+        (append / sync không phải decode cả store thành dict rồi ghi lại).
+        """
+        dead_set = set(dead)
+        positions = np.arange(len(metas)) if rows is None else np.asarray(rows, dtype="int64")
+        if self.fmt == "json" or not isinstance(metas, MetaStore):
+            def gen():
+                for k, i in enumerate(positions.tolist(), start=self.count):
+                    m = dict(metas[i])
+                    if i in dead_set or m.get("deleted"):
+                        m = {"deleted": True, "text": ""}
+                    m["id"] = k
+                    yield m
+            self.extend(gen())
+            return
+
+        c = metas._cols
+        old_off = metas._text_off
+        fmap = np.array([self._file_idx_of(tuple(f)) for f in metas.files] + [-1], dtype="int32")
+        smap = np.array([self._intern(t) for t in metas.strings], dtype="int32")
+        dead_arr = np.fromiter(dead_set, dtype="int64", count=len(dead_set))
+        for start in range(0, len(positions), batch):
+            pos = positions[start:start + batch]
+            n = len(pos)
+            gone = (np.asarray(c["deleted"][pos]) != 0) | np.isin(pos, dead_arr)
+            cols = {name: np.asarray(c[name][pos]).astype(dt) for name, dt in _COLUMNS.items()}
+            cols["id"] = np.arange(self.count, self.count + n, dtype="int64")
+            cols["file_idx"] = fmap[cols["file_idx"]]  # -1 (tombstone) -> phần tử cuối = -1
+            cols["section_idx"] = smap[cols["section_idx"]]
+            cols["subsection_idx"] = smap[cols["subsection_idx"]]
+            for name in _COLUMNS:
+                if name not in ("id", "deleted", "file_idx"):
+                    cols[name][gone] = 0
+            cols["deleted"][gone] = 1
+            cols["file_idx"][gone] = -1
+
+            a, b = np.asarray(old_off[pos]), np.asarray(old_off[pos + 1])
+            lens = np.where(gone, 0, b - a)
+            if rows is None and np.array_equal(lens, b - a):
+                # dòng liên tiếp, không đổi: chép nguyên khối byte text
+                self._text.write(bytes(metas._text[int(a[0]):int(b[-1])]))
+            else:
+                for i in np.flatnonzero(lens).tolist():
+                    self._text.write(bytes(metas._text[int(a[i]):int(b[i])]))
+            text_off = self._pos + np.cumsum(lens, dtype="int64")
+            self._pos = int(text_off[-1])
+
+            for name, arr in cols.items():
+                self._raw[name].write(arr.tobytes())
+            self._raw["text_off"].write(text_off.tobytes())
+            self.count += n
+
+    def _write_batch(self, metas: List[Dict[str, Any]]) -> None:
+        if self.fmt == "json":
+            for m in metas:
+                self._json.write(",\n  " if self.count else "\n  ")
+                self._json.write(json.dumps(m, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+                self.count += 1
+            return
+
+        n = len(metas)
+        cols = {name: np.zeros(n, dtype=dt) for name, dt in _COLUMNS.items()}
+        text_off = np.zeros(n, dtype="int64")
+        for i, m in enumerate(metas):
+            cols["id"][i] = int(m.get("id", self.count + i))
+            if m.get("deleted"):
+                cols["deleted"][i] = 1
+                cols["file_idx"][i] = -1
+            else:
+                cols["file_idx"][i] = self._file_idx(m)
+                cols["chunk_id"][i] = int(m.get("chunk_id") or 0)
+                cols["chunk_len"][i] = int(m.get("chunk_len") or 0)
+                cols["mtime"][i] = float(m.get("mtime") or 0.0)
+                cols["size_kb"][i] = int(m.get("size_kb") or 0)
+                cols["created_at"][i] = float(m.get("created_at") or 0.0)
+                cols["section_idx"][i] = self._intern(m.get("section") or "")
+                cols["subsection_idx"][i] = self._intern(m.get("subsection") or "")
+                data = (m.get("text") or "").encode("utf-8")
+                self._text.write(data)
+                self._pos += len(data)
+            text_off[i] = self._pos
+        for name, arr in cols.items():
+            self._raw[name].write(arr.tobytes())
+        self._raw["text_off"].write(text_off.tobytes())
+        self.count += n
+
+    def commit(self) -> None:
+        if self.fmt == "json":
+            self._json.write("\n]" if self.count else "]")
+            self._json.close()
+            meta_path = os.path.join(self.store_dir, META_JSON)
+            os.replace(self._tmp, meta_path)
+            self.committed = True
+            pointer = os.path.join(self.store_dir, META_POINTER)
+            if os.path.exists(pointer):
+                os.remove(pointer)
+            _remove_old_dirs(self.store_dir, keep="")
+            return
+
+        self._text.close()
+        for name, f in self._raw.items():
+            f.close()
+            dtype = np.dtype(_COLUMNS.get(name, "int64"))
+            n = self.count + 1 if name == "text_off" else self.count
+            raw_path = os.path.join(self.meta_dir, f"{name}.raw")
+            # .npy = header + dữ liệu raw (C order) -> nối header vào trước, không nạp cột vào RAM
+            with open(os.path.join(self.meta_dir, f"{name}.npy"), "wb") as out, open(raw_path, "rb") as src:
+                np.lib.format.write_array_header_1_0(out, {
+                    "descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (n,),
+                })
+                shutil.copyfileobj(src, out, 1 << 20)
+            os.remove(raw_path)
+        with open(os.path.join(self.meta_dir, "tables.json"), "w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "strings": self.strings}, f, ensure_ascii=False)
+
+        pointer = os.path.join(self.store_dir, META_POINTER)
+        tmp = pointer + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"format": 1, "dir": self.name, "count": self.count}, f)
+        os.replace(tmp, pointer)
+        self.committed = True
+
+        legacy = os.path.join(self.store_dir, META_JSON)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+        _remove_old_dirs(self.store_dir, keep=self.name)
+
+    def abort(self) -> None:
+        if self.committed:  # lỗi sau khi đã đổi con trỏ (ghi manifest...) -> metadata mới vẫn dùng được
+            return
+        if self.fmt == "json":
+            self._json.close()
+            if os.path.exists(self._tmp):
+                os.remove(self._tmp)
+            return
+        self._text.close()
+        for f in self._raw.values():
+            f.close()
+        shutil.rmtree(self.meta_dir, ignore_errors=True)
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def _remove_old_dirs(store_dir: str, keep: str) -> None:
+    for name in os.listdir(store_dir):
+        if name.startswith("meta-") and name != keep and os.path.isdir(os.path.join(store_dir, name)):
+            # bản đang được retriever khác mmap (Windows) -> xoá không được, để lần lưu sau dọn
+            shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+
+def save_metadata(store_dir: str, metas: Iterable[Dict[str, Any]]) -> None:
+    """Ghi metadata (atomic) theo RAG_META_FORMAT; bỏ bản ở định dạng còn lại để không đọc nhầm."""
+    with MetadataWriter(store_dir) as writer:
+        writer.extend(metas)
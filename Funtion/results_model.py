@@ -0,0 +1,149 @@
+# Funtion/results_model.py
+"""
+Model/view cho bảng kết quả rất lớn (hàng trăm nghìn -> hàng triệu dòng).
+
+- Dữ liệu giữ theo cột (names, paths, sizes, mtimes), không tạo QTreeWidgetItem cho từng dòng;
+  text DATE / TYPE / SIZE chỉ format khi view cần vẽ dòng đó.
+- Sort = argsort trên cột key, không gọi __lt__ Python cho từng phép so sánh.
+  Natural key của tên (string phẳng) tính dần theo từng lô append; cột chữ được đổi
+  thành rank int 1 lần rồi cache -> sort lại / đảo chiều chỉ còn np.argsort mảng số.
+- Dòng append sau lần sort cuối hiển thị ở cuối bảng (chưa sort) tới lần sort kế tiếp.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from Funtion.tree_sorter import file_type_text, format_size_mb, format_ts, natural_key_str
+
+HEADERS = ["FILE NAME", "DATE MODIFIED", "TYPE", "SIZE (MB)", "PATH"]
+COL_NAME, COL_DATE, COL_TYPE, COL_SIZE, COL_PATH = range(5)
+
+
+def _rank(keys: List[str]) -> np.ndarray:
+    """Rank int của từng string (sort string thuần của Python nhanh hơn argsort mảng object)."""
+    order = np.fromiter(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int64, count=len(keys))
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys), dtype=np.int64)
+    return rank
+
+
+class ResultsTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._names: List[str] = []
+        self._paths: List[str] = []
+        self._sizes: List[int] = []
+        self._mtimes: List[float] = []
+        self._name_keys: List[str] = []
+        self._order: Optional[np.ndarray] = None  # vị trí hiển thị -> index dữ liệu
+        self._keys = {}                            # cột -> key array (cache tới khi thêm dòng)
+
+    # ---------- dữ liệu ----------
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._names, self._paths, self._sizes, self._mtimes = [], [], [], []
+        self._name_keys = []
+        self._order = None
+        self._keys = {}
+        self.endResetModel()
+
+    def append_records(self, records: Iterable) -> None:
+        """records: (name, path, size, mtime) – vd FileRecord."""
+        records = list(records)
+        if not records:
+            return
+        n = len(self._names)
+        self.beginInsertRows(QModelIndex(), n, n + len(records) - 1)
+        for name, path, size, mtime in records:
+            self._names.append(name)
+            self._paths.append(path)
+            self._sizes.append(-1 if size is None else size)
+            self._mtimes.append(float("nan") if mtime is None else mtime)
+            self._name_keys.append(natural_key_str(name))
+        self._keys = {}
+        self.endInsertRows()
+
+    def _data_index(self, row: int) -> int:
+        order = self._order
+        if order is not None and row < len(order):
+            return int(order[row])
+        return row
+
+    def path_at(self, row: int) -> str:
+        return self._paths[self._data_index(row)]
+
+    def name_at(self, row: int) -> str:
+        return self._names[self._data_index(row)]
+
+    # ---------- Qt model API ----------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        i = self._data_index(index.row())
+        col = index.column()
+        if col == COL_NAME:
+            return self._names[i]
+        if col == COL_PATH:
+            return self._paths[i]
+        if role == Qt.ToolTipRole:
+            return None
+        if col == COL_DATE:
+            ts = self._mtimes[i]
+            return "" if ts != ts else format_ts(ts)  # NaN = không có mtime
+        if col == COL_TYPE:
+            return file_type_text(self._names[i])
+        size = self._sizes[i]
+        return "" if size < 0 else format_size_mb(size)
+
+    # ---------- sort ----------
+    def _sort_key(self, column: int) -> np.ndarray:
+        key = self._keys.get(column)
+        if key is not None:
+            return key
+        if column == COL_NAME:
+            key = _rank(self._name_keys)
+        elif column == COL_DATE:
+            key = np.nan_to_num(np.asarray(self._mtimes, dtype=np.float64), nan=-np.inf)
+        elif column == COL_SIZE:
+            key = np.asarray(self._sizes, dtype=np.int64)
+        elif column == COL_TYPE:
+            key = _rank([file_type_text(n).lower() for n in self._names])
+        else:
+            key = _rank([p.lower() for p in self._paths])
+        self._keys[column] = key
+        return key
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not self._names or column < 0:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()  # selection / current index của view
+        data_rows = [self._data_index(p.row()) for p in persistent]
+
+        idx = np.argsort(self._sort_key(column), kind="stable")
+        if order == Qt.DescendingOrder:
+            idx = idx[::-1]
+        self._order = np.ascontiguousarray(idx)
+
+        if persistent:
+            pos = np.empty(len(idx), dtype=np.int64)
+            pos[idx] = np.arange(len(idx), dtype=np.int64)
+            self.changePersistentIndexList(
+                persistent,
+                [self.index(int(pos[r]), p.column()) for p, r in zip(persistent, data_rows)],
+            )
+        self.layoutChanged.emit()
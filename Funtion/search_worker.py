@@ -0,0 +1,61 @@
+# Funtion/search_worker.py
+"""
+QThread chạy search ngoài UI thread và stream kết quả theo từng lô.
+
+- search_fn(cancel_cb) là generator yield từng kết quả (vd: (name, path)).
+- Kết quả đầu tiên được emit ngay, sau đó gom theo lô (BATCH_SIZE / FLUSH_INTERVAL)
+  để không spam signal khi có hàng trăm nghìn kết quả.
+- cancel(): generator tự dừng ở lần kiểm tra cancel_cb kế tiếp.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Iterable
+
+from PySide6.QtCore import QThread, Signal
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.1  # giây
+
+
+class SearchWorker(QThread):
+    batch = Signal(list)        # list kết quả mới
+    done = Signal(int, bool)    # tổng số kết quả, đã huỷ?
+    error = Signal(str)
+
+    def __init__(self, search_fn: Callable[[Callable[[], bool]], Iterable[Any]], parent=None):
+        super().__init__(parent)
+        self.search_fn = search_fn
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        total = 0
+        buf = []
+        last_flush = 0.0  # 0 => kết quả đầu tiên emit ngay
+        try:
+            it = iter(self.search_fn(self.is_cancelled))
+            for item in it:
+                if self._cancelled:
+                    break
+                buf.append(item)
+                now = time.monotonic()
+                if len(buf) >= BATCH_SIZE or now - last_flush >= FLUSH_INTERVAL:
+                    total += len(buf)
+                    self.batch.emit(buf)
+                    buf = []
+                    last_flush = now
+            close = getattr(it, "close", None)  # huỷ giữa chừng: dọn generator ngay trong thread này
+            if close is not None:
+                close()
+            if buf:
+                total += len(buf)
+                self.batch.emit(buf)
+            self.done.emit(total, self._cancelled)
+        except Exception as e:
+            self.error.emit(str(e))
@@ -0,0 +1,138 @@
+# Funtion/synonyms.py
+"""
+Từ đồng nghĩa dùng chung (search tên file '@' + BM25 của RAG).
+
+- synonyms.json chỉ đọc lại khi mtime thay đổi (sửa file bên ngoài / qua dialog đều tự cập nhật).
+- Mỗi dòng "key == v1, v2" là 1 nhóm; nhóm có từ chung được gộp lại.
+  Lookup 2 chiều, không phân biệt hoa thường: "bfpt" -> {"bfpt", "boiler feedwater", "tbfp"}
+  và "tbfp" -> cùng nhóm đó.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+SYNONYMS_FILE = "synonyms.json"
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _norm(term: str) -> str:
+    return _WS_RE.sub(" ", (term or "").strip().lower())
+
+
+def _build_lookup(raw: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    """Gộp các nhóm có phần tử chung (union-find) -> term -> cả nhóm."""
+    parent: Dict[str, str] = {}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for key, values in raw.items():
+        terms = [t for t in (_norm(key), *map(_norm, values or [])) if t]
+        for t in terms:
+            parent.setdefault(t, t)
+        for t in terms[1:]:
+            ra, rb = find(terms[0]), find(t)
+            if ra != rb:
+                parent[rb] = ra
+
+    groups: Dict[str, Set[str]] = {}
+    for t in parent:
+        groups.setdefault(find(t), set()).add(t)
+    return {t: frozenset(groups[find(t)]) for t in parent}
+
+
+class SynonymService:
+    def __init__(self, path: str = SYNONYMS_FILE):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._raw: Dict[str, List[str]] = {}
+        self._lookup: Dict[str, FrozenSet[str]] = {}
+        self._phrases: List[str] = []  # term nhiều từ (dò trong câu query của BM25)
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        raw: Dict[str, List[str]] = {}
+        if mtime is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    raw = {str(k): [str(v) for v in (vs or [])] for k, vs in data.items()}
+            except (OSError, ValueError) as e:
+                print(f"[synonyms] load failed: {e}")
+
+        self._raw = raw
+        self._lookup = _build_lookup(raw)
+        self._phrases = sorted((t for t in self._lookup if " " in t), key=len, reverse=True)
+        self._mtime = mtime
+
+    # ---------- đọc / ghi dạng gốc (dialog Edit Synonyms) ----------
+    def load(self) -> Dict[str, List[str]]:
+        with self._lock:
+            self._refresh()
+            return {k: list(v) for k, v in self._raw.items()}
+
+    def save(self, synonyms: Dict[str, List[str]]) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(synonyms, f, ensure_ascii=False, indent=4)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self._mtime = None  # buộc build lại ở lần dùng kế tiếp
+
+    # ---------- lookup ----------
+    def expand(self, term: str) -> FrozenSet[str]:
+        """Nhóm đồng nghĩa (lowercase) của term, luôn gồm chính term."""
+        t = _norm(term)
+        with self._lock:
+            self._refresh()
+            return self._lookup.get(t) or frozenset([t] if t else [])
+
+    def expand_all(self, terms: Iterable[str]) -> Set[str]:
+        out: Set[str] = set()
+        for t in terms:
+            out |= self.expand(t)
+        return out
+
+    def expand_text(self, text: str) -> Set[str]:
+        """Các term đồng nghĩa (kể cả cụm nhiều từ) xuất hiện trong 1 câu query, đã mở rộng."""
+        low = _norm(text)
+        with self._lock:
+            self._refresh()
+            lookup, phrases = self._lookup, self._phrases
+        out: Set[str] = set()
+        for w in low.split():
+            out |= lookup.get(w, frozenset())
+        for p in phrases:
+            if p in low:
+                out |= lookup[p]
+        return out
+
+
+_services: Dict[str, SynonymService] = {}
+_services_lock = threading.Lock()
+
+
+def get_synonym_service(path: str = SYNONYMS_FILE) -> SynonymService:
+    """1 service / file (dùng chung giữa search tên file và RAG)."""
+    key = os.path.abspath(path)
+    with _services_lock:
+        svc = _services.get(key)
+        if svc is None:
+            svc = _services[key] = SynonymService(key)
+        return svc
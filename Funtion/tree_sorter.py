@@ -1,7 +1,9 @@
 # Funtion/tree_sorter.py
 from __future__ import annotations
 
+import os
 import re
+from datetime import datetime
 from typing import Any, Tuple, Union
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QTreeWidget, QTreeWidgetItem
@@ -23,6 +25,43 @@ def _natural_key(s: str) -> Tuple[Any, ...]:
     return tuple(key)
 
 
+_DIGITS_SPLIT_RE = re.compile(r"(\d+)")
+
+
+def natural_key_str(s: str) -> str:
+    """
+    Cùng thứ tự với _natural_key nhưng là 1 string phẳng
+    -> so sánh string thuần (nhanh, sort được hàng triệu dòng) thay vì so sánh tuple.
+    Số được encode: \x01 + độ dài + chữ số (\x01 < mọi ký tự thường, giống tuple compare).
+    """
+    parts = _DIGITS_SPLIT_RE.split((s or "").lower())
+    for i in range(1, len(parts), 2):
+        digits = parts[i].lstrip("0") or "0"
+        parts[i] = f"\x01{len(digits):04d}{digits}"
+    return "".join(parts)
+
+
+def format_ts(ts: Union[int, float, None]) -> str:
+    """Timestamp -> 'YYYY-mm-dd HH:MM' (rỗng nếu không có)."""
+    if ts is None:
+        return ""
+    try:
+        return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
+    except (OverflowError, OSError, ValueError):
+        return ""
+
+
+def format_size_mb(size_bytes: Union[int, float, None]) -> str:
+    if size_bytes is None:
+        return ""
+    return f"{size_bytes / (1024 * 1024):.2f}"
+
+
+def file_type_text(name: str) -> str:
+    ext = os.path.splitext(name)[1].lower()
+    return ext[1:].upper() if ext else "FILE"
+
+
 class SortableTreeItem(QTreeWidgetItem):
     """
     QTreeWidgetItem có __lt__ dựa theo "sort key" đã set vào Qt.UserRole.
@@ -110,3 +149,18 @@ class TreeSortHelper:
         it.setData(4, Qt.UserRole, (path or "").lower())
 
         return it
+
+    def make_record_item(self, rec) -> SortableTreeItem:
+        """
+        Item từ record (name, path, size, mtime) đã stat sẵn lúc quét / lấy từ catalog
+        -> không chạm ổ đĩa khi render.
+        """
+        return self.make_item(
+            name=rec.name,
+            date_text=format_ts(rec.mtime),
+            type_text=file_type_text(rec.name),
+            size_text=format_size_mb(rec.size),
+            path=rec.path,
+            mtime_ts=rec.mtime,
+            size_bytes=rec.size,
+        )
@@ -0,0 +1,106 @@
+# Funtion/tree_walker.py
+"""
+Tree walker dùng chung cho mọi tính năng quét file (search, duplicates, list files, catalog...).
+
+- Dựa trên os.scandir: size/mtime lấy luôn từ DirEntry (Windows không tốn thêm syscall),
+  không gọi os.path.getsize / getmtime riêng cho từng file.
+- Mỗi thư mục con là 1 task trên thread pool -> ổ mạng (latency cao) được quét song song.
+- Thứ tự kết quả KHÔNG cố định (thư mục nào xong trước trả trước).
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+
+WALK_THREADS = int(os.environ.get("WALK_THREADS", "16"))
+
+T = TypeVar("T")
+
+
+class FileRecord(NamedTuple):
+    name: str
+    path: str
+    size: int
+    mtime: float
+
+    @property
+    def ext(self) -> str:
+        return os.path.splitext(self.name)[1].lower()
+
+
+class DirListing(NamedTuple):
+    path: str
+    files: List[FileRecord]
+    subdirs: List[str]
+
+
+def scan_dir(path: str) -> DirListing:
+    """List 1 thư mục (không đệ quy). Entry lỗi quyền / bị xoá giữa chừng thì bỏ qua."""
+    files: List[FileRecord] = []
+    subdirs: List[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files.append(FileRecord(entry.name, entry.path, st.st_size, st.st_mtime))
+            except OSError:
+                continue
+    return DirListing(path, files, subdirs)
+
+
+def parallel_visit(
+    roots: Iterable[str],
+    visit: Callable[[str], Tuple[Optional[T], Iterable[str]]],
+    max_workers: Optional[int] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> Iterator[T]:
+    """
+    Duyệt cây thư mục song song.
+    visit(dir) -> (result, next_dirs): result != None sẽ được yield,
+    next_dirs được đưa vào pool. visit raise OSError => bỏ qua nhánh đó.
+    """
+    ex = ThreadPoolExecutor(max_workers=max_workers or WALK_THREADS)
+    try:
+        pending = {ex.submit(visit, r) for r in roots}
+        while pending:
+            if cancel_cb and cancel_cb():
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result, next_dirs = fut.result()
+                except OSError:
+                    continue
+                for d in next_dirs:
+                    pending.add(ex.submit(visit, d))
+                if result is not None:
+                    yield result
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+def walk_dirs(
+    root: str,
+    max_workers: Optional[int] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> Iterator[DirListing]:
+    """Yield DirListing của mọi thư mục dưới root (kể cả root)."""
+    def visit(d: str):
+        listing = scan_dir(d)
+        return listing, listing.subdirs
+
+    return parallel_visit([root], visit, max_workers=max_workers, cancel_cb=cancel_cb)
+
+
+def walk_files(
+    root: str,
+    max_workers: Optional[int] = None,
+    cancel_cb: Optional[Callable[[], bool]] = None,
+) -> Iterator[FileRecord]:
+    """Yield FileRecord (name, path, size, mtime) của mọi file dưới root."""
+    for listing in walk_dirs(root, max_workers=max_workers, cancel_cb=cancel_cb):
+        yield from listing.files
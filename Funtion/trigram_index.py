@@ -0,0 +1,85 @@
+# Funtion/trigram_index.py
+"""
+Trigram index trên tên file (SQLite FTS5, tokenizer 'trigram').
+
+- Bảng ảo files_tri đồng bộ với bảng files bằng trigger -> cập nhật incremental,
+  lưu luôn trong file catalog (không phải build lại mỗi lần mở app).
+- Query "pump*vacuum%rev.0" => các mảnh literal của phần include ("pump", "vacuum")
+  được AND trên posting list để ra tập ứng viên, regex chỉ chạy trên tập đó.
+- Mảnh < 3 ký tự hoặc có ký tự non-ASCII không dùng để lọc (tránh lệch case-fold
+  giữa SQLite và Python) -> vẫn được regex kiểm tra sau.
+- SQLite không có FTS5/trigram => trả None, caller quét toàn bộ như cũ.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable, List, Optional, Set
+
+from Funtion.percent_exclude_search import parse_percent_query
+
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE files_tri USING fts5(
+    name, content='files', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_tri_ai AFTER INSERT ON files BEGIN
+    INSERT INTO files_tri(rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_tri_ad AFTER DELETE ON files BEGIN
+    INSERT INTO files_tri(files_tri, rowid, name) VALUES ('delete', old.rowid, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_tri_au AFTER UPDATE ON files BEGIN
+    INSERT INTO files_tri(files_tri, rowid, name) VALUES ('delete', old.rowid, old.name);
+    INSERT INTO files_tri(rowid, name) VALUES (new.rowid, new.name);
+END;
+"""
+
+
+def ensure_trigram_index(conn: sqlite3.Connection) -> bool:
+    """Tạo (1 lần) + rebuild index cho dữ liệu sẵn có. False nếu SQLite không hỗ trợ."""
+    # INSERT OR REPLACE xoá dòng cũ: trigger delete chỉ chạy khi bật recursive_triggers
+    conn.execute("PRAGMA recursive_triggers=ON")
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_tri'"
+    ).fetchone()
+    if exists:
+        return True
+
+    try:
+        conn.executescript(_TRIGRAM_SCHEMA)
+        conn.execute("INSERT INTO files_tri(files_tri) VALUES ('rebuild')")
+        conn.commit()
+        return True
+    except sqlite3.OperationalError as e:
+        print(f"[trigram] disabled: {e}")
+        conn.rollback()
+        return False
+
+
+def literal_fragments(keyword: str) -> List[str]:
+    """Các mảnh literal BẮT BUỘC có trong tên file khớp query (chỉ phần include của A%B)."""
+    q = parse_percent_query(keyword)
+    if q is not None:
+        keyword = q.include_raw
+    return [p.strip() for p in keyword.split("*") if p.strip()]
+
+
+def match_expression(fragments: Iterable[str]) -> Optional[str]:
+    """Biểu thức MATCH dạng '"a" AND "b"' hoặc None nếu không mảnh nào lọc được."""
+    usable = [f for f in fragments if len(f) >= 3 and f.isascii()]
+    if not usable:
+        return None
+    return " AND ".join('"' + f.replace('"', '""') + '"' for f in usable)
+
+
+def trigram_candidates(conn: sqlite3.Connection, fragments: Iterable[str]) -> Optional[Set[int]]:
+    """rowid của các file chứa mọi mảnh. None = không thu hẹp được (phải quét toàn bộ)."""
+    expr = match_expression(fragments)
+    if expr is None:
+        return None
+    try:
+        rows = conn.execute("SELECT rowid FROM files_tri WHERE files_tri MATCH ?", (expr,))
+        return {r[0] for r in rows}
+    except sqlite3.OperationalError as e:
+        print(f"[trigram] query failed: {e}")
+        return None
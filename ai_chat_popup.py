@@ -18,6 +18,7 @@ import re
 # - vector_retriever.py
 # - llm_client.py
 from vector_retriever import VectorRetriever
+from Funtion.rag_metastore import metadata_exists
 from llm_client import create_llm_client, PROVIDERS
 from llm_config import load_llm_config, save_llm_config, get_config_path
 from hud_widgets import HudPanel
@@ -508,8 +509,8 @@ QPushButton:pressed { background: rgba(0,0,0,0.14); }
             self.on_llm_changed()
 
     def _is_valid_store(self, folder: str) -> bool:
-        required = ["index.faiss", "metadata.json", "base_path.txt"]
-        return all(os.path.exists(os.path.join(folder, f)) for f in required)
+        required = ["index.faiss", "base_path.txt"]
+        return all(os.path.exists(os.path.join(folder, f)) for f in required) and metadata_exists(folder)
 
     def _init_store(self, folder: str):
         self.store_dir = folder
@@ -528,7 +529,7 @@ QPushButton:pressed { background: rgba(0,0,0,0.14); }
                 self,
                 "Invalid Vector Store",
                 "Bạn chọn sai folder.\n\nFolder đúng phải chứa:\n"
-                "- index.faiss\n- metadata.json\n- base_path.txt"
+                "- index.faiss\n- metastore.json (hoặc metadata.json)\n- base_path.txt"
             )
             return
 
@@ -1,5 +1,5 @@
 # vector_retriever.py
-import os, json
+import os
 import numpy as np
 import faiss
 import torch
@@ -9,6 +9,9 @@ import math
 import re
 from collections import Counter, defaultdict
 
+from Funtion.synonyms import get_synonym_service
+from Funtion.rag_metastore import count_deleted, is_deleted, iter_texts, load_metadata
+
 # --- reranker (CrossEncoder) optional
 try:
     from sentence_transformers import CrossEncoder
@@ -80,8 +83,11 @@ class VectorRetriever:
         self.store_dir = store_dir
         self.index = faiss.read_index(os.path.join(store_dir, "index.faiss"))
 
-        with open(os.path.join(store_dir, "metadata.json"), "r", encoding="utf-8") as f:
-            self.meta = json.load(f)
+        # dạng cột (mmap, text đọc lazy theo chunk) hoặc metadata.json cũ
+        self.meta = load_metadata(store_dir)
+
+        # chunk đã xoá bởi sync_vector_store (tombstone); HNSW vẫn còn vector của chúng
+        self.n_deleted = count_deleted(self.meta)
 
         with open(os.path.join(store_dir, "base_path.txt"), "r", encoding="utf-8") as f:
             self.base_path = f.read().strip()
@@ -96,6 +102,9 @@ class VectorRetriever:
         # BM25 lazy init
         self._bm25 = None
 
+        # mở rộng query BM25 bằng synonyms.json (dùng chung với search tên file)
+        self.bm25_synonyms = os.environ.get("RAG_BM25_SYNONYMS", "1") == "1"
+
         # Reranker lazy init
         self._reranker = None
         self.enable_rerank = os.environ.get("RAG_ENABLE_RERANK", "1") == "1"
@@ -113,9 +122,16 @@ class VectorRetriever:
     def _ensure_bm25(self):
         if self._bm25 is not None:
             return
-        docs = [tokenize(m.get("text", "")) for m in self.meta]
+        docs = [tokenize(t) for t in iter_texts(self.meta)]
         self._bm25 = BM25Mini(docs)
 
+    def _bm25_query(self, query: str) -> str:
+        """Query + các từ đồng nghĩa (chỉ cho BM25; dense / rerank vẫn dùng query gốc)."""
+        if not self.bm25_synonyms:
+            return query
+        extra = get_synonym_service().expand_text(query)
+        return " ".join([query, *sorted(extra)]) if extra else query
+
     def _ensure_reranker(self):
         if not self.enable_rerank:
             return
@@ -166,10 +182,16 @@ class VectorRetriever:
         # ---- 1) Dense search
         qv = self.model.encode([query], normalize_embeddings=True)
         qv = np.asarray(qv, dtype="float32")
-        D, I = self.index.search(qv, candidate_k)
+        # store có tombstone -> lấy dư rồi bỏ chunk đã xoá
+        fetch_k = candidate_k * 2 if self.n_deleted else candidate_k
+        D, I = self.index.search(qv, fetch_k)
 
-        dense_ids = [int(x) for x in I[0] if int(x) >= 0]
-        dense_scores = [float(x) for x in D[0][:len(dense_ids)]]
+        dense = [
+            (int(i), float(d)) for d, i in zip(D[0], I[0])
+            if int(i) >= 0 and not is_deleted(self.meta, int(i))
+        ][:candidate_k]
+        dense_ids = [i for i, _ in dense]
+        dense_scores = [d for _, d in dense]
 
         dense_norm = self._minmax_norm(dense_scores)
 
@@ -181,7 +203,7 @@ class VectorRetriever:
         cand_bm25 = {}
         if use_hybrid:
             self._ensure_bm25()
-            bm = self._bm25.topk(query, k=candidate_k)
+            bm = self._bm25.topk(self._bm25_query(query), k=candidate_k)
             if bm:
                 bm_scores = [float(x[1]) for x in bm]
                 bm_max = max(bm_scores) if max(bm_scores) > 0 else 1.0
@@ -2,21 +2,35 @@
 import os
 import re
 import json
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Callable, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import faiss
 import torch
 from sentence_transformers import SentenceTransformer
 from Funtion.rag_dedup import (
-    build_existing_filenames,
     is_duplicate_filename,
-    build_existing_chunk_hashes,
+    build_chunk_hashes,
     should_skip_file_by_dup_ratio,
 )
 from Funtion.rag_dedup import sha1_text, norm_for_hash
+from Funtion.tree_walker import walk_files
+from Funtion.parallel_extract import iter_extracted
+from Funtion.embedding_cache import EmbeddingCache, cache_for_store, encode_cached
+from Funtion.rag_metastore import (
+    MetadataWriter,
+    count_deleted,
+    is_deleted,
+    iter_files,
+    iter_texts,
+    load_metadata,
+    metadata_exists,
+)
 
 
 @dataclass
@@ -183,6 +197,239 @@ def chunk_text(text: str, chunk_size: int = 900, overlap: int = 150) -> List[str
     return chunks
 
 
+DEFAULT_ALLOWED_EXT = {
+    ".pdf", ".docx", ".xlsx", ".pptx", ".txt",
+    ".csv", ".md", ".html", ".json", ".xml"
+}
+
+
+# ---------- pipeline: extract -> chunk -> encode -> index.add chạy chồng lên nhau ----------
+_PIPE_DONE = object()
+PIPELINE_QUEUE_BATCHES = int(os.environ.get("RAG_PIPELINE_QUEUE_BATCHES", "4"))  # số micro-batch chờ encode tối đa
+
+
+def _queue_put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """put có backpressure nhưng không kẹt mãi khi phía nhận đã dừng (lỗi / huỷ)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_get(q: queue.Queue, stop: threading.Event):
+    """get chờ dữ liệu; tầng khác đã dừng (stop) => coi như hết (_PIPE_DONE)."""
+    while True:
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            if stop.is_set():
+                return _PIPE_DONE
+
+
+def _file_chunk_metas(
+    file_path: str,
+    raw: str,
+    rel_path: str,
+    source_folder: str,
+    chunk_size: int,
+    min_chunk_len: int,
+    created_at: float,
+) -> List[ChunkMeta]:
+    """Chunk 1 file -> ChunkMeta (id = -1, gán khi vào index)."""
+    text = normalize_text(raw)
+    if not text:
+        return []
+    stat = os.stat(file_path)
+    name = os.path.basename(file_path)
+    ext = os.path.splitext(file_path)[1].lower()
+
+    chunks = chunk_text_sop(text, target_chars=chunk_size, hard_max=chunk_size + 400)
+
+    out: List[ChunkMeta] = []
+    for cid, obj in enumerate(chunks):
+        ch = (obj.get("text") or "").strip()
+        if len(ch) < min_chunk_len:
+            continue
+        out.append(ChunkMeta(
+            id=-1,
+            file_name=name,
+            rel_path=rel_path,
+            abs_path=file_path,
+            file_type=ext.lstrip("."),
+            source_folder=source_folder,
+            chunk_id=cid,
+            chunk_len=len(ch),
+            mtime=float(stat.st_mtime),
+            size_kb=int(stat.st_size / 1024),
+            created_at=float(created_at),
+            section=(obj.get("section") or ""),
+            subsection=(obj.get("subsection") or ""),
+            text=ch,
+        ))
+    return out
+
+
+def _new_index(dim: int, use_hnsw: Optional[bool] = None):
+    # ---- FAISS index: HNSW by default (scale-friendly) ----
+    if use_hnsw is None:
+        use_hnsw = os.environ.get("RAG_INDEX", "hnsw").lower() == "hnsw"
+    if use_hnsw:
+        M = int(os.environ.get("RAG_HNSW_M", "32"))
+        index = faiss.IndexHNSWFlat(dim, M)
+        index.hnsw.efConstruction = int(os.environ.get("RAG_EF_CONSTRUCT", "200"))
+    else:
+        index = faiss.IndexFlatIP(dim)
+    return index, use_hnsw
+
+
+def _run_build_pipeline(
+    files: List[str],
+    rel_path_fn: Callable[[str], str],
+    source_folder: str,
+    extract_content_fn: Callable[[str], str],
+    model_name: str,
+    chunk_size: int,
+    min_chunk_len: int,
+    batch_size: int,
+    created_at: float,
+    writer: MetadataWriter,
+    progress_cb: Optional[Callable[[int], None]] = None,
+    cache: Optional[EmbeddingCache] = None,
+):
+    """
+    Các tầng chạy đồng thời, nối bằng queue có giới hạn (backpressure, RAM không phình theo corpus):
+      - load model          : thread riêng, song song với extract ngay từ đầu
+      - extract + chunk     : thread "chunker" (extract trên process con qua iter_extracted)
+      - encode micro-batch  : thread gọi hàm này (GPU / torch nhả GIL); chunk đã có trong
+                              cache (Funtion.embedding_cache) không encode lại
+      - index.add           : thread "adder" (faiss nhả GIL)
+    Metadata (kèm text chunk) ghi dần vào writer sau mỗi micro-batch, không giữ lại trong RAM.
+    Trả về (index, n_chunks, dim, use_hnsw, manifest_files).
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-model")
+    model_future = loader.submit(SentenceTransformer, model_name, device=device)
+    loader.shutdown(wait=False)
+
+    total = len(files)
+    chunk_q: queue.Queue = queue.Queue(maxsize=batch_size * PIPELINE_QUEUE_BATCHES)
+    vec_q: queue.Queue = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    manifest_files: List[dict] = []  # mọi file đã đọc (kể cả file không ra chunk) -> sync không đọc lại
+
+    def chunker():
+        extracted = iter_extracted(files, extract_content_fn)
+        try:
+            for i, (file_path, raw) in enumerate(extracted, start=1):
+                try:
+                    metas = _file_chunk_metas(
+                        file_path, raw, rel_path_fn(file_path), source_folder,
+                        chunk_size, min_chunk_len, created_at,
+                    )
+                except OSError as e:
+                    print(f"[build] skip {file_path}: {e}")  # file bị xoá / khoá sau khi extract
+                    metas = []
+                for meta in metas:
+                    if not _queue_put(chunk_q, meta, stop):
+                        return
+                entry = _manifest_entry(file_path)
+                if entry:
+                    manifest_files.append(entry)
+                if progress_cb:
+                    progress_cb(int(i * 80 / total))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            extracted.close()
+            _queue_put(chunk_q, _PIPE_DONE, stop)
+
+    chunk_thread = threading.Thread(target=chunker, name="rag-chunker", daemon=True)
+    chunk_thread.start()
+
+    adder_thread = None
+    n_chunks = 0
+    try:
+        model = model_future.result()
+
+        print("cuda_available:", torch.cuda.is_available())
+        if torch.cuda.is_available():
+            print("gpu:", torch.cuda.get_device_name(0))
+        print("model_device:", getattr(model, "device", None))
+
+        dim = int(model.get_sentence_embedding_dimension())
+        index, use_hnsw = _new_index(dim)
+
+        def adder():
+            try:
+                while True:
+                    vecs = _queue_get(vec_q, stop)
+                    if vecs is _PIPE_DONE:
+                        return
+                    index.add(vecs)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        adder_thread = threading.Thread(target=adder, name="rag-index-add", daemon=True)
+        adder_thread.start()
+
+        finished = False
+        while not finished and not errors:
+            batch: List[ChunkMeta] = []
+            while len(batch) < batch_size:
+                item = _queue_get(chunk_q, stop)
+                if item is _PIPE_DONE:
+                    finished = True
+                    break
+                batch.append(item)
+            if not batch:
+                continue
+
+            vecs = encode_cached(model, model_name, [m.text for m in batch], cache, batch_size)
+            for j, m in enumerate(batch):
+                m.id = n_chunks + j
+            writer.extend(m.__dict__ for m in batch)
+            n_chunks += len(batch)
+            if not _queue_put(vec_q, vecs, stop):
+                break
+
+        _queue_put(vec_q, _PIPE_DONE, stop)
+        adder_thread.join()
+    finally:
+        stop.set()  # tầng còn chạy (lỗi / thoát sớm) tự dừng ở lần put kế tiếp
+        chunk_thread.join()
+        if adder_thread is not None:
+            adder_thread.join()
+
+    if errors:
+        raise errors[0]
+    return index, n_chunks, dim, use_hnsw, manifest_files
+
+
+def _write_store(
+    output_dir: str, index, writer: MetadataWriter, base_path: str, cfg: dict, manifest_files: List[dict]
+) -> None:
+    # Save files: index.faiss, metadata (Funtion.rag_metastore), base_path.txt, index_config.json, manifest.json
+    faiss.write_index(index, os.path.join(output_dir, "index.faiss"))
+
+    writer.commit()  # metadata đã ghi dần trong pipeline -> chỉ đổi con trỏ
+
+    # ✅ cái này để validator của anh không báo lỗi
+    with open(os.path.join(output_dir, "base_path.txt"), "w", encoding="utf-8") as f:
+        f.write(base_path)
+
+    # Save index contract (to avoid model mismatch later)
+    with open(os.path.join(output_dir, "index_config.json"), "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False, indent=2)
+
+    # file nào đã học (path, mtime, size) -> append bỏ qua file cũ, sync biết file nào đổi / mất
+    _save_json_atomic(os.path.join(output_dir, "manifest.json"), {"files": manifest_files})
+
+
 def build_vector_store(
     folder_path: str,
     extract_content_fn: Callable[[str], str],
@@ -200,140 +447,61 @@ def build_vector_store(
     os.environ["MKL_NUM_THREADS"] = str(CPU_THREADS)
 
     if allowed_ext is None:
-        allowed_ext = {
-            ".pdf", ".docx", ".xlsx", ".pptx", ".txt",
-            ".csv", ".md", ".html", ".json", ".xml"
-        }
+        allowed_ext = DEFAULT_ALLOWED_EXT
 
-    files = []
-    for root, _, fnames in os.walk(folder_path):
-        for fn in fnames:
-            ext = os.path.splitext(fn)[1].lower()
-            if ext in allowed_ext:
-                files.append(os.path.join(root, fn))
+    files = sorted(rec.path for rec in walk_files(folder_path) if rec.ext in allowed_ext)
 
     if not files:
         raise RuntimeError("No supported files found.")
 
     os.makedirs(output_dir, exist_ok=True)
 
-    metas: List[ChunkMeta] = []
-    total = len(files)
-    next_id = 0
     created_at = time.time()
     source_folder = os.path.basename(folder_path.rstrip(os.sep))
 
     MIN_CHUNK_LEN = int(os.environ.get("RAG_MIN_CHUNK_LEN", "80"))
-
-    for i, file_path in enumerate(files, start=1):
-        stat = os.stat(file_path)
-        name = os.path.basename(file_path)
-        ext = os.path.splitext(file_path)[1].lower()
-        rel_path = os.path.relpath(file_path, folder_path)
-
-        try:
-            raw = extract_content_fn(file_path)
-        except Exception:
-            raw = ""  # skip noisy error text
-
-        text = normalize_text(raw)
-        if not text:
-            continue
-
-        chunks = chunk_text_sop(text, target_chars=chunk_size, hard_max=chunk_size + 400)
-
-
-
-        for cid, obj in enumerate(chunks):
-            ch = (obj.get("text") or "").strip()
-            if len(ch) < MIN_CHUNK_LEN:
-                continue
-
-            metas.append(ChunkMeta(
-                id=next_id,
-                file_name=name,
-                rel_path=rel_path,
-                abs_path=file_path,
-                file_type=ext.lstrip("."),
-                source_folder=source_folder,
-                chunk_id=cid,
-                chunk_len=len(ch),
-                mtime=float(stat.st_mtime),
-                size_kb=int(stat.st_size / 1024),
-                created_at=float(created_at),
-                section=(obj.get("section") or ""),
-                subsection=(obj.get("subsection") or ""),
-                text=ch,
-            ))
-            next_id += 1
-
-
-
-        if progress_cb:
-            progress_cb(int(i * 60 / total))
-
-    if not metas:
-        raise RuntimeError("No chunks created.")
-
-    # ---- Embedding (use RTX 4060 if available) ----
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer(model_name, device=device)
-
-    print("cuda_available:", torch.cuda.is_available())
-    if torch.cuda.is_available():
-        print("gpu:", torch.cuda.get_device_name(0))
-    print("model_device:", getattr(model, "device", None))
-
-    texts = [m.text for m in metas]
-
     batch_size = int(os.environ.get("RAG_BATCH_SIZE", "128"))  # 4060 + 32GB thường ok
-    vectors = model.encode(
-        texts,
-        batch_size=batch_size,
-        show_progress_bar=True,
-        normalize_embeddings=True
-    )
-    vectors = np.asarray(vectors, dtype="float32")
-    dim = vectors.shape[1]
-
-    # ---- FAISS index: HNSW by default (scale-friendly) ----
-    use_hnsw = os.environ.get("RAG_INDEX", "hnsw").lower() == "hnsw"
-    if use_hnsw:
-        M = int(os.environ.get("RAG_HNSW_M", "32"))
-        index = faiss.IndexHNSWFlat(dim, M)
-        index.hnsw.efConstruction = int(os.environ.get("RAG_EF_CONSTRUCT", "200"))
-        index.add(vectors)
-    else:
-        index = faiss.IndexFlatIP(dim)
-        index.add(vectors)
-
-    if progress_cb:
-        progress_cb(85)
-
-    # Save files
-    faiss.write_index(index, os.path.join(output_dir, "index.faiss"))
-
-    with open(os.path.join(output_dir, "metadata.json"), "w", encoding="utf-8") as f:
-        json.dump([m.__dict__ for m in metas], f, ensure_ascii=False, indent=2)
 
-    with open(os.path.join(output_dir, "base_path.txt"), "w", encoding="utf-8") as f:
-        f.write(folder_path)
+    # ---- extract / chunk / embed (RTX 4060 nếu có) / index.add chạy chồng lên nhau ----
+    writer = MetadataWriter(output_dir)
+    try:
+        index, n_chunks, dim, use_hnsw, manifest_files = _run_build_pipeline(
+            files,
+            rel_path_fn=lambda fp: os.path.relpath(fp, folder_path),
+            source_folder=source_folder,
+            extract_content_fn=extract_content_fn,
+            model_name=model_name,
+            chunk_size=chunk_size,
+            min_chunk_len=MIN_CHUNK_LEN,
+            batch_size=batch_size,
+            created_at=created_at,
+            writer=writer,
+            progress_cb=progress_cb,
+            cache=cache_for_store(output_dir),
+        )
+        if not n_chunks:
+            raise RuntimeError("No chunks created.")
 
-    # Save index contract (to avoid model mismatch later)
-    cfg = {
-        "model_name": model_name,
-        "normalize_embeddings": True,
-        "index_type": "HNSW" if use_hnsw else "FlatIP",
-        "dim": int(dim),
-        "chunk_size": int(chunk_size),
-        "overlap": int(overlap),
-        "batch_size": int(batch_size),
-        "cpu_threads": int(CPU_THREADS),
-        "created_at": created_at,
-        "min_chunk_len": int(MIN_CHUNK_LEN),
-    }
-    with open(os.path.join(output_dir, "index_config.json"), "w", encoding="utf-8") as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
+        if progress_cb:
+            progress_cb(85)
+
+        cfg = {
+            "model_name": model_name,
+            "normalize_embeddings": True,
+            "index_type": "HNSW" if use_hnsw else "FlatIP",
+            "dim": int(dim),
+            "chunk_size": int(chunk_size),
+            "overlap": int(overlap),
+            "batch_size": int(batch_size),
+            "cpu_threads": int(CPU_THREADS),
+            "created_at": created_at,
+            "min_chunk_len": int(MIN_CHUNK_LEN),
+            "source": "folder",
+        }
+        _write_store(output_dir, index, writer, folder_path, cfg, manifest_files)
+    except BaseException:
+        writer.abort()  # bỏ meta-<gen>/ dở dang, store cũ (nếu có) giữ nguyên
+        raise
 
     if progress_cb:
         progress_cb(100)
@@ -356,10 +524,7 @@ def build_vector_store_from_files(
     os.environ["MKL_NUM_THREADS"] = str(CPU_THREADS)
 
     if allowed_ext is None:
-        allowed_ext = {
-            ".pdf", ".docx", ".xlsx", ".pptx", ".txt",
-            ".csv", ".md", ".html", ".json", ".xml"
-        }
+        allowed_ext = DEFAULT_ALLOWED_EXT
 
     # lọc + chuẩn hoá file
     files: List[str] = []
@@ -384,126 +549,73 @@ def build_vector_store_from_files(
     except Exception:
         common_root = os.path.dirname(files[0])
 
-    metas: List[ChunkMeta] = []
-    total = len(files)
-    next_id = 0
     created_at = time.time()
     source_folder = os.path.basename(common_root.rstrip(os.sep)) or "picked_files"
 
     MIN_CHUNK_LEN = int(os.environ.get("RAG_MIN_CHUNK_LEN", "80"))
+    batch_size = int(os.environ.get("RAG_BATCH_SIZE", "128"))
 
-    for i, file_path in enumerate(files, start=1):
-        stat = os.stat(file_path)
-        name = os.path.basename(file_path)
-        ext = os.path.splitext(file_path)[1].lower()
-
+    def rel_path_fn(file_path: str) -> str:
         # rel_path theo common_root
         try:
-            rel_path = os.path.relpath(file_path, common_root)
+            return os.path.relpath(file_path, common_root)
         except Exception:
-            rel_path = name
-
-        try:
-            raw = extract_content_fn(file_path)
-        except Exception:
-            raw = ""
-
-        text = normalize_text(raw)
-        if not text:
-            if progress_cb:
-                progress_cb(int(i * 60 / total))
-            continue
-
-        chunks = chunk_text_sop(text, target_chars=chunk_size, hard_max=chunk_size + 400)
-
-        for cid, obj in enumerate(chunks):
-            ch = (obj.get("text") or "").strip()
-            if len(ch) < MIN_CHUNK_LEN:
-                continue
+            return os.path.basename(file_path)
 
-            metas.append(ChunkMeta(
-                id=next_id,
-                file_name=name,
-                rel_path=rel_path,
-                abs_path=file_path,
-                file_type=ext.lstrip("."),
-                source_folder=source_folder,
-                chunk_id=cid,
-                chunk_len=len(ch),
-                mtime=float(stat.st_mtime),
-                size_kb=int(stat.st_size / 1024),
-                created_at=float(created_at),
-                section=(obj.get("section") or ""),
-                subsection=(obj.get("subsection") or ""),
-                text=ch,
-            ))
-            next_id += 1
+    # ---- pipeline (giữ giống build_vector_store) ----
+    writer = MetadataWriter(output_dir)
+    try:
+        index, n_chunks, dim, use_hnsw, manifest_files = _run_build_pipeline(
+            files,
+            rel_path_fn=rel_path_fn,
+            source_folder=source_folder,
+            extract_content_fn=extract_content_fn,
+            model_name=model_name,
+            chunk_size=chunk_size,
+            min_chunk_len=MIN_CHUNK_LEN,
+            batch_size=batch_size,
+            created_at=created_at,
+            writer=writer,
+            progress_cb=progress_cb,
+            cache=cache_for_store(output_dir),
+        )
+        if not n_chunks:
+            raise RuntimeError("No chunks created.")
 
         if progress_cb:
-            progress_cb(int(i * 60 / total))
-
-    if not metas:
-        raise RuntimeError("No chunks created.")
-
-    # ---- Embedding (giữ giống build_vector_store) ----
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = SentenceTransformer(model_name, device=device)
-
-    texts = [m.text for m in metas]
-    batch_size = int(os.environ.get("RAG_BATCH_SIZE", "128"))
-    vectors = model.encode(
-        texts,
-        batch_size=batch_size,
-        show_progress_bar=True,
-        normalize_embeddings=True
-    )
-    vectors = np.asarray(vectors, dtype="float32")
-    dim = vectors.shape[1]
-
-    # ---- FAISS index (giữ giống build_vector_store) ----
-    use_hnsw = os.environ.get("RAG_INDEX", "hnsw").lower() == "hnsw"
-    if use_hnsw:
-        M = int(os.environ.get("RAG_HNSW_M", "32"))
-        index = faiss.IndexHNSWFlat(dim, M)
-        index.hnsw.efConstruction = int(os.environ.get("RAG_EF_CONSTRUCT", "200"))
-        index.add(vectors)
-    else:
-        index = faiss.IndexFlatIP(dim)
-        index.add(vectors)
-
-    if progress_cb:
-        progress_cb(85)
-
-    # ---- Save files: index.faiss, metadata.json, base_path.txt, index_config.json ----
-    faiss.write_index(index, os.path.join(output_dir, "index.faiss"))
-
-    with open(os.path.join(output_dir, "metadata.json"), "w", encoding="utf-8") as f:
-        json.dump([m.__dict__ for m in metas], f, ensure_ascii=False, indent=2)
-
-    # ✅ cái này để validator của anh không báo lỗi
-    with open(os.path.join(output_dir, "base_path.txt"), "w", encoding="utf-8") as f:
-        f.write(common_root)
-
-    cfg = {
-        "model_name": model_name,
-        "normalize_embeddings": True,
-        "index_type": "HNSW" if use_hnsw else "FlatIP",
-        "dim": int(dim),
-        "chunk_size": int(chunk_size),
-        "overlap": int(overlap),
-        "batch_size": int(batch_size),
-        "cpu_threads": int(CPU_THREADS),
-        "created_at": created_at,
-        "min_chunk_len": int(MIN_CHUNK_LEN),
-    }
-    with open(os.path.join(output_dir, "index_config.json"), "w", encoding="utf-8") as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
+            progress_cb(85)
+
+        cfg = {
+            "model_name": model_name,
+            "normalize_embeddings": True,
+            "index_type": "HNSW" if use_hnsw else "FlatIP",
+            "dim": int(dim),
+            "chunk_size": int(chunk_size),
+            "overlap": int(overlap),
+            "batch_size": int(batch_size),
+            "cpu_threads": int(CPU_THREADS),
+            "created_at": created_at,
+            "min_chunk_len": int(MIN_CHUNK_LEN),
+            "source": "files",  # sync chỉ cập nhật / xoá các file này, không quét thêm common_root
+        }
+        # base_path = common_root (để validator + rel_path consistent)
+        _write_store(output_dir, index, writer, common_root, cfg, manifest_files)
+    except BaseException:
+        writer.abort()  # bỏ meta-<gen>/ dở dang, store cũ (nếu có) giữ nguyên
+        raise
 
     if progress_cb:
         progress_cb(100)
 
     return output_dir
 
+def _manifest_entry(file_path: str) -> Optional[dict]:
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return {"path": os.path.abspath(file_path), "mtime": int(st.st_mtime), "size": int(st.st_size)}
+
 def _load_manifest(store_dir: str) -> dict:
     p = os.path.join(store_dir, "manifest.json")
     if os.path.exists(p):
@@ -528,17 +640,16 @@ def append_vector_store(
 ) -> int:
     """
     Append documents to an existing store_dir:
-    Required: index.faiss, metadata.json, index_config.json
-    Writes/Updates: index.faiss, metadata.json, manifest.json
+    Required: index.faiss, metadata (dạng cột hoặc metadata.json cũ), index_config.json
+    Writes/Updates: index.faiss, metadata, manifest.json
     Returns: added_chunks
     """
     index_path = os.path.join(store_dir, "index.faiss")
-    meta_path  = os.path.join(store_dir, "metadata.json")
     cfg_path   = os.path.join(store_dir, "index_config.json")
     base_path  = os.path.join(store_dir, "base_path.txt")
 
-    if not (os.path.exists(index_path) and os.path.exists(meta_path) and os.path.exists(cfg_path)):
-        raise FileNotFoundError("Store thiếu index.faiss / metadata.json / index_config.json")
+    if not (os.path.exists(index_path) and metadata_exists(store_dir) and os.path.exists(cfg_path)):
+        raise FileNotFoundError("Store thiếu index.faiss / metadata / index_config.json")
 
     with open(cfg_path, "r", encoding="utf-8") as f:
         cfg = json.load(f)
@@ -550,19 +661,11 @@ def append_vector_store(
 
     # load index + metadata
     index = faiss.read_index(index_path)
-    with open(meta_path, "r", encoding="utf-8") as f:
-        metas_raw = json.load(f)  # list[dict]
-    existing_names = build_existing_filenames(metas_raw)          # trùng TÊN FILE
-    existing_hashes = build_existing_chunk_hashes(metas_raw)      # trùng NỘI DUNG (chunk)
-
-    # next_id = max existing id + 1
-    max_id = -1
-    for m in metas_raw:
-        try:
-            max_id = max(max_id, int(m.get("id", -1)))
-        except Exception:
-            pass
-    next_id = max_id + 1
+    store_meta = load_metadata(store_dir)  # MetaStore: mmap, chỉ đọc text để hash
+    existing_hashes = build_chunk_hashes(iter_texts(store_meta))      # trùng NỘI DUNG (chunk)
+
+    # id = vị trí trong metadata (retriever tra self.meta[idx]; tombstone của sync vẫn giữ chỗ)
+    next_id = len(store_meta)
 
     # dedup by manifest
     manifest = _load_manifest(store_dir)
@@ -611,13 +714,15 @@ def append_vector_store(
     MIN_CHUNK_LEN = int(os.environ.get("RAG_MIN_CHUNK_LEN", str(cfg.get("min_chunk_len", 80))))
 
     source_folder = os.path.basename((folder_path or "").rstrip(os.sep)) if folder_path else ""
+    cache = cache_for_store(store_dir)  # dùng chung với build / các store khác
 
     added_chunks = 0
     new_meta_dicts = []
     new_manifest = []
 
     total = len(new_files)
-    for i, file_path in enumerate(new_files, start=1):
+    # extract song song trên process con (giữ giống build_vector_store)
+    for i, (file_path, raw) in enumerate(iter_extracted(new_files, extract_content_fn), start=1):
         if progress_cb:
             progress_cb(int((i - 1) * 80 / max(total, 1)))
 
@@ -634,11 +739,6 @@ def append_vector_store(
         else:
             rel_path = name
 
-        try:
-            raw = extract_content_fn(file_path)
-        except Exception:
-            raw = ""
-
         text = normalize_text(raw)
         if not text:
             continue
@@ -652,7 +752,7 @@ def append_vector_store(
                 continue
 
             meta = ChunkMeta(
-                id=next_id,
+                id=-1,  # gán khi thật sự thêm vào index (sau dedup)
                 file_name=name,
                 rel_path=rel_path,
                 abs_path=file_path,
@@ -668,7 +768,6 @@ def append_vector_store(
                 text=ch,
             ).__dict__
 
-            next_id += 1
             pairs.append((ch, meta))
 
         if not pairs:
@@ -698,14 +797,11 @@ def append_vector_store(
         texts_to_add = [p[0] for p in unique_pairs]
         metas_to_add = [p[1] for p in unique_pairs]
 
-        vecs = model.encode(
-            texts_to_add,
-            batch_size=batch_size,
-            show_progress_bar=False,
-            normalize_embeddings=True
-        )
-        vecs = np.asarray(vecs, dtype="float32")
-        index.add(vecs)
+        vecs = encode_cached(model, model_name, texts_to_add, cache, batch_size)
+        _index_add(index, vecs, next_id)
+        for meta in metas_to_add:
+            meta["id"] = next_id
+            next_id += 1
 
         new_meta_dicts.extend(metas_to_add)
         added_chunks += len(metas_to_add)
@@ -719,14 +815,15 @@ def append_vector_store(
 
     # save
     if added_chunks > 0:
-        metas_raw.extend(new_meta_dicts)
-
         # index atomic
         tmp_index = index_path + ".tmp"
         faiss.write_index(index, tmp_index)
         os.replace(tmp_index, index_path)
 
-        _save_json_atomic(meta_path, metas_raw)
+        # cột / text cũ chép thẳng sang thế hệ mới, chỉ dòng mới đi qua dict
+        with MetadataWriter(store_dir) as writer:
+            writer.copy_from(store_meta)
+            writer.extend(new_meta_dicts)
 
         manifest["files"] = (manifest.get("files", []) + new_manifest)
         _save_json_atomic(os.path.join(store_dir, "manifest.json"), manifest)
@@ -735,3 +832,255 @@ def append_vector_store(
         progress_cb(100)
 
     return int(added_chunks)
+
+
+# ---------- sync: cập nhật store theo thư mục gốc (thêm / sửa / xoá file) ----------
+SYNC_COMPACT_RATIO = float(os.environ.get("RAG_SYNC_COMPACT_RATIO", "0.25"))  # tỉ lệ tombstone thì dọn hẳn
+
+
+def _file_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+def _meta_abs_path(m: dict, folder_path: str) -> str:
+    ap = m.get("abs_path") or ""
+    if not ap and folder_path and m.get("rel_path"):
+        ap = os.path.join(folder_path, m["rel_path"])
+    return ap
+
+def _is_id_mapped(index) -> bool:
+    return isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2))
+
+def _index_add(index, vecs: np.ndarray, first_id: int) -> None:
+    """index.add; index ID-mapped (sau sync) cần id tường minh = vị trí trong metadata."""
+    if _is_id_mapped(index):
+        index.add_with_ids(vecs, np.arange(first_id, first_id + len(vecs), dtype="int64"))
+    else:
+        index.add(vecs)
+
+def _to_id_mapped(index):
+    """
+    IndexFlat (id = thứ tự add, remove_ids dồn id) -> IndexIDMap2 giữ nguyên id, xoá được từng vector.
+    HNSW không hỗ trợ remove_ids -> giữ nguyên (chỉ tombstone).
+    """
+    if _is_id_mapped(index) or hasattr(index, "hnsw"):
+        return index
+    n = int(index.ntotal)
+    mapped = faiss.IndexIDMap2(faiss.IndexFlat(index.d, index.metric_type))
+    if n:
+        mapped.add_with_ids(index.reconstruct_n(0, n), np.arange(n, dtype="int64"))
+    return mapped
+
+def _remove_from_index(index, ids: List[int]) -> bool:
+    """True nếu đã xoá vector khỏi index; False => chỉ còn tombstone trong metadata (retriever tự lọc)."""
+    if not ids or not _is_id_mapped(index):
+        return False
+    try:
+        index.remove_ids(np.asarray(ids, dtype="int64"))
+    except RuntimeError:
+        return False  # index con không xoá được (vd: IDMap bọc HNSW)
+    return True
+
+def _compact_index(index, live: List[int]):
+    """Bỏ hẳn tombstone: dựng index mới từ vector còn sống (reconstruct, không encode lại), id = 0..len(live)-1."""
+    use_hnsw = hasattr(index, "hnsw")
+    new_index, _ = _new_index(index.d, use_hnsw=use_hnsw)
+    if not use_hnsw:
+        new_index = faiss.IndexIDMap2(new_index)
+    if live:
+        vecs = np.vstack([index.reconstruct(i) for i in live]).astype("float32")
+        _index_add(new_index, vecs, 0)
+    return new_index
+
+def sync_vector_store(
+    store_dir: str,
+    extract_content_fn: Callable[[str], str],
+    progress_cb: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Đồng bộ store với thư mục gốc (base_path.txt), so với manifest.json:
+    - file mới -> thêm; file đổi (mtime / size) -> xoá chunk cũ + embed lại; file mất -> xoá chunk
+    - xoá = tombstone trong metadata + remove_ids (index Flat được chuyển sang IndexIDMap2);
+      HNSW không remove được -> retriever bỏ qua tombstone, quá RAG_SYNC_COMPACT_RATIO thì dựng lại index
+    - chỉ quét thêm file mới trong thư mục gốc khi index_config có "source" = "folder";
+      store build từ danh sách file / store cũ chưa ghi "source" (base_path có thể chỉ là commonpath
+      của vài file đã chọn): chỉ cập nhật / xoá các file đã học
+    - dedup theo hash chunk + should_skip_file_by_dup_ratio giống append_vector_store
+      (file append đã cố ý bỏ qua không bị thêm lại)
+    - chunk không đổi của file đã sửa lấy lại từ embedding cache, không encode lại
+    Returns: {"added", "updated", "deleted", "skipped_dup"} (số file) + {"chunks_added", "chunks_removed"}
+    """
+    index_path = os.path.join(store_dir, "index.faiss")
+    cfg_path   = os.path.join(store_dir, "index_config.json")
+    base_path  = os.path.join(store_dir, "base_path.txt")
+
+    if not (os.path.exists(index_path) and metadata_exists(store_dir) and os.path.exists(cfg_path)):
+        raise FileNotFoundError("Store thiếu index.faiss / metadata / index_config.json")
+
+    with open(cfg_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+
+    folder_path = ""
+    if os.path.exists(base_path):
+        folder_path = (open(base_path, "r", encoding="utf-8", errors="replace").read() or "").strip()
+    if not folder_path or not os.path.isdir(folder_path):
+        raise FileNotFoundError(f"Thư mục gốc của store không tồn tại: {folder_path or '(base_path.txt trống)'}")
+
+    index = faiss.read_index(index_path)
+    store_meta = load_metadata(store_dir)  # MetaStore: cột + bảng files, text chỉ đọc khi hash
+    manifest = _load_manifest(store_dir)
+
+    # file đã học: manifest (path, mtime, size); store cũ chưa có manifest -> suy từ metadata (chỉ so mtime)
+    indexed: Dict[str, dict] = {}
+    chunk_rows: Dict[str, List[int]] = {}  # file -> vị trí các chunk còn sống
+    for info, rows in iter_files(store_meta):
+        ap = _meta_abs_path(info, folder_path)
+        if not ap:
+            continue
+        key = _file_key(ap)
+        chunk_rows.setdefault(key, []).extend(rows)
+        indexed.setdefault(key, {"path": os.path.abspath(ap), "mtime": int(info["mtime"]), "size": None})
+    for it in manifest.get("files", []):
+        if it.get("path"):
+            indexed[_file_key(it["path"])] = dict(it)
+
+    current: Dict[str, dict] = {}
+    if cfg.get("source") == "folder":
+        for rec in walk_files(folder_path):
+            if rec.ext in DEFAULT_ALLOWED_EXT:
+                current[_file_key(rec.path)] = {
+                    "path": os.path.abspath(rec.path), "mtime": int(rec.mtime), "size": int(rec.size),
+                }
+    for key, it in indexed.items():  # file đã học nằm ngoài thư mục gốc (append) / store "files"
+        if key not in current:
+            entry = _manifest_entry(it["path"])
+            if entry:
+                current[key] = entry
+
+    added = [k for k in current if k not in indexed]
+    deleted = [k for k in indexed if k not in current]
+    updated = [
+        k for k in current
+        if k in indexed and (
+            current[k]["mtime"] != indexed[k].get("mtime")
+            or (indexed[k].get("size") is not None and current[k]["size"] != indexed[k]["size"])
+        )
+    ]
+    stats = {"added": len(added), "updated": len(updated), "deleted": len(deleted),
+             "skipped_dup": 0, "chunks_added": 0, "chunks_removed": 0}
+    if progress_cb:
+        progress_cb(5)
+    if not (added or updated or deleted):
+        if progress_cb:
+            progress_cb(100)
+        return stats
+
+    # ---- xoá chunk của file đổi / mất ----
+    # (tombstone: giữ chỗ trong metadata để vị trí = id trong index không dịch)
+    remove_ids = sorted(i for k in set(updated) | set(deleted) for i in chunk_rows.get(k, ()))
+    index = _to_id_mapped(index)
+    _remove_from_index(index, remove_ids)
+    dead = set(remove_ids)
+    stats["chunks_removed"] = len(remove_ids)
+    new_rows: List[dict] = []
+
+    # ---- embed file mới / đã đổi ----
+    to_embed = sorted(current[k]["path"] for k in added + updated)
+    if to_embed:
+        model_name = cfg.get("model_name", "sentence-transformers/all-MiniLM-L6-v2")
+        dim_expected = int(cfg.get("dim", 0))
+
+        CPU_THREADS = int(os.environ.get("RAG_CPU_THREADS", str(cfg.get("cpu_threads", 14))))
+        torch.set_num_threads(CPU_THREADS)
+        os.environ["OMP_NUM_THREADS"] = str(CPU_THREADS)
+        os.environ["MKL_NUM_THREADS"] = str(CPU_THREADS)
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = SentenceTransformer(model_name, device=device)
+        dim_now = int(model.get_sentence_embedding_dimension())
+        if dim_expected and dim_expected != dim_now:
+            raise ValueError(f"Embedding dim mismatch: store={dim_expected}, current={dim_now}")
+
+        chunk_size = int(cfg.get("chunk_size", 900))
+        batch_size = int(cfg.get("batch_size", 32))
+        MIN_CHUNK_LEN = int(os.environ.get("RAG_MIN_CHUNK_LEN", str(cfg.get("min_chunk_len", 80))))
+        source_folder = os.path.basename(folder_path.rstrip(os.sep))
+        cache = cache_for_store(store_dir)
+        existing_hashes = build_chunk_hashes(  # bỏ chunk cũ của file đổi / mất
+            t for i, t in enumerate(iter_texts(store_meta)) if i not in dead
+        )
+
+        total = len(to_embed)
+        for i, (file_path, raw) in enumerate(iter_extracted(to_embed, extract_content_fn), start=1):
+            if progress_cb:
+                progress_cb(5 + int(i * 85 / total))
+            try:
+                rel_path = os.path.relpath(file_path, folder_path)
+            except ValueError:
+                rel_path = os.path.basename(file_path)
+            try:
+                metas = _file_chunk_metas(
+                    file_path, raw, rel_path, source_folder, chunk_size, MIN_CHUNK_LEN, time.time()
+                )
+            except OSError:
+                metas = []  # file vừa bị xoá trong lúc sync
+            entry = _manifest_entry(file_path)
+            if entry:
+                current[_file_key(file_path)] = entry
+            else:
+                current.pop(_file_key(file_path), None)
+            if not metas:
+                continue
+
+            # trùng NỘI DUNG (chunk) với store: giống append_vector_store
+            hashes = [sha1_text(norm_for_hash(m.text)) for m in metas]
+            dup = sum(1 for h in hashes if h in existing_hashes)
+            if should_skip_file_by_dup_ratio(dup / len(metas), threshold=0.80):
+                stats["skipped_dup"] += 1
+                continue  # vẫn ghi manifest: sync sau không đọc lại
+            keep = []
+            for m, h in zip(metas, hashes):
+                if h not in existing_hashes:
+                    existing_hashes.add(h)
+                    keep.append(m)
+            metas = keep
+            if not metas:
+                continue
+
+            vecs = encode_cached(model, model_name, [m.text for m in metas], cache, batch_size)
+            first_id = len(store_meta) + len(new_rows)
+            _index_add(index, vecs, first_id)
+            for j, m in enumerate(metas):
+                m.id = first_id + j
+                new_rows.append(m.__dict__)
+            stats["chunks_added"] += len(metas)
+
+    # ---- dọn tombstone khi đã nhiều (HNSW: vector chết vẫn chiếm chỗ trong graph) ----
+    n_total = len(store_meta) + len(new_rows)
+    n_dead = count_deleted(store_meta) + len(dead)
+    live_old = None
+    if n_total and n_dead > SYNC_COMPACT_RATIO * n_total:
+        live_old = [i for i in range(len(store_meta)) if i not in dead and not is_deleted(store_meta, i)]
+        index = _compact_index(index, live_old + [m["id"] for m in new_rows])
+        for j, m in enumerate(new_rows, start=len(live_old)):
+            m["id"] = j
+
+    if progress_cb:
+        progress_cb(95)
+
+    # save (atomic); metadata cũ chép thẳng cột / text sang thế hệ mới, chỉ dòng mới đi qua dict
+    tmp_index = index_path + ".tmp"
+    faiss.write_index(index, tmp_index)
+    os.replace(tmp_index, index_path)
+    with MetadataWriter(store_dir) as writer:
+        if live_old is None:
+            writer.copy_from(store_meta, dead=dead)
+        else:
+            writer.copy_from(store_meta, rows=live_old)
+        writer.extend(new_rows)
+    manifest["files"] = sorted(current.values(), key=lambda it: it["path"])
+    _save_json_atomic(os.path.join(store_dir, "manifest.json"), manifest)
+
+    if progress_cb:
+        progress_cb(100)
+
+    return stats